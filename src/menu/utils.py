@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import threading
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import yaml
 
+# libyaml-backed loader when PyYAML was built with it (several times faster), else pure Python
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 ROOT_DIR = Path(__file__).resolve().parents[2]
 MENU_DIR = ROOT_DIR / "menu"
 DATA_DIR = ROOT_DIR / "data"
@@ -43,53 +49,218 @@ class MenuItem:
         if include_images:
             images = [str(p.relative_to(ROOT_DIR)) for p in find_images_for_slug(self.slug)]
             data["images"] = images
-            marker = marker_path(self.slug)
-            data["status"] = "processed" if marker.exists() else ("new" if images else "missing-image")
-            if marker.exists():
-                data["last_processed_at"] = marker.read_text().strip()
+            from src.pipeline.state import state_store  # pipeline state imports this module
+
+            processed_at = state_store().processed_at(self.slug)
+            data["status"] = "processed" if processed_at else ("new" if images else "missing-image")
+            if processed_at:
+                data["last_processed_at"] = processed_at
         data["source_file"] = str(self.source_file.relative_to(ROOT_DIR)) if self.source_file else None
         return data
 
 
-def load_menu_items() -> List[MenuItem]:
+def _parse_menu_file(yaml_path: Path) -> List[MenuItem]:
     items: List[MenuItem] = []
-    for yaml_path in sorted(MENU_DIR.glob("*.yaml")):
-        with yaml_path.open("r", encoding="utf-8") as handle:
-            document = yaml.safe_load(handle) or {}
-        course = document.get("course") or yaml_path.stem
-        for section in document.get("sections", []):
-            section_name = section.get("name", "Unknown Section")
-            section_notes = section.get("notes")
-            for raw_item in section.get("items", []):
-                slug = raw_item["slug"].strip()
-                description = raw_item.get("description") or "Description forthcoming."
-                item = MenuItem(
-                    slug=slug,
-                    name=raw_item.get("name", slug.replace("-", " ")).strip(),
-                    description=description.strip(),
-                    course=str(course),
-                    section=str(section_name),
-                    section_notes=section_notes,
-                    ingredients=raw_item.get("ingredients"),
-                    options=raw_item.get("options"),
-                    notes=raw_item.get("notes"),
-                    source_file=yaml_path,
-                )
-                items.append(item)
+    with yaml_path.open("r", encoding="utf-8") as handle:
+        document = yaml.load(handle, Loader=_YAML_LOADER) or {}
+    course = document.get("course") or yaml_path.stem
+    for section in document.get("sections", []):
+        section_name = section.get("name", "Unknown Section")
+        section_notes = section.get("notes")
+        for raw_item in section.get("items", []):
+            slug = raw_item["slug"].strip()
+            description = raw_item.get("description") or "Description forthcoming."
+            item = MenuItem(
+                slug=slug,
+                name=raw_item.get("name", slug.replace("-", " ")).strip(),
+                description=description.strip(),
+                course=str(course),
+                section=str(section_name),
+                section_notes=section_notes,
+                ingredients=raw_item.get("ingredients"),
+                options=raw_item.get("options"),
+                notes=raw_item.get("notes"),
+                source_file=yaml_path,
+            )
+            items.append(item)
     return items
 
 
+MenuSignature = Tuple[Tuple[str, int, int], ...]
+
+
+def _menu_signature(menu_dir: Path) -> MenuSignature:
+    """(name, mtime_ns, size) of every menu YAML; any edit, addition or removal changes it."""
+    out = []
+    for yaml_path in sorted(menu_dir.glob("*.yaml")):
+        try:
+            st = yaml_path.stat()
+        except OSError:
+            continue
+        out.append((yaml_path.name, st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+class MenuCatalog:
+    """Parsed menu with slug, course and section indexes.
+
+    Obtain via load_catalog(), which re-parses the YAML only when a file's mtime or size
+    changed; treat the MenuItem objects as read-only since they are shared between callers.
+    """
+
+    def __init__(self, items: List[MenuItem], signature: MenuSignature = ()):
+        self.items = items
+        self.signature = signature
+        self.by_slug: Dict[str, MenuItem] = {}
+        self.by_course: Dict[str, List[MenuItem]] = {}
+        self.by_section: Dict[Tuple[str, str], List[MenuItem]] = {}
+        for item in items:
+            # First definition wins, matching a linear scan of the YAML files
+            self.by_slug.setdefault(item.slug, item)
+            self.by_course.setdefault(item.course, []).append(item)
+            self.by_section.setdefault((item.course, item.section), []).append(item)
+
+    def get(self, slug: str) -> Optional[MenuItem]:
+        return self.by_slug.get(slug)
+
+    def course(self, course: str) -> List[MenuItem]:
+        return list(self.by_course.get(course, []))
+
+    def section(self, course: str, section: str) -> List[MenuItem]:
+        return list(self.by_section.get((course, section), []))
+
+    def __contains__(self, slug: object) -> bool:
+        return slug in self.by_slug
+
+    def __iter__(self) -> Iterator[MenuItem]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+_CATALOGS: Dict[Path, MenuCatalog] = {}
+_CATALOG_LOCK = threading.Lock()
+
+
+def load_catalog(menu_dir: Optional[Path] = None) -> MenuCatalog:
+    """Cached MenuCatalog for `menu_dir` (default MENU_DIR), rebuilt when any YAML changes.
+
+    A cache hit costs one stat() per menu file, independent of the number of items.
+    """
+    menu_dir = Path(menu_dir or MENU_DIR)
+    signature = _menu_signature(menu_dir)
+    with _CATALOG_LOCK:
+        cached = _CATALOGS.get(menu_dir)
+        if cached is not None and cached.signature == signature:
+            return cached
+    items: List[MenuItem] = []
+    for name, _, _ in signature:
+        items.extend(_parse_menu_file(menu_dir / name))
+    catalog = MenuCatalog(items, signature)
+    with _CATALOG_LOCK:
+        _CATALOGS[menu_dir] = catalog
+    return catalog
+
+
+def load_menu_items() -> List[MenuItem]:
+    return list(load_catalog().items)
+
+
+def slug_candidates(stem: str) -> List[str]:
+    """Slugs an image stem can belong to: the stem itself and every prefix before a '-'.
+
+    `linguine-clams-2` -> linguine-clams-2, linguine-clams, linguine; this is exactly the set
+    of slugs whose `{slug}{ext}` or `{slug}-*{ext}` pattern matches the file.
+    """
+    out = [stem]
+    idx = stem.rfind("-")
+    while idx > 0:
+        out.append(stem[:idx])
+        idx = stem.rfind("-", 0, idx)
+    return out
+
+
+class ImageIndex:
+    """slug -> source images, built from one os.scandir() of the data directory."""
+
+    def __init__(self, data_dir: Path, mtime_ns: int = 0):
+        self.data_dir = data_dir
+        self.mtime_ns = mtime_ns
+        self._by_slug: Dict[str, List[Path]] = {}
+        try:
+            entries = list(os.scandir(data_dir))
+        except OSError:
+            entries = []
+        for entry in entries:
+            stem, dot, ext = entry.name.rpartition(".")
+            if not dot or f".{ext}" not in SUPPORTED_IMAGE_EXTENSIONS or not entry.is_file():
+                continue
+            path = data_dir / entry.name
+            for slug in slug_candidates(stem):
+                self._by_slug.setdefault(slug, []).append(path)
+        for paths in self._by_slug.values():
+            paths.sort()
+
+    def for_slug(self, slug: str) -> List[Path]:
+        return list(self._by_slug.get(slug, ()))
+
+
+_IMAGE_INDEXES: Dict[Path, ImageIndex] = {}
+
+
+def image_index(data_dir: Optional[Path] = None) -> ImageIndex:
+    """Cached ImageIndex for `data_dir` (default DATA_DIR), rescanned when the directory's
+    mtime changes (a file was added, removed or renamed)."""
+    data_dir = Path(data_dir or DATA_DIR)
+    try:
+        mtime_ns = data_dir.stat().st_mtime_ns
+    except OSError:
+        mtime_ns = -1
+    with _CATALOG_LOCK:
+        cached = _IMAGE_INDEXES.get(data_dir)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached
+    index = ImageIndex(data_dir, mtime_ns)
+    with _CATALOG_LOCK:
+        _IMAGE_INDEXES[data_dir] = index
+    return index
+
+
 def find_images_for_slug(slug: str) -> List[Path]:
-    matches: List[Path] = []
-    for ext in SUPPORTED_IMAGE_EXTENSIONS:
-        direct = DATA_DIR / f"{slug}{ext}"
-        if direct.exists():
-            matches.append(direct)
-        matches.extend(sorted(DATA_DIR.glob(f"{slug}-*{ext}")))
-    return sorted(set(matches))
+    return image_index().for_slug(slug)
+
+
+# (path, size, mtime_ns) -> sha256, so unchanged files are hashed once per process
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+_DIGESTS_LOCK = threading.Lock()
+
+
+def file_digest(path: Optional[Path]) -> Optional[str]:
+    """sha256 of a file's bytes (None when it does not exist), cached on size and mtime."""
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (str(path), st.st_size, st.st_mtime_ns)
+    with _DIGESTS_LOCK:
+        cached = _DIGESTS.get(key)
+    if cached is not None:
+        return cached
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _DIGESTS_LOCK:
+        _DIGESTS[key] = value
+    return value
 
 
 def marker_path(slug: str) -> Path:
+    """Legacy processed marker; state now lives in src.pipeline.state (markers are imported once)."""
     return PROCESSED_DIR / f"{slug}.done"
 
 
@@ -100,7 +271,14 @@ def ensure_build_tree() -> None:
 
 
 def write_json(path: Path, payload: dict) -> None:
+    """Write `payload` as indented JSON atomically: readers see the old file or the new one, never a partial write."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2, ensure_ascii=False)
-        handle.write("\n")
\ No newline at end of file
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2, ensure_ascii=False)
+            handle.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
\ No newline at end of file
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+try:
+    import httpx
+except Exception as e:  # noqa: BLE001
+    httpx = None  # type: ignore[assignment]
+    _IMPORT_ERROR: Optional[Exception] = e
+else:
+    _IMPORT_ERROR = None
+
+from .breaker import endpoint_breaker
+from .cache import ResponseCache, payload_key
+from .client import _check_response, _circuit_open, _finish_call, _note_error, _sse_delta, _start_call
+from .config import MiniMaxConfig, load_config
+from .hedge import ahedged_call, hedge_budget, hedge_delay
+from .metrics import observe_usage
+from .ratelimit import build_endpoint_pools, endpoint_pool
+from .retry import CallStats, RetryPolicy, last_call_stats, record_call
+from .singleflight import AsyncSingleFlight
+from .streaming import StreamingJSONBody, has_file_fields
+
+
+class AsyncMiniMaxClient:
+    """Asyncio-native MiniMax API client.
+
+    Mirrors MiniMaxClient (same helpers, retry policy and base_resp error parsing) but runs on
+    an httpx.AsyncClient with a bounded keep-alive connection pool, so a single worker can
+    keep many generations in flight. Use as `async with AsyncMiniMaxClient() as client:`
+    or call `aclose()` when done.
+    """
+
+    def __init__(
+        self,
+        config: Optional[MiniMaxConfig] = None,
+        client: Optional["httpx.AsyncClient"] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        if _IMPORT_ERROR is not None:
+            raise RuntimeError("httpx is required for AsyncMiniMaxClient. Add httpx to requirements.txt") from _IMPORT_ERROR
+        self.config = config or load_config()
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=max(1, self.config.pool_maxsize),
+                max_keepalive_connections=max(0, self.config.pool_keepalive),
+            )
+            client = httpx.AsyncClient(limits=limits, timeout=self.config.timeout_sec)
+        self.http = client
+        self.http.headers.update({
+            "Authorization": f"Bearer {self.config.api_key}",
+            "Content-Type": "application/json",
+        })
+        self._pools = build_endpoint_pools(self.config)
+        self._retry = RetryPolicy.from_config(self.config)
+        self._flight = AsyncSingleFlight() if self.config.coalesce_requests else None
+        self.cache = cache or (ResponseCache.from_config(self.config) if self.config.cache_enabled else None)
+        self._log = logging.getLogger(__name__)
+
+    @property
+    def last_call_stats(self) -> Optional[CallStats]:
+        """Retry/wait accounting for the latest call made from the current task."""
+        return last_call_stats()
+
+    async def __aenter__(self) -> "AsyncMiniMaxClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    def _url(self, path: str) -> str:
+        return f"{self.config.base_url}{path}"
+
+    async def _request(self, method: str, path: str, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Perform a request, coalescing it with any identical call already in flight."""
+        if self._flight is None:
+            return await self._execute(method, path, json)
+        key = payload_key(f"{method.upper()} {path}", json or {})
+        data, shared = await self._flight.do(key, lambda: self._execute(method, path, json))
+        if shared:
+            record_call(CallStats(method=method.upper(), path=path, model=(json or {}).get("model"), outcome="coalesced"))
+        return data
+
+    async def _execute(self, method: str, path: str, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Perform an HTTP request with classified retries and error parsing."""
+        pool = endpoint_pool(self._pools, self.config, path)
+        body = StreamingJSONBody(json) if has_file_fields(json) else None
+        stats = _start_call(method, path, json, body)
+        breaker = endpoint_breaker(self.config, path)
+        started = time.monotonic()
+        while True:
+            if not breaker.allow():
+                raise _circuit_open(breaker, stats, started, self._log)
+            stats.attempts += 1
+            try:
+                url = self._url(path)
+                if self._log.isEnabledFor(logging.DEBUG):
+                    self._log.debug("MiniMax %s %s attempt=%s payloadKeys=%s", method.upper(), url, stats.attempts, list((json or {}).keys()))
+                async with pool.aslot() as queued:
+                    stats.queued_sec += queued
+                    attempt_started = time.monotonic()
+                    timeout = self._retry.attempt_timeout(self.config.timeout_sec, time.monotonic() - started)
+                    if body is not None:
+                        resp = await self.http.request(
+                            method.upper(),
+                            url,
+                            content=body.aiter_bytes(),
+                            headers={"Content-Length": str(len(body))},
+                            timeout=timeout,
+                        )
+                    else:
+                        resp = await self.http.request(method.upper(), url, json=json, timeout=timeout)
+                    # Validated inside the slot so the pool's adaptive limiter sees 429/5xx
+                    data = _check_response(resp.status_code, self._safe_json(resp), self._log, resp.headers)
+                stats.attempt_sec = round(time.monotonic() - attempt_started, 4)
+                breaker.record_success()
+                _finish_call(stats, started, None, self._log)
+                return data
+            except Exception as e:  # noqa: BLE001 classified below
+                _note_error(stats, e, breaker)
+                delay = self._retry.next_delay(stats.attempts, e, time.monotonic() - started)
+                if delay is None or breaker.is_open():
+                    final = _finish_call(stats, started, e, self._log)
+                    if final is e:
+                        raise
+                    raise final from e
+                stats.retries += 1
+                stats.backoff_sec += delay
+                if self._log.isEnabledFor(logging.DEBUG):
+                    self._log.debug("Retrying after error: %s backoff=%.2fs", e, delay)
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _safe_json(resp: "httpx.Response") -> Dict[str, Any]:
+        try:
+            return resp.json()
+        except Exception:  # noqa: BLE001
+            return {"raw": resp.text}
+
+    # High-level helpers -------------------------------------------------
+    async def chat_completions(self, messages: list[dict], model: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        """Text generation via chat completions endpoint."""
+        payload = {
+            "model": model or self.config.chat_model,
+            "messages": messages,
+        }
+        payload.update(kwargs)
+        if self.cache is None:
+            return await self._chat(payload)
+        key = payload_key(self.config.text_path, payload)
+        hit = self.cache.get(key)
+        if hit is not None:
+            record_call(CallStats(method="POST", path=self.config.text_path, model=payload["model"], outcome="cache"))
+            return hit
+        data = await self._chat(payload)
+        self.cache.put(key, data)
+        return data
+
+    async def _chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        data = await self._chat_call(payload)
+        observe_usage(payload, data)
+        return data
+
+    async def _chat_call(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        path = self.config.text_path
+        if not self.config.hedge_enabled:
+            return await self._request("POST", path, json=payload)
+        # The duplicate goes straight to _execute; single-flight would fold it into the original
+        return await ahedged_call(
+            lambda: self._request("POST", path, json=payload),
+            lambda: self._execute("POST", path, payload),
+            delay=hedge_delay(path, payload["model"], self.config.hedge_percentile, self.config.hedge_delay_sec),
+            budget=hedge_budget(self.config, path),
+            labels={"path": path, "model": payload["model"]},
+        )
+
+    async def chat_completions_stream(self, messages: list[dict], model: Optional[str] = None, **kwargs: Any) -> AsyncIterator[str]:
+        """Streamed chat completion (SSE); async-yields text deltas as they arrive.
+
+        Same semantics as MiniMaxClient.chat_completions_stream: closing early drops the
+        connection, and retries stop once the first delta has been yielded.
+        """
+        payload = {
+            "model": model or self.config.chat_model,
+            "messages": messages,
+        }
+        payload.update(kwargs)
+        payload["stream"] = True
+        path = self.config.text_path
+        pool = endpoint_pool(self._pools, self.config, path)
+        stats = _start_call("POST", path, payload)
+        breaker = endpoint_breaker(self.config, path)
+        started = time.monotonic()
+        yielded = False
+        while True:
+            if not breaker.allow():
+                raise _circuit_open(breaker, stats, started, self._log)
+            stats.attempts += 1
+            try:
+                async with pool.aslot() as queued:
+                    stats.queued_sec += queued
+                    timeout = self._retry.attempt_timeout(self.config.timeout_sec, time.monotonic() - started)
+                    async with self.http.stream("POST", self._url(path), json=payload, timeout=timeout) as resp:
+                        if resp.status_code >= 400:
+                            await resp.aread()
+                            _check_response(resp.status_code, self._safe_json(resp), self._log, resp.headers)
+                        async for line in resp.aiter_lines():
+                            done, text = _sse_delta(line)
+                            if text:
+                                yielded = True
+                                yield text
+                            if done:
+                                break
+                breaker.record_success()
+                _finish_call(stats, started, None, self._log)
+                return
+            except GeneratorExit:
+                breaker.record_success()
+                _finish_call(stats, started, None, self._log, outcome="stopped")
+                raise
+            except Exception as e:  # noqa: BLE001 classified below
+                _note_error(stats, e, breaker)
+                delay = None if yielded else self._retry.next_delay(stats.attempts, e, time.monotonic() - started)
+                if delay is None or breaker.is_open():
+                    final = _finish_call(stats, started, e, self._log)
+                    if final is e:
+                        raise
+                    raise final from e
+                stats.retries += 1
+                stats.backoff_sec += delay
+                await asyncio.sleep(delay)
+
+    async def image_generation(self, prompt: dict, **kwargs: Any) -> Dict[str, Any]:
+        """Text-to-image or image-enhance generation."""
+        payload = {"model": self.config.image_model}
+        payload.update(prompt)
+        payload.update(kwargs)
+        return await self._request("POST", self.config.image_path, json=payload)
+
+    async def text_to_speech(self, prompt: dict, **kwargs: Any) -> Dict[str, Any]:
+        """Text-to-speech (T2A) generation."""
+        payload = {"model": self.config.tts_model}
+        payload.update(prompt)
+        payload.update(kwargs)
+        return await self._request("POST", self.config.tts_path, json=payload)
+
+    async def music_generation(self, prompt: dict, **kwargs: Any) -> Dict[str, Any]:
+        """Music generation."""
+        payload = {"model": self.config.music_model}
+        payload.update(prompt)
+        payload.update(kwargs)
+        return await self._request("POST", self.config.music_path, json=payload)
+
+    async def video_generation(self, prompt: dict, **kwargs: Any) -> Dict[str, Any]:
+        """Video generation (text-to-video or image-to-video)."""
+        payload = {"model": self.config.video_model}
+        payload.update(prompt)
+        payload.update(kwargs)
+        return await self._request("POST", self.config.video_path, json=payload)
+
+    async def video_query(self, job_id: str) -> Dict[str, Any]:
+        """Query video generation job status using configured query path."""
+        payload = {"id": job_id}
+        return await self._request("POST", self.config.video_query_path, json=payload)
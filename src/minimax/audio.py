@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
 from base64 import b64decode
@@ -10,6 +12,7 @@ import requests
 
 from src.menu.utils import BUILD_DIR, ensure_build_tree, write_json
 from .client import MiniMaxClient
+from .registry import get_client
 
 
 _LOG = logging.getLogger(__name__)
@@ -95,6 +98,27 @@ def _extract_audio_bytes(resp: Dict[str, Any]) -> bytes:
     raise ValueError("Could not find audio content in MiniMax response")
 
 
+def voice_inputs(slug: str, *, client: Optional[MiniMaxClient] = None) -> Dict[str, Any]:
+    """Everything the narration track depends on, for incremental rebuilds (src.pipeline.state)."""
+    client = client or get_client()
+    content_path = BUILD_DIR / "content" / f"{slug}.json"
+    script = ""
+    if content_path.exists():
+        with content_path.open("r", encoding="utf-8") as f:
+            script = (json.load(f).get("narration_script") or "").strip()
+    return {
+        "script": hashlib.sha256(script.encode("utf-8")).hexdigest() if script else None,
+        "model": client.config.tts_model,
+        "voice_profile": os.getenv("VOICE_PROFILE", "warm"),
+    }
+
+
+def music_inputs(slug: str, *, client: Optional[MiniMaxClient] = None) -> Dict[str, Any]:
+    """Everything the background track depends on (not the narration), for incremental rebuilds."""
+    client = client or get_client()
+    return {"slug": slug, "model": client.config.music_model, "vibe": os.getenv("MUSIC_VIBE", "ambient")}
+
+
 def synthesize_voice_for_slug(
     slug: str,
     *,
@@ -113,7 +137,7 @@ def synthesize_voice_for_slug(
     ensure_build_tree()
     AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
-    client = client or MiniMaxClient()
+    client = client or get_client()
     voice = voice_profile or os.getenv("VOICE_PROFILE", "warm")
 
     # Load narration script if not provided
@@ -121,8 +145,6 @@ def synthesize_voice_for_slug(
         content_path = BUILD_DIR / "content" / f"{slug}.json"
         if not content_path.exists():
             raise FileNotFoundError(f"Narration script not found: {content_path}")
-        import json
-
         with content_path.open("r", encoding="utf-8") as f:
             content = json.load(f)
             script = (content.get("narration_script") or "").strip()
@@ -160,7 +182,7 @@ def compose_music_for_slug(
     ensure_build_tree()
     AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
-    client = client or MiniMaxClient()
+    client = client or get_client()
     mood = vibe or os.getenv("MUSIC_VIBE", "ambient")
 
     prompt = (
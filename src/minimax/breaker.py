@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from .config import MiniMaxConfig
+
+
+_LOG = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one MiniMax endpoint.
+
+    - closed: calls flow; `failure_threshold` consecutive failed attempts open the circuit.
+    - open: calls are rejected without touching the network until `reset_timeout` elapses.
+    - half_open: up to `half_open_max` probe calls go through; a success closes the circuit,
+      a failure re-opens it for another `reset_timeout`.
+
+    `failure_threshold=0` disables the breaker (always closed).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        half_open_max: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(0, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self.half_open_max = max(1, int(half_open_max))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 when not open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected; does not consume a half-open probe."""
+        return self.state == OPEN
+
+    def allow(self) -> bool:
+        """Admit one attempt; in half-open this claims one of the probe slots."""
+        if not self.failure_threshold:
+            return True
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_max:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED and _LOG.isEnabledFor(logging.INFO):
+                _LOG.info("Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN and _LOG.isEnabledFor(logging.WARNING):
+                    _LOG.warning("Circuit %s open after %s consecutive failures; retry in %.0fs", self.name, self._failures, self.reset_timeout)
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+
+_BREAKERS: Dict[Tuple[str, str], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def endpoint_breaker(config: MiniMaxConfig, path: str) -> CircuitBreaker:
+    """Process-wide breaker for `path` on `config.base_url`.
+
+    Shared across client instances so an outage seen while processing one slug fails fast
+    for the next, even though each pipeline step builds its own MiniMaxClient.
+    """
+    key = (config.base_url, path)
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            breaker = _BREAKERS[key] = CircuitBreaker(
+                path,
+                failure_threshold=config.breaker_failure_threshold,
+                reset_timeout=config.breaker_reset_sec,
+                half_open_max=config.breaker_half_open_max,
+            )
+        return breaker
+
+
+def reset_breakers() -> None:
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
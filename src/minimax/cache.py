@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.menu.utils import BUILD_DIR
+from .config import MiniMaxConfig
+
+
+_LOG = logging.getLogger(__name__)
+CACHE_DIR = BUILD_DIR / "cache" / "minimax"
+
+
+def payload_key(path: str, payload: Dict[str, Any]) -> str:
+    """Content address for a request: sha256 of the endpoint path plus canonical JSON payload."""
+    canonical = json.dumps({"path": path, "payload": payload}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of MiniMax JSON responses.
+
+    Entries live at `<root>/<key[:2]>/<key>.json`. Reads bump the file mtime so eviction is
+    least-recently-used; entries older than `ttl_sec` are treated as misses and removed.
+    When the cache grows past `max_bytes` the oldest entries are evicted down to 90%.
+    `refresh=True` skips reads but still writes, to repopulate stale entries.
+    """
+
+    def __init__(self, root: Path | str, *, max_bytes: int = 256 * 1024 * 1024, ttl_sec: float = 7 * 24 * 3600, refresh: bool = False):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: MiniMaxConfig) -> "ResponseCache":
+        return cls(
+            Path(config.cache_dir) if config.cache_dir else CACHE_DIR,
+            max_bytes=max(0, config.cache_max_mb) * 1024 * 1024,
+            ttl_sec=config.cache_ttl_sec,
+            refresh=config.cache_refresh,
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.refresh:
+            return None
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if self.ttl_sec > 0 and time.time() - float(entry.get("created", 0)) > self.ttl_sec:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("response")
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body = json.dumps({"created": time.time(), "response": response}, ensure_ascii=False)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan_total()
+            else:
+                self._total += len(body.encode("utf-8"))
+            if self.max_bytes and self._total > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._total is not None:
+                self._total -= size
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the cache is under 90% of max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total = total
+        if removed and _LOG.isEnabledFor(logging.DEBUG):
+            _LOG.debug("Evicted %s cache entries from %s", removed, self.root)
+
+
+def apply_cli_overrides(*, no_cache: bool = False, refresh: bool = False) -> None:
+    """Map --no-cache / --refresh-cache CLI flags onto the env read by load_config()."""
+    if no_cache:
+        os.environ["MINIMAX_CACHE"] = "0"
+    elif refresh:
+        os.environ["MINIMAX_CACHE"] = "1"
+        os.environ["MINIMAX_CACHE_REFRESH"] = "1"
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.menu.utils import BUILD_DIR
+from .config import MiniMaxConfig
+
+
+_LOG = logging.getLogger(__name__)
+CASSETTE_DIR = BUILD_DIR / "cassettes" / "minimax"
+
+# String values at least this long (base64 media, mostly) are stored out-of-line as blobs
+BLOB_MIN_CHARS = 1024
+# Response headers worth replaying; everything else is connection noise
+_KEPT_HEADERS = ("Content-Type", "Retry-After")
+
+
+class CassetteMissError(LookupError):
+    """Replay found no recorded response for a request (fatal: not retried)."""
+
+
+def request_key(method: str, url: str, body: Any) -> str:
+    """sha256 of method, URL path and request body. The host is ignored, so a cassette
+    recorded against the real API replays against any MINIMAX_BASE_URL."""
+    digest = hashlib.sha256(f"{method.upper()} {urlsplit(url).path}\n".encode("utf-8"))
+    if isinstance(body, str):
+        digest.update(body.encode("utf-8"))
+    elif isinstance(body, (bytes, bytearray)):
+        digest.update(body)
+    elif body is not None:
+        for chunk in body:  # StreamingJSONBody: re-iterable, hashed without materialising it
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Cassette:
+    """Recorded MiniMax exchanges: `<root>/cassette.jsonl` plus `<root>/blobs/<sha[:2]>/<sha>`.
+
+    Each JSONL line holds one response (status, kept headers, recorded latency, JSON body)
+    keyed by request_key(). Long strings in the body (base64 media) are replaced with
+    {"$blob": sha256, "b64": bool} and stored once as raw bytes, so repeated media is
+    deduplicated and the index stays small. Identical requests recorded several times
+    (video job polling) replay in recorded order; the last answer repeats once exhausted.
+    """
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._cursor: Dict[str, int] = defaultdict(int)
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "cassette.jsonl"
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.root / "blobs" / sha[:2] / sha
+
+    # Blobs ----------------------------------------------------------------
+    def _put_blob(self, data: bytes) -> str:
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return sha
+
+    def _get_blob(self, sha: str) -> bytes:
+        return self._blob_path(sha).read_bytes()
+
+    def _pack(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {k: self._pack(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._pack(v) for v in value]
+        if isinstance(value, str) and len(value) >= BLOB_MIN_CHARS:
+            try:
+                raw = base64.b64decode(value, validate=True)
+            except (binascii.Error, ValueError):
+                return {"$blob": self._put_blob(value.encode("utf-8")), "b64": False}
+            if base64.b64encode(raw).decode("ascii") == value:
+                return {"$blob": self._put_blob(raw), "b64": True}
+            return {"$blob": self._put_blob(value.encode("utf-8")), "b64": False}
+        return value
+
+    def _unpack(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if "$blob" in value and len(value) == 2:
+                raw = self._get_blob(value["$blob"])
+                return base64.b64encode(raw).decode("ascii") if value.get("b64") else raw.decode("utf-8")
+            return {k: self._unpack(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._unpack(v) for v in value]
+        return value
+
+    # Record / replay ------------------------------------------------------
+    def record(self, key: str, method: str, url: str, status: int, headers: Any, content: bytes, elapsed: float) -> None:
+        entry: Dict[str, Any] = {
+            "key": key,
+            "method": method.upper(),
+            "path": urlsplit(url).path,
+            "status": status,
+            "headers": {h: headers[h] for h in _KEPT_HEADERS if h in headers},
+            "elapsed": round(elapsed, 4),
+        }
+        try:
+            entry["json"] = self._pack(json.loads(content))
+        except ValueError:
+            entry["body"] = self._put_blob(content)  # SSE streams and other non-JSON bodies
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with self.index_path.open("a", encoding="utf-8") as fh:
+                fh.write(line)
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        try:
+            with self.index_path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry["key"]].append(entry)
+        except OSError:
+            pass
+        return entries
+
+    def next_response(self, key: str) -> Optional[Dict[str, Any]]:
+        """Next recorded entry for `key` (status, headers, elapsed, content bytes) or None."""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            recorded = self._entries.get(key)
+            if not recorded:
+                return None
+            entry = recorded[min(self._cursor[key], len(recorded) - 1)]
+            self._cursor[key] += 1
+        if "json" in entry:
+            content = json.dumps(self._unpack(entry["json"]), ensure_ascii=False).encode("utf-8")
+        else:
+            content = self._get_blob(entry["body"])
+        return {"status": entry["status"], "headers": entry.get("headers") or {}, "elapsed": entry.get("elapsed", 0.0), "content": content}
+
+    def rewind(self) -> None:
+        """Start replay from the first recorded response again (and re-read the index)."""
+        with self._lock:
+            self._entries = None
+            self._cursor.clear()
+
+
+class CassetteAdapter(BaseAdapter):
+    """requests transport adapter that records through `inner` or replays from a cassette.
+
+    Mounted below MiniMaxClient, so retries, breakers, rate limits and metrics behave as
+    in a live run. Replay sleeps the recorded latency times `latency_scale` (0 = none).
+    """
+
+    def __init__(self, cassette: Cassette, mode: str, *, inner: Optional[BaseAdapter] = None, latency_scale: float = 1.0):
+        super().__init__()
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner or HTTPAdapter()
+        self.latency_scale = max(0.0, latency_scale)
+        self._sleep = time.sleep
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        key = request_key(request.method or "GET", request.url or "", request.body)
+        if self.mode == "record":
+            started = time.monotonic()
+            resp = self.inner.send(request, **kwargs)
+            content = resp.content  # reads streamed bodies fully so they can be stored
+            elapsed = time.monotonic() - started
+            self.cassette.record(key, request.method or "GET", request.url or "", resp.status_code, resp.headers, content, elapsed)
+            return resp
+        entry = self.cassette.next_response(key)
+        if entry is None:
+            raise CassetteMissError(f"No recorded response for {request.method} {urlsplit(request.url or '').path} ({key[:12]})")
+        delay = entry["elapsed"] * self.latency_scale
+        if delay > 0:
+            self._sleep(delay)
+        return self._build_response(request, entry)
+
+    @staticmethod
+    def _build_response(request: requests.PreparedRequest, entry: Dict[str, Any]) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp._content = entry["content"]
+        resp._content_consumed = True
+        resp.encoding = "utf-8"
+        resp.url = request.url or ""
+        resp.request = request
+        resp.reason = "OK" if resp.status_code < 400 else "Recorded error"
+        return resp
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def cassette_adapter(config: MiniMaxConfig, inner: BaseAdapter) -> Optional[CassetteAdapter]:
+    """Adapter for MINIMAX_CASSETTE=record|replay, wrapping the pooled `inner` adapter; else None."""
+    mode = (config.cassette_mode or "").strip().lower()
+    if mode in ("", "off", "0"):
+        return None
+    root = Path(config.cassette_dir) if config.cassette_dir else CASSETTE_DIR
+    if _LOG.isEnabledFor(logging.INFO):
+        _LOG.info("MiniMax cassette %s: %s", mode, root)
+    return CassetteAdapter(Cassette(root), mode, inner=inner, latency_scale=config.cassette_latency_scale)
@@ -1,36 +1,177 @@
 from __future__ import annotations
 
+import json as _json
 import time
-from dataclasses import dataclass
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
 
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
 
+from .breaker import CircuitBreaker, endpoint_breaker
+from .cache import ResponseCache, payload_key
+from .cassette import cassette_adapter
 from .config import MiniMaxConfig, load_config
+from .hedge import hedged_call, hedge_budget, hedge_delay
+from .metrics import observe_usage
+from .ratelimit import build_endpoint_pools, endpoint_pool
+from .retry import CallStats, RetryPolicy, classify, is_throttle, last_call_stats, parse_retry_after, record_call
+from .singleflight import SingleFlight
+from .streaming import StreamingJSONBody, has_file_fields
 
 
 class MiniMaxError(RuntimeError):
-    def __init__(self, message: str, status_code: Optional[int] = None, payload: Optional[dict] = None):
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        payload: Optional[dict] = None,
+        *,
+        http_status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
         super().__init__(message)
+        # HTTP status for transport errors, base_resp.status_code for API errors
         self.status_code = status_code
         self.payload = payload or {}
+        self.http_status = http_status
+        # Server-requested delay (Retry-After) in seconds, if any
+        self.retry_after = retry_after
+        # CallStats for the failed call, set once retries are exhausted
+        self.stats: Optional[CallStats] = None
 
 
-@dataclass
-class _RateLimiter:
-    rpm: int
-    _last_ts: float = 0.0
+class CircuitOpenError(MiniMaxError):
+    """Raised without a network call while an endpoint's circuit breaker is open."""
 
-    def wait(self) -> None:
-        if self.rpm <= 0:
-            return
-        min_interval = 60.0 / float(self.rpm)
-        now = time.time()
-        elapsed = now - self._last_ts
-        if elapsed < min_interval:
-            time.sleep(min_interval - elapsed)
-        self._last_ts = time.time()
+    def __init__(self, path: str, retry_in: float):
+        super().__init__(f"MiniMax circuit open for {path}; retry in {retry_in:.0f}s", retry_after=retry_in)
+        self.path = path
+
+
+def _check_response(
+    status_code: int,
+    data: Dict[str, Any],
+    log: logging.Logger,
+    headers: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Validate an HTTP status and MiniMax base_resp envelope; return data or raise MiniMaxError.
+
+    Shared by the blocking and asyncio clients so both surface identical errors.
+    """
+    # Raise for transport-level issues (HTTP 4xx/5xx)
+    if status_code >= 400:
+        raise MiniMaxError(
+            f"HTTP {status_code} from MiniMax",
+            status_code=status_code,
+            payload=data,
+            http_status=status_code,
+            retry_after=parse_retry_after(headers),
+        )
+    # MiniMax success/error envelope
+    base = data.get("base_resp") or {}
+    code = base.get("status_code")
+    if code not in (None, 0):
+        # Non-zero indicates API error per docs
+        msg = base.get("status_msg") or "MiniMax API error"
+        if log.isEnabledFor(logging.WARNING):
+            log.warning("MiniMax API error: code=%s msg=%s", code, msg)
+        raise MiniMaxError(msg, status_code=code, payload=data)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("MiniMax response ok: status=%s keys=%s", status_code, list(data.keys()))
+    return data
+
+
+def _start_call(method: str, path: str, payload: Optional[Dict[str, Any]], body: Optional[StreamingJSONBody] = None) -> CallStats:
+    """Fresh stats for one logical call, tagged with the model and request body size."""
+    payload = payload or {}
+    size = len(body) if body is not None else (len(_json.dumps(payload)) if payload else 0)
+    return CallStats(method=method.upper(), path=path, model=payload.get("model"), request_bytes=size)
+
+
+def _note_error(stats: CallStats, err: BaseException, breaker: Optional[CircuitBreaker] = None) -> None:
+    stats.last_error = str(err)
+    throttled = is_throttle(err)
+    if throttled:
+        stats.throttled += 1
+    if breaker is not None:
+        # Only outages (5xx, timeouts, connection errors) count against the endpoint; a 429
+        # or a 4xx means it answered, so they close a half-open circuit like a success.
+        if classify(err) and not throttled:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+
+def _circuit_open(breaker: CircuitBreaker, stats: CallStats, started: float, log: logging.Logger) -> MiniMaxError:
+    err = _finish_call(stats, started, CircuitOpenError(stats.path, breaker.retry_in()), log, outcome="circuit_open")
+    assert err is not None
+    return err
+
+
+def _finish_call(
+    stats: CallStats, started: float, err: Optional[BaseException], log: logging.Logger, *, outcome: Optional[str] = None
+) -> Optional[MiniMaxError]:
+    """Close out per-call stats (and metrics); on failure return the MiniMaxError to raise (stats attached)."""
+    stats.elapsed_sec = round(time.monotonic() - started, 4)
+    stats.outcome = outcome or ("ok" if err is None else "error")
+    record_call(stats)
+    if stats.retries and log.isEnabledFor(logging.INFO):
+        log.info(
+            "MiniMax %s %s %s after %s attempt(s): backoff=%.2fs queued=%.2fs elapsed=%.2fs",
+            stats.method, stats.path, stats.outcome, stats.attempts, stats.backoff_sec, stats.queued_sec, stats.elapsed_sec,
+        )
+    if err is None:
+        return None
+    final = err if isinstance(err, MiniMaxError) else MiniMaxError(str(err) or "MiniMax request failed")
+    final.stats = stats
+    return final
+
+
+def _sse_delta(line: str) -> Tuple[bool, Optional[str]]:
+    """Parse one SSE line of a streamed chat completion into (done, text_delta).
+
+    Handles OpenAI-style `choices[0].delta.content` chunks and the `[DONE]` sentinel;
+    a non-zero base_resp inside the stream raises MiniMaxError.
+    """
+    line = (line or "").strip()
+    if not line.startswith("data:"):
+        return False, None
+    body = line[5:].strip()
+    if body == "[DONE]":
+        return True, None
+    try:
+        chunk = _json.loads(body)
+    except ValueError:
+        return False, None
+    base = chunk.get("base_resp") or {}
+    code = base.get("status_code")
+    if code not in (None, 0):
+        raise MiniMaxError(base.get("status_msg") or "MiniMax API error", status_code=code, payload=chunk)
+    choices = chunk.get("choices") or []
+    if not choices or not isinstance(choices[0], dict):
+        return False, None
+    delta = choices[0].get("delta") or {}
+    text = delta.get("content") if isinstance(delta, dict) else None
+    done = choices[0].get("finish_reason") not in (None, "")
+    return done, text if isinstance(text, str) and text else None
+
+
+def build_session(config: MiniMaxConfig) -> requests.Session:
+    """requests.Session whose adapter pools connections per the config.
+
+    urllib3 keeps up to `pool_maxsize` connections per host for reuse (extra ones opened
+    under load are closed after use); `pool_keepalive=0` disables keep-alive entirely.
+    With MINIMAX_CASSETTE set, the pooled adapter is wrapped for record/replay.
+    """
+    session = requests.Session()
+    adapter: BaseAdapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, config.pool_maxsize), pool_block=False)
+    adapter = cassette_adapter(config, adapter) or adapter
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if config.pool_keepalive <= 0:
+        session.headers["Connection"] = "close"
+    return session
 
 
 class MiniMaxClient:
@@ -38,64 +179,104 @@ class MiniMaxClient:
 
     Features:
     - Auth via Bearer token from env (see src.minimax.config.load_config)
-    - Rate limiting (RPM)
-    - Exponential backoff retries
+    - Per-endpoint quota pools: token-bucket RPM (optionally host-wide) plus a concurrency ceiling
+    - Error-classified retries: fatal 4xx/API codes fail fast, Retry-After honoured, full jitter, per-call deadline
     - Structured error handling parsing MiniMax base_resp envelope
     - Env-driven endpoints/models (no hardcoded constants required)
+    - Streamed chat completions (SSE) via chat_completions_stream()
+    - Streamed request bodies: B64File payload values are base64-encoded onto the socket in chunks
+    - Per-endpoint/model counters, latency histograms and chat token usage in metrics.REGISTRY
+    - Per-endpoint circuit breakers shared across clients; CircuitOpenError while open
+    - Optional AIMD adaptive in-flight limits per endpoint (MINIMAX_ADAPTIVE_CONCURRENCY)
+    - Optional hedged chat completions with a budget on extra calls (MINIMAX_HEDGE)
+    - Opt-in content-addressed cache for chat completions (MINIMAX_CACHE=1)
+    - Single-flight coalescing of concurrent identical requests (MINIMAX_COALESCE)
+    - Pooled keep-alive connections sized by MINIMAX_POOL_MAXSIZE; share one instance via
+      registry.get_client() rather than constructing a client per call
+    - Record/replay cassettes of raw exchanges for offline, quota-free runs (MINIMAX_CASSETTE)
     - Lightweight logging integrated with Python logging
     """
 
-    def __init__(self, config: Optional[MiniMaxConfig] = None, session: Optional[requests.Session] = None):
+    def __init__(
+        self,
+        config: Optional[MiniMaxConfig] = None,
+        session: Optional[requests.Session] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
         self.config = config or load_config()
-        self.session = session or requests.Session()
+        self.session = session or build_session(self.config)
         self.session.headers.update({
             "Authorization": f"Bearer {self.config.api_key}",
             "Content-Type": "application/json",
         })
-        self._limiter = _RateLimiter(self.config.rate_limit_rpm)
+        self._pools = build_endpoint_pools(self.config)
+        self._retry = RetryPolicy.from_config(self.config)
+        self._sleep = time.sleep
+        self._flight = SingleFlight() if self.config.coalesce_requests else None
+        self.cache = cache or (ResponseCache.from_config(self.config) if self.config.cache_enabled else None)
         self._log = logging.getLogger(__name__)
 
+    @property
+    def last_call_stats(self) -> Optional[CallStats]:
+        """Retry/wait accounting for the latest call made from this thread."""
+        return last_call_stats()
+
     def _url(self, path: str) -> str:
         return f"{self.config.base_url}{path}"
 
     def _request(self, method: str, path: str, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Perform an HTTP request with retries and error parsing."""
-        last_err: Optional[Exception] = None
-        for attempt in range(1, self.config.max_retries + 1):
-            self._limiter.wait()
+        """Perform a request, coalescing it with any identical call already in flight."""
+        if self._flight is None:
+            return self._execute(method, path, json)
+        key = payload_key(f"{method.upper()} {path}", json or {})
+        data, shared = self._flight.do(key, lambda: self._execute(method, path, json))
+        if shared:
+            record_call(CallStats(method=method.upper(), path=path, model=(json or {}).get("model"), outcome="coalesced"))
+        return data
+
+    def _execute(self, method: str, path: str, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Perform an HTTP request with classified retries and error parsing."""
+        pool = endpoint_pool(self._pools, self.config, path)
+        # File-backed base64 fields are encoded onto the socket in chunks; the body is re-iterable for retries
+        body = StreamingJSONBody(json) if has_file_fields(json) else None
+        stats = _start_call(method, path, json, body)
+        breaker = endpoint_breaker(self.config, path)
+        started = time.monotonic()
+        while True:
+            if not breaker.allow():
+                raise _circuit_open(breaker, stats, started, self._log)
+            stats.attempts += 1
             try:
                 url = self._url(path)
                 if self._log.isEnabledFor(logging.DEBUG):
-                    self._log.debug("MiniMax %s %s attempt=%s payloadKeys=%s", method.upper(), url, attempt, list((json or {}).keys()))
-                resp = self.session.request(method=method.upper(), url=url, json=json, timeout=self.config.timeout_sec)
-                # Raise for transport-level issues (HTTP 4xx/5xx)
-                if resp.status_code >= 400:
-                    raise MiniMaxError(f"HTTP {resp.status_code} from MiniMax", status_code=resp.status_code, payload=self._safe_json(resp))
-                data = self._safe_json(resp)
-                # MiniMax success/error envelope
-                base = data.get("base_resp") or {}
-                code = base.get("status_code")
-                if code not in (None, 0):
-                    # Non-zero indicates API error per docs
-                    msg = base.get("status_msg") or "MiniMax API error"
-                    if self._log.isEnabledFor(logging.WARNING):
-                        self._log.warning("MiniMax API error: code=%s msg=%s", code, msg)
-                    raise MiniMaxError(msg, status_code=code, payload=data)
-                if self._log.isEnabledFor(logging.DEBUG):
-                    self._log.debug("MiniMax response ok: status=%s keys=%s", resp.status_code, list(data.keys()))
+                    self._log.debug("MiniMax %s %s attempt=%s payloadKeys=%s", method.upper(), url, stats.attempts, list((json or {}).keys()))
+                with pool.slot() as queued:
+                    stats.queued_sec += queued
+                    attempt_started = time.monotonic()
+                    timeout = self._retry.attempt_timeout(self.config.timeout_sec, time.monotonic() - started)
+                    if body is not None:
+                        resp = self.session.request(method=method.upper(), url=url, data=body, timeout=timeout)
+                    else:
+                        resp = self.session.request(method=method.upper(), url=url, json=json, timeout=timeout)
+                    # Validated inside the slot so the pool's adaptive limiter sees 429/5xx
+                    data = _check_response(resp.status_code, self._safe_json(resp), self._log, getattr(resp, "headers", None))
+                stats.attempt_sec = round(time.monotonic() - attempt_started, 4)
+                breaker.record_success()
+                _finish_call(stats, started, None, self._log)
                 return data
-            except Exception as e:  # noqa: BLE001 broad for retry strategy
-                last_err = e
-                if attempt >= self.config.max_retries:
-                    break
-                # Exponential backoff with jitter
-                backoff = min(2 ** (attempt - 1), 16)
+            except Exception as e:  # noqa: BLE001 classified below
+                _note_error(stats, e, breaker)
+                delay = self._retry.next_delay(stats.attempts, e, time.monotonic() - started)
+                if delay is None or breaker.is_open():
+                    final = _finish_call(stats, started, e, self._log)
+                    if final is e:
+                        raise
+                    raise final from e
+                stats.retries += 1
+                stats.backoff_sec += delay
                 if self._log.isEnabledFor(logging.DEBUG):
-                    self._log.debug("Retrying after error: %s backoff=%ss", e, backoff)
-                time.sleep(backoff)
-        if isinstance(last_err, MiniMaxError):
-            raise last_err
-        raise MiniMaxError(str(last_err or "MiniMax request failed"))
+                    self._log.debug("Retrying after error: %s backoff=%.2fs", e, delay)
+                self._sleep(delay)
 
     @staticmethod
     def _safe_json(resp: requests.Response) -> Dict[str, Any]:
@@ -112,7 +293,94 @@ class MiniMaxClient:
             "messages": messages,
         }
         payload.update(kwargs)
-        return self._request("POST", self.config.text_path, json=payload)
+        if self.cache is None:
+            return self._chat(payload)
+        key = payload_key(self.config.text_path, payload)
+        hit = self.cache.get(key)
+        if hit is not None:
+            record_call(CallStats(method="POST", path=self.config.text_path, model=payload["model"], outcome="cache"))
+            return hit
+        data = self._chat(payload)
+        self.cache.put(key, data)
+        return data
+
+    def _chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        data = self._chat_call(payload)
+        observe_usage(payload, data)
+        return data
+
+    def _chat_call(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        path = self.config.text_path
+        if not self.config.hedge_enabled:
+            return self._request("POST", path, json=payload)
+        # The duplicate goes straight to _execute; single-flight would fold it into the original
+        return hedged_call(
+            lambda: self._request("POST", path, json=payload),
+            lambda: self._execute("POST", path, payload),
+            delay=hedge_delay(path, payload["model"], self.config.hedge_percentile, self.config.hedge_delay_sec),
+            budget=hedge_budget(self.config, path),
+            labels={"path": path, "model": payload["model"]},
+        )
+
+    def chat_completions_stream(self, messages: list[dict], model: Optional[str] = None, **kwargs: Any) -> Iterator[str]:
+        """Streamed chat completion (SSE); yields text deltas as they arrive.
+
+        Closing the iterator early (e.g. once a caption is long enough) closes the HTTP
+        response so no further tokens are read. Retries follow the client policy but only
+        until the first delta is yielded. Streamed calls bypass the response cache and
+        single-flight coalescing.
+        """
+        payload = {
+            "model": model or self.config.chat_model,
+            "messages": messages,
+        }
+        payload.update(kwargs)
+        payload["stream"] = True
+        path = self.config.text_path
+        pool = endpoint_pool(self._pools, self.config, path)
+        stats = _start_call("POST", path, payload)
+        breaker = endpoint_breaker(self.config, path)
+        started = time.monotonic()
+        yielded = False
+        while True:
+            if not breaker.allow():
+                raise _circuit_open(breaker, stats, started, self._log)
+            stats.attempts += 1
+            try:
+                with pool.slot() as queued:
+                    stats.queued_sec += queued
+                    timeout = self._retry.attempt_timeout(self.config.timeout_sec, time.monotonic() - started)
+                    resp = self.session.request(method="POST", url=self._url(path), json=payload, timeout=timeout, stream=True)
+                    try:
+                        if resp.status_code >= 400:
+                            _check_response(resp.status_code, self._safe_json(resp), self._log, getattr(resp, "headers", None))
+                        for line in resp.iter_lines(decode_unicode=True):
+                            done, text = _sse_delta(line)
+                            if text:
+                                yielded = True
+                                yield text
+                            if done:
+                                break
+                    finally:
+                        resp.close()
+                breaker.record_success()
+                _finish_call(stats, started, None, self._log)
+                return
+            except GeneratorExit:
+                breaker.record_success()
+                _finish_call(stats, started, None, self._log, outcome="stopped")
+                raise
+            except Exception as e:  # noqa: BLE001 classified below
+                _note_error(stats, e, breaker)
+                delay = None if yielded else self._retry.next_delay(stats.attempts, e, time.monotonic() - started)
+                if delay is None or breaker.is_open():
+                    final = _finish_call(stats, started, e, self._log)
+                    if final is e:
+                        raise
+                    raise final from e
+                stats.retries += 1
+                stats.backoff_sec += delay
+                self._sleep(delay)
 
     def image_generation(self, prompt: dict, **kwargs: Any) -> Dict[str, Any]:
         """Text-to-image or image-enhance generation."""
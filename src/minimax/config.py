@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 
 
 def _int_env(name: str, default: int) -> int:
@@ -12,6 +12,20 @@ def _int_env(name: str, default: int) -> int:
         return default
 
 
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _bool_env(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
 def _canonical_model(name: Optional[str], kind: str) -> Optional[str]:
     if not name:
         return None
@@ -35,6 +49,24 @@ def _canonical_model(name: Optional[str], kind: str) -> Optional[str]:
     return canon
 
 
+ENDPOINT_KINDS = ("text", "image", "tts", "music", "video", "video_query")
+
+# Chat models that emit a <think> block before the answer, and the max_tokens they get for it
+# unless MINIMAX_MAX_TOKENS_RESERVE is set
+REASONING_CHAT_MODELS = ("minimax-m1", "minimax-m2")
+REASONING_TOKENS_RESERVE = 1024
+
+
+@dataclass(frozen=True)
+class EndpointLimit:
+    """Quota pool for one endpoint: RPM sub-cap under the account-wide RATE_LIMIT_RPM (0 = none),
+    burst, and max in-flight requests (0 = unbounded)."""
+
+    rpm: int
+    burst: int = 1
+    max_concurrency: int = 0
+
+
 @dataclass(frozen=True)
 class MiniMaxConfig:
     base_url: str
@@ -47,8 +79,60 @@ class MiniMaxConfig:
     video_model: str
     # Client behavior
     rate_limit_rpm: int = 60
+    rate_limit_burst: int = 1
+    # When set, all processes on the host share one RPM budget stored in this SQLite file
+    rate_limit_shared_path: Optional[str] = None
+    rate_limit_shared_key: str = "minimax"
     max_retries: int = 3
     timeout_sec: int = 60
+    # Retry backoff (full jitter) and overall per-call deadline across attempts (0 = none)
+    retry_base_delay_sec: float = 1.0
+    retry_max_delay_sec: float = 16.0
+    retry_deadline_sec: float = 300.0
+    # Hedged chat completions: after the observed latency percentile (or hedge_delay_sec until
+    # enough samples exist) send a duplicate and keep the first answer; hedge_budget caps extra calls
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95
+    hedge_delay_sec: float = 2.0
+    hedge_budget: float = 0.1
+    # AIMD in-flight limit per endpoint, grown on healthy responses and cut on 429/5xx/slow p95
+    adaptive_concurrency: bool = False
+    adaptive_min_concurrency: int = 1
+    adaptive_max_concurrency: int = 16
+    adaptive_latency_factor: float = 2.0
+    # Per-endpoint circuit breaker: open after N consecutive failed attempts (0 disables),
+    # reject calls for reset_sec, then let half_open_max probe calls through
+    breaker_failure_threshold: int = 5
+    breaker_reset_sec: float = 60.0
+    breaker_half_open_max: int = 1
+    # Connection pool: max open connections and how many idle keep-alive sockets to retain
+    pool_maxsize: int = 20
+    pool_keepalive: int = 10
+    # Stream chat completions so captions can stop at the platform length limit
+    chat_stream: bool = False
+    # Request every platform caption in one JSON-structured chat call instead of one per platform
+    caption_batch: bool = False
+    # Narration scripts for up to N slugs per chat call within an estimated token budget (1 = off)
+    narration_batch_size: int = 1
+    narration_batch_tokens: int = 6000
+    # max_tokens sizing (see text.max_tokens_for_chars): multiplier on the estimate for the target
+    # length, plus extra tokens for models that emit reasoning before the answer (None = by model,
+    # see tokens_reserve)
+    max_tokens_margin: float = 1.5
+    max_tokens_reserve: Optional[int] = None
+    # Share one upstream call among concurrent byte-identical requests
+    coalesce_requests: bool = True
+    # Opt-in on-disk cache of chat responses (see src.minimax.cache)
+    cache_enabled: bool = False
+    cache_refresh: bool = False
+    cache_dir: Optional[str] = None
+    cache_max_mb: int = 256
+    cache_ttl_sec: int = 7 * 24 * 3600
+    # Record/replay of raw HTTP exchanges (see src.minimax.cassette): "", "record" or "replay";
+    # replay sleeps the recorded latency times cassette_latency_scale (0 = no delay)
+    cassette_mode: str = ""
+    cassette_dir: Optional[str] = None
+    cassette_latency_scale: float = 1.0
     # Endpoint paths (override via env if needed)
     text_path: str = "/v1/text/chat/completions"
     image_path: str = "/v1/image_generation"
@@ -56,6 +140,28 @@ class MiniMaxConfig:
     music_path: str = "/v1/music_generation"
     video_path: str = "/v1/video_generation"
     video_query_path: str = "/v1/video_generation/query"
+    # Per-endpoint quota pools keyed by ENDPOINT_KINDS, all drawing from the rate_limit_rpm account
+    # bucket; a pool's own rpm is an extra sub-cap (kinds not listed have none)
+    endpoint_limits: Dict[str, EndpointLimit] = field(default_factory=dict)
+
+    def endpoint_paths(self) -> Dict[str, str]:
+        return {
+            "text": self.text_path,
+            "image": self.image_path,
+            "tts": self.tts_path,
+            "music": self.music_path,
+            "video": self.video_path,
+            "video_query": self.video_query_path,
+        }
+
+    def endpoint_limit(self, kind: str) -> EndpointLimit:
+        return self.endpoint_limits.get(kind) or EndpointLimit(0, self.rate_limit_burst)
+
+    def tokens_reserve(self) -> int:
+        """max_tokens added for reasoning: max_tokens_reserve if set, else by chat model."""
+        if self.max_tokens_reserve is not None:
+            return max(0, self.max_tokens_reserve)
+        return REASONING_TOKENS_RESERVE if self.chat_model.lower().startswith(REASONING_CHAT_MODELS) else 0
 
 
 def load_config() -> MiniMaxConfig:
@@ -69,8 +175,43 @@ def load_config() -> MiniMaxConfig:
     video_model = _canonical_model(os.getenv("MINIMAX_VIDEO_MODEL", "MiniMax-Hailuo-2.3"), "video") or "MiniMax-Hailuo-2.3"
 
     rate_limit_rpm = _int_env("RATE_LIMIT_RPM", 60)
+    rate_limit_burst = _int_env("RATE_LIMIT_BURST", 1)
+    rate_limit_shared_path = os.getenv("RATE_LIMIT_SHARED_PATH", "").strip() or None
+    rate_limit_shared_key = os.getenv("RATE_LIMIT_SHARED_KEY", "minimax").strip() or "minimax"
     max_retries = _int_env("MAX_RETRIES", 3)
     timeout_sec = _int_env("MINIMAX_TIMEOUT_SEC", 60)
+    retry_base_delay_sec = _float_env("MINIMAX_RETRY_BASE_DELAY_SEC", 1.0)
+    retry_max_delay_sec = _float_env("MINIMAX_RETRY_MAX_DELAY_SEC", 16.0)
+    retry_deadline_sec = _float_env("MINIMAX_RETRY_DEADLINE_SEC", 300.0)
+    hedge_enabled = _bool_env("MINIMAX_HEDGE", False)
+    hedge_percentile = _float_env("MINIMAX_HEDGE_PERCENTILE", 0.95)
+    hedge_delay_sec = _float_env("MINIMAX_HEDGE_DELAY_SEC", 2.0)
+    hedge_budget = _float_env("MINIMAX_HEDGE_BUDGET", 0.1)
+    adaptive_concurrency = _bool_env("MINIMAX_ADAPTIVE_CONCURRENCY", False)
+    adaptive_min_concurrency = _int_env("MINIMAX_ADAPTIVE_MIN", 1)
+    adaptive_max_concurrency = _int_env("MINIMAX_ADAPTIVE_MAX", 16)
+    adaptive_latency_factor = _float_env("MINIMAX_ADAPTIVE_LATENCY_FACTOR", 2.0)
+    breaker_failure_threshold = _int_env("MINIMAX_BREAKER_THRESHOLD", 5)
+    breaker_reset_sec = _float_env("MINIMAX_BREAKER_RESET_SEC", 60.0)
+    breaker_half_open_max = _int_env("MINIMAX_BREAKER_HALF_OPEN_MAX", 1)
+    pool_maxsize = _int_env("MINIMAX_POOL_MAXSIZE", 20)
+    pool_keepalive = _int_env("MINIMAX_POOL_KEEPALIVE", 10)
+
+    chat_stream = _bool_env("MINIMAX_CHAT_STREAM", False)
+    caption_batch = _bool_env("MINIMAX_CAPTION_BATCH", False)
+    narration_batch_size = _int_env("MINIMAX_NARRATION_BATCH", 1)
+    narration_batch_tokens = _int_env("MINIMAX_NARRATION_BATCH_TOKENS", 6000)
+    max_tokens_margin = _float_env("MINIMAX_MAX_TOKENS_MARGIN", 1.5)
+    max_tokens_reserve = _int_env("MINIMAX_MAX_TOKENS_RESERVE", 0) if os.getenv("MINIMAX_MAX_TOKENS_RESERVE", "").strip() else None
+    coalesce_requests = _bool_env("MINIMAX_COALESCE", True)
+    cache_enabled = _bool_env("MINIMAX_CACHE", False)
+    cache_refresh = _bool_env("MINIMAX_CACHE_REFRESH", False)
+    cache_dir = os.getenv("MINIMAX_CACHE_DIR", "").strip() or None
+    cache_max_mb = _int_env("MINIMAX_CACHE_MAX_MB", 256)
+    cache_ttl_sec = _int_env("MINIMAX_CACHE_TTL_SEC", 7 * 24 * 3600)
+    cassette_mode = os.getenv("MINIMAX_CASSETTE", "").strip().lower()
+    cassette_dir = os.getenv("MINIMAX_CASSETTE_DIR", "").strip() or None
+    cassette_latency_scale = _float_env("MINIMAX_CASSETTE_LATENCY_SCALE", 1.0)
 
     text_path = os.getenv("MINIMAX_TEXT_PATH", "/v1/text/chat/completions")
     image_path = os.getenv("MINIMAX_IMAGE_PATH", "/v1/image_generation")
@@ -79,6 +220,17 @@ def load_config() -> MiniMaxConfig:
     video_path = os.getenv("MINIMAX_VIDEO_PATH", "/v1/video_generation")
     video_query_path = os.getenv("MINIMAX_VIDEO_QUERY_PATH", "/v1/video_generation/query")
 
+    # Per-endpoint sub-caps under RATE_LIMIT_RPM, e.g. RATE_LIMIT_RPM_VIDEO_QUERY=20, MAX_CONCURRENCY_VIDEO=2
+    max_concurrency = _int_env("MAX_CONCURRENCY", 0)
+    endpoint_limits = {
+        kind: EndpointLimit(
+            rpm=_int_env(f"RATE_LIMIT_RPM_{kind.upper()}", 0),
+            burst=_int_env(f"RATE_LIMIT_BURST_{kind.upper()}", rate_limit_burst),
+            max_concurrency=_int_env(f"MAX_CONCURRENCY_{kind.upper()}", max_concurrency),
+        )
+        for kind in ENDPOINT_KINDS
+    }
+
     return MiniMaxConfig(
         base_url=base_url,
         api_key=api_key,
@@ -88,12 +240,47 @@ def load_config() -> MiniMaxConfig:
         music_model=music_model,
         video_model=video_model,
         rate_limit_rpm=rate_limit_rpm,
+        rate_limit_burst=rate_limit_burst,
+        rate_limit_shared_path=rate_limit_shared_path,
+        rate_limit_shared_key=rate_limit_shared_key,
         max_retries=max_retries,
         timeout_sec=timeout_sec,
+        retry_base_delay_sec=retry_base_delay_sec,
+        retry_max_delay_sec=retry_max_delay_sec,
+        retry_deadline_sec=retry_deadline_sec,
+        hedge_enabled=hedge_enabled,
+        hedge_percentile=hedge_percentile,
+        hedge_delay_sec=hedge_delay_sec,
+        hedge_budget=hedge_budget,
+        adaptive_concurrency=adaptive_concurrency,
+        adaptive_min_concurrency=adaptive_min_concurrency,
+        adaptive_max_concurrency=adaptive_max_concurrency,
+        adaptive_latency_factor=adaptive_latency_factor,
+        breaker_failure_threshold=breaker_failure_threshold,
+        breaker_reset_sec=breaker_reset_sec,
+        breaker_half_open_max=breaker_half_open_max,
+        pool_maxsize=pool_maxsize,
+        pool_keepalive=pool_keepalive,
+        chat_stream=chat_stream,
+        caption_batch=caption_batch,
+        narration_batch_size=narration_batch_size,
+        narration_batch_tokens=narration_batch_tokens,
+        max_tokens_margin=max_tokens_margin,
+        max_tokens_reserve=max_tokens_reserve,
+        coalesce_requests=coalesce_requests,
+        cache_enabled=cache_enabled,
+        cache_refresh=cache_refresh,
+        cache_dir=cache_dir,
+        cache_max_mb=cache_max_mb,
+        cache_ttl_sec=cache_ttl_sec,
+        cassette_mode=cassette_mode,
+        cassette_dir=cassette_dir,
+        cassette_latency_scale=cassette_latency_scale,
         text_path=text_path,
         image_path=image_path,
         tts_path=tts_path,
         music_path=music_path,
         video_path=video_path,
         video_query_path=video_query_path,
+        endpoint_limits=endpoint_limits,
     )
@@ -1,19 +1,25 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
+import re
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from src.menu.utils import BUILD_DIR, ITEM_OUTPUT_DIR, ensure_build_tree, write_json
-from .client import MiniMaxClient
-from .text import generate_text
+from .client import MiniMaxClient, MiniMaxError
+from .registry import get_client
+from .retry import classify, is_throttle
+from .text import completion_budget, estimate_tokens, generate_text, generate_text_stream, narration_chars
 from src.platforms.specs import PLATFORM_SPECS
 
 
 _LOG = logging.getLogger(__name__)
 CONTENT_DIR = BUILD_DIR / "content"
+# Target voiceover length; sizes the narration prompt and its max_tokens
+NARRATION_READ_SEC = 20
 
 
 def _load_item_json(slug: str) -> Dict[str, Any]:
@@ -30,8 +36,16 @@ def _read_json(path: Path) -> Dict[str, Any]:
         return json.load(f)
 
 
+# Reasoning that models such as MiniMax-M2 emit before the answer; unclosed when cut off
+_THINK_RE = re.compile(r"<think>.*?(?:</think>|$)", re.DOTALL)
+
+
+def _strip_reasoning(text: str) -> str:
+    return _THINK_RE.sub("", text)
+
+
 def _extract_text_from_response(resp: Dict[str, Any]) -> str:
-    """Best-effort extraction of text from MiniMax chat completion response."""
+    """Best-effort extraction of the answer text (reasoning removed) from a chat completion response."""
     # Anthropic-like: { choices: [ { message: { content: "..." } } ] }
     try:
         choices = resp.get("choices") or resp.get("data")
@@ -41,7 +55,7 @@ def _extract_text_from_response(resp: Dict[str, Any]) -> str:
             if isinstance(msg, dict):
                 content = msg.get("content")
                 if isinstance(content, str):
-                    return content
+                    return _strip_reasoning(content)
     except Exception:  # noqa: BLE001
         pass
     # Generic outputs
@@ -121,6 +135,29 @@ def _clip(text: str, limit: int) -> str:
     return text[: max(1, limit - 1)].rstrip() + "…"
 
 
+def _stream_caption(client: MiniMaxClient, messages: List[Dict[str, Any]], system: str, limit: int) -> str:
+    """Collect streamed caption deltas, hanging up once the text exceeds `limit`.
+
+    `_clip` only looks at the first `limit` characters and whether the text is longer,
+    so stopping at limit + 1 gives the same clipped caption as a full completion.
+    """
+    text = ""
+    stream = generate_text_stream(
+        client, messages=messages, system=system, temperature=0.7, max_tokens=completion_budget(client, limit)
+    )
+    try:
+        for delta in stream:
+            text += delta
+            # Captions are stripped before clipping, so measure the stripped answer
+            if limit > 0 and len(_strip_reasoning(text).strip()) > limit:
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+    return _strip_reasoning(text)
+
+
 def _hashtags_from(item: Dict[str, Any], local: Dict[str, Any]) -> List[str]:
     base = [
         "#Italian",
@@ -156,12 +193,60 @@ def _build_narration_user_prompt(item: Dict[str, Any], local: Dict[str, Any]) ->
         f"Description: {item.get('description', '')}",
         f"Ingredients: {', '.join(item.get('ingredients') or [])}",
         f"Location: {local.get('city')}, {local.get('region')}",
-        "Voice and style: warm, inviting, natural; 20s read time.",
+        f"Voice and style: warm, inviting, natural; {NARRATION_READ_SEC}s read time.",
         "Include the restaurant name '41 Bistro' and a gentle call to action.",
     ]
     return "\n".join(parts)
 
 
+def _build_batch_narration_user_prompt(items: List[Dict[str, Any]], local: Dict[str, Any]) -> str:
+    parts = [_narration_item_block(item) for item in items]
+    parts += [
+        f"Location: {local.get('city')}, {local.get('region')}",
+        f"Write one voiceover script per menu item above. Voice and style: warm, inviting, natural; {NARRATION_READ_SEC}s read time.",
+        "Each script includes the restaurant name '41 Bistro' and a gentle call to action.",
+        "Respond with only a JSON object mapping each slug to its script string.",
+    ]
+    return "\n\n".join(parts)
+
+
+def _narration_item_block(item: Dict[str, Any]) -> str:
+    return "\n".join(
+        [
+            f"Slug: {item.get('slug')}",
+            f"Menu item: {item.get('name')}",
+            f"Description: {item.get('description', '')}",
+            f"Ingredients: {', '.join(item.get('ingredients') or [])}",
+        ]
+    )
+
+
+def _narration_budget(client: MiniMaxClient, reasoning: bool = True) -> int:
+    return completion_budget(client, narration_chars(NARRATION_READ_SEC), reasoning=reasoning)
+
+
+def _pack_narration_batches(
+    items: List[Dict[str, Any]], max_items: int, token_budget: int, output_tokens: int
+) -> List[List[Dict[str, Any]]]:
+    """Greedily group items so each call stays within `max_items` and the estimated prompt plus
+    `output_tokens` per script stay within `token_budget` (an oversized item still gets a batch
+    of its own)."""
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = estimate_tokens(_build_system_prompt()) + 100  # shared instructions
+    base = used
+    for item in items:
+        cost = estimate_tokens(_narration_item_block(item)) + output_tokens
+        if current and (len(current) >= max_items or used + cost > token_budget):
+            batches.append(current)
+            current, used = [], base
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
 def _build_caption_user_prompt(platform: str, item: Dict[str, Any], local: Dict[str, Any], limit: int) -> str:
     keywords = ", ".join(local.get("keywords", []))
     parts = [
@@ -178,6 +263,95 @@ def _build_caption_user_prompt(platform: str, item: Dict[str, Any], local: Dict[
     return "\n".join(parts)
 
 
+def _build_batch_caption_user_prompt(limits: Dict[str, int], item: Dict[str, Any], local: Dict[str, Any]) -> str:
+    keywords = ", ".join(local.get("keywords", []))
+    parts = [
+        f"Menu item: {item.get('name')} ({item.get('slug')})",
+        f"Description: {item.get('description', '')}",
+        f"Ingredients: {', '.join(item.get('ingredients') or [])}",
+        f"Local SEO keywords: {keywords}",
+        "Include: '41 Bistro', 'Fort Myers, FL', 'Southwest Florida'.",
+        "Tone: warm, modern Italian bistro. Use sensory words.",
+        "Write one caption per platform, each ending with a short call to action (hashtags appended separately):",
+    ]
+    parts += [f"- {platform}: <= {limit} characters" for platform, limit in limits.items()]
+    parts.append('Respond with only a JSON object mapping each platform name to its caption string, e.g. {"' + next(iter(limits)) + '": "..."}.')
+    return "\n".join(parts)
+
+
+def _parse_json_object(text: str) -> Dict[str, Any]:
+    """Best-effort JSON object from a batched reply (tolerates fences, reasoning and prose)."""
+    text = _strip_reasoning(text)
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start : end + 1])
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _batch_fallback(err: MiniMaxError) -> bool:
+    """True when a failed batched call should fall back to per-item calls.
+
+    Only retryable and throttled failures qualify; a fatal 4xx (bad key, invalid request) or
+    an open circuit would fail every per-item call the same way, so those propagate.
+    """
+    return classify(err) or is_throttle(err)
+
+
+def _batch_captions(
+    client: MiniMaxClient, limits: Dict[str, int], item: Dict[str, Any], local: Dict[str, Any], system: str
+) -> Dict[str, str]:
+    """All platform captions from one chat completion; platforms with a malformed entry are omitted.
+
+    A reply that is not a JSON object, or a call that fails with a retryable or throttling
+    error, yields no captions so every platform falls back to _single_caption.
+    """
+    try:
+        resp = generate_text(
+            client,
+            messages=[{"role": "user", "content": _build_batch_caption_user_prompt(limits, item, local)}],
+            system=system,
+            temperature=0.7,
+            # Each caption plus its JSON key and quoting, and one reasoning reserve for the call
+            max_tokens=client.config.tokens_reserve()
+            + sum(completion_budget(client, limit, reasoning=False) + estimate_tokens(platform) + 4 for platform, limit in limits.items()),
+        )
+    except MiniMaxError as e:
+        if not _batch_fallback(e):
+            raise
+        if _LOG.isEnabledFor(logging.WARNING):
+            _LOG.warning("Batched captions for %s failed (%s); falling back per platform", item.get("slug"), e)
+        return {}
+    parsed = _parse_json_object(_extract_text_from_response(resp))
+    out: Dict[str, str] = {}
+    for platform in limits:
+        entry = parsed.get(platform)
+        if isinstance(entry, dict):
+            entry = entry.get("caption")
+        if isinstance(entry, str) and entry.strip():
+            out[platform] = entry
+    return out
+
+
+def _single_caption(
+    client: MiniMaxClient, platform: str, item: Dict[str, Any], local: Dict[str, Any], system: str, limit: int, use_stream: bool
+) -> str:
+    messages = [{"role": "user", "content": _build_caption_user_prompt(platform, item, local, limit)}]
+    if use_stream:
+        return _stream_caption(client, messages, system, limit)
+    resp = generate_text(
+        client,
+        messages=messages,
+        system=system,
+        temperature=0.7,
+        max_tokens=completion_budget(client, limit),
+    )
+    return _extract_text_from_response(resp)
+
+
 def generate_narration_script(
     slug: str,
     *,
@@ -190,7 +364,7 @@ def generate_narration_script(
 
     item = _load_item_json(slug)
     local = local_context or _default_local_seo_context()
-    client = client or MiniMaxClient()
+    client = client or get_client()
 
     sys_prompt = _build_system_prompt()
     user_prompt = _build_narration_user_prompt(item, local)
@@ -200,10 +374,13 @@ def generate_narration_script(
         messages=[{"role": "user", "content": user_prompt}],
         system=sys_prompt,
         temperature=0.7,
-        max_tokens=300,
+        max_tokens=_narration_budget(client),
     )
     script = _extract_text_from_response(resp).strip()
+    return _save_narration(slug, script, client)
 
+
+def _save_narration(slug: str, script: str, client: MiniMaxClient) -> Dict[str, Any]:
     out_path = CONTENT_DIR / f"{slug}.json"
     data = {}
     if out_path.exists():
@@ -220,40 +397,138 @@ def generate_narration_script(
     return {"slug": slug, "script": script, "path": str(out_path)}
 
 
+def generate_narration_scripts(
+    slugs: List[str],
+    *,
+    client: Optional[MiniMaxClient] = None,
+    local_context: Optional[Dict[str, Any]] = None,
+    max_items: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Narration scripts for many slugs, several menu items per chat call.
+
+    Items are packed into calls of at most `max_items` (default: MINIMAX_NARRATION_BATCH)
+    whose estimated prompt + output tokens fit `token_budget` (MINIMAX_NARRATION_BATCH_TOKENS).
+    Each call asks for a JSON object of slug -> script; slugs missing from the reply (or in a
+    call that failed with a retryable or throttling error) get a single generate_narration_script
+    call; fatal errors and open circuits are raised. Every build/content/{slug}.json is merged
+    and written atomically, as with the single-slug function. Returns slug -> result for the
+    slugs that got a script.
+    """
+    ensure_build_tree()
+    CONTENT_DIR.mkdir(parents=True, exist_ok=True)
+
+    local = local_context or _default_local_seo_context()
+    client = client or get_client()
+    max_items = max(1, max_items or client.config.narration_batch_size)
+    token_budget = token_budget or client.config.narration_batch_tokens
+    sys_prompt = _build_system_prompt()
+
+    items = [_load_item_json(slug) for slug in slugs]
+    results: Dict[str, Dict[str, Any]] = {}
+    # A batched call reasons once, so the reasoning reserve is counted per call, not per script
+    reserve = client.config.tokens_reserve()
+    per_script = _narration_budget(client, reasoning=False)
+    for batch in _pack_narration_batches(items, max_items, token_budget - reserve, per_script):
+        if len(batch) == 1:
+            continue  # cheaper and better prompted as a single call below
+        try:
+            resp = generate_text(
+                client,
+                messages=[{"role": "user", "content": _build_batch_narration_user_prompt(batch, local)}],
+                system=sys_prompt,
+                temperature=0.7,
+                max_tokens=reserve + sum(per_script + estimate_tokens(item.get("slug") or "") + 4 for item in batch),
+            )
+        except MiniMaxError as e:
+            if not _batch_fallback(e):
+                raise
+            if _LOG.isEnabledFor(logging.WARNING):
+                _LOG.warning("Batched narration for %s items failed (%s); falling back per item", len(batch), e)
+            continue
+        parsed = _parse_json_object(_extract_text_from_response(resp))
+        for item in batch:
+            script = parsed.get(item.get("slug"))
+            if isinstance(script, str) and script.strip():
+                results[item["slug"]] = _save_narration(item["slug"], script.strip(), client)
+
+    for slug in slugs:
+        if slug not in results:
+            results[slug] = generate_narration_script(slug, client=client, local_context=local)
+    return results
+
+
+def content_inputs(
+    slug: str,
+    *,
+    client: Optional[MiniMaxClient] = None,
+    platforms: Optional[List[str]] = None,
+    local_context: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Everything the narration script and captions depend on: the menu item JSON, the rendered
+    prompts and the chat model. Used for incremental rebuilds (src.pipeline.state)."""
+    item = _load_item_json(slug)
+    local = local_context or _default_local_seo_context()
+    client = client or get_client()
+    targets = platforms or list(PLATFORM_SPECS.keys())
+    captions = {}
+    for platform in targets:
+        limit = int(_platform_template(platform).get("caption_max", 150))
+        captions[platform] = _build_caption_user_prompt(platform, item, local, limit)
+    return {
+        "item": item,
+        "local": local,
+        "system": _build_system_prompt(),
+        "narration": _build_narration_user_prompt(item, local),
+        "captions": captions,
+        "model": client.config.chat_model,
+    }
+
+
 def write_seo_copy(
     slug: str,
     *,
     platforms: Optional[List[str]] = None,
     client: Optional[MiniMaxClient] = None,
     local_context: Optional[Dict[str, Any]] = None,
+    stream: Optional[bool] = None,
+    batched: Optional[bool] = None,
 ) -> Dict[str, Any]:
-    """Generate platform-specific captions, hashtags, and alt text; save to build/content/{slug}.json."""
+    """Generate platform-specific captions, hashtags, and alt text; save to build/content/{slug}.json.
+
+    With `batched` (default: MINIMAX_CAPTION_BATCH) every platform's caption is requested in
+    one JSON-structured chat call; only platforms whose entry is missing or malformed get
+    their own call (all of them when the reply is not JSON or the call hit a retryable error).
+    With `stream` (default: MINIMAX_CHAT_STREAM) those per-platform captions are streamed
+    and generation stops as soon as the platform's recommended length is exceeded.
+    """
     ensure_build_tree()
     CONTENT_DIR.mkdir(parents=True, exist_ok=True)
 
     item = _load_item_json(slug)
     allergens = _detect_allergens(item.get("ingredients"))
     local = local_context or _default_local_seo_context()
-    client = client or MiniMaxClient()
+    client = client or get_client()
     targets = platforms or list(PLATFORM_SPECS.keys())
+    use_stream = client.config.chat_stream if stream is None else stream
+    use_batch = client.config.caption_batch if batched is None else batched
 
     sys_prompt = _build_system_prompt()
+    limits = {platform: int(_platform_template(platform).get("caption_max", 150)) for platform in targets}
+    batch: Dict[str, str] = {}
+    if use_batch and len(targets) > 1:
+        batch = _batch_captions(client, limits, item, local, sys_prompt)
+        missing = [p for p in targets if p not in batch]
+        if missing and _LOG.isEnabledFor(logging.INFO):
+            _LOG.info("Batched captions for %s lacked %s; generating those individually", slug, ", ".join(missing))
 
     outputs: Dict[str, Any] = {}
     for platform in targets:
-        spec = PLATFORM_SPECS.get(platform, {})
-        template = _platform_template(platform)
-        limit = int(template.get("caption_max", 150))
-
-        user_prompt = _build_caption_user_prompt(platform, item, local, limit)
-        resp = generate_text(
-            client,
-            messages=[{"role": "user", "content": user_prompt}],
-            system=sys_prompt,
-            temperature=0.7,
-            max_tokens=300,
-        )
-        caption = _clip(_extract_text_from_response(resp).strip(), limit)
+        limit = limits[platform]
+        raw = batch.get(platform)
+        if raw is None:
+            raw = _single_caption(client, platform, item, local, sys_prompt, limit, use_stream)
+        caption = _clip(raw.strip(), limit)
         hashtags = _hashtags_from(item, local)
         alt_text = f"{item.get('name')} at 41 Bistro in Fort Myers, FL: {item.get('description', '').strip()}"
         outputs[platform] = {
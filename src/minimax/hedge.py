@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .config import MiniMaxConfig
+from .metrics import REGISTRY as METRICS
+from .retry import CallStats, last_call_stats, record_call
+
+
+T = TypeVar("T")
+
+# Samples needed before the observed latency percentile replaces the configured delay
+MIN_SAMPLES = 20
+
+
+class HedgeBudget:
+    """Caps hedges to a fraction of calls: each call earns `ratio` tokens, a hedge spends one."""
+
+    def __init__(self, ratio: float = 0.1, burst: float = 2.0):
+        self.ratio = max(0.0, float(ratio))
+        self.burst = max(1.0, float(burst))
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+
+    def on_call(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+_BUDGETS: Dict[Tuple[str, str], HedgeBudget] = {}
+_BUDGETS_LOCK = threading.Lock()
+
+
+def hedge_budget(config: MiniMaxConfig, path: str) -> HedgeBudget:
+    """Process-wide budget per endpoint, so short-lived clients share one allowance."""
+    key = (config.base_url, path)
+    with _BUDGETS_LOCK:
+        budget = _BUDGETS.get(key)
+        if budget is None:
+            budget = _BUDGETS[key] = HedgeBudget(config.hedge_budget)
+        return budget
+
+
+def hedge_delay(path: str, model: Optional[str], percentile: float, fallback: float) -> float:
+    """Seconds to wait before hedging: the observed latency percentile once there is enough data.
+
+    Uses the service time of successful attempts only; failures, retries, backoff and queueing
+    would inflate the percentile until hedges rarely fire.
+    """
+    hist = METRICS.histogram("minimax_attempt_seconds", path=path, model=model)
+    if hist is None or hist.count < MIN_SAMPLES:
+        return fallback
+    return max(0.05, hist.percentile(percentile))
+
+
+def _spawn(fn: Callable[[], T], name: str) -> "concurrent.futures.Future[T]":
+    # One thread per attempt rather than a fixed pool: a queue would delay the primary (and count
+    # toward the hedge delay) and a pool size would cap chat concurrency. Callers block for the
+    # call, so this is at most two threads per in-flight chat call.
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    context = contextvars.copy_context()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as e:  # noqa: BLE001 handed to the waiting caller
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+def _with_stats(fn: Callable[[], T]) -> Callable[[], Tuple[T, Optional[CallStats]]]:
+    # Stats are recorded in the worker's context; carry them back to the caller's
+    def run() -> Tuple[T, Optional[CallStats]]:
+        return fn(), last_call_stats()
+
+    return run
+
+
+def _adopt(stats: Optional[CallStats]) -> None:
+    # Already counted in metrics by the worker; only make it the caller's last_call_stats
+    if stats is not None:
+        record_call(stats, observe=False)
+
+
+def hedged_call(
+    primary_fn: Callable[[], T], hedge_fn: Callable[[], T], *, delay: float, budget: HedgeBudget, labels: Dict[str, Any]
+) -> T:
+    """Run `primary_fn`; if it has not finished after `delay` seconds and the budget allows,
+    race `hedge_fn` against it and return the first success.
+
+    A call that fails before the delay is not hedged. If both fail, the original's error is
+    raised. The slower request cannot be cancelled mid-flight; its answer is discarded.
+    """
+    budget.on_call()
+    primary = _spawn(_with_stats(primary_fn), "minimax-primary")
+    done, _ = concurrent.futures.wait({primary}, timeout=delay)
+    if done or not budget.try_spend():
+        data, stats = primary.result()
+        _adopt(stats)
+        return data
+    METRICS.inc("minimax_hedges_total", **labels)
+    hedge = _spawn(_with_stats(hedge_fn), "minimax-hedge")
+    pending = {primary, hedge}
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                data, stats = fut.result()
+                METRICS.inc("minimax_hedge_wins_total", winner="hedge" if fut is hedge else "primary", **labels)
+                _adopt(stats)
+                return data
+    return primary.result()[0]  # both failed: re-raise the original's error
+
+
+async def ahedged_call(
+    primary_fn: Callable[[], Awaitable[T]],
+    hedge_fn: Callable[[], Awaitable[T]],
+    *,
+    delay: float,
+    budget: HedgeBudget,
+    labels: Dict[str, Any],
+) -> T:
+    """asyncio counterpart of hedged_call; the losing task is cancelled."""
+
+    async def run(fn: Callable[[], Awaitable[T]]) -> Tuple[T, Optional[CallStats]]:
+        return await fn(), last_call_stats()
+
+    budget.on_call()
+    primary = asyncio.ensure_future(run(primary_fn))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not budget.try_spend():
+        data, stats = await primary
+        _adopt(stats)
+        return data
+    METRICS.inc("minimax_hedges_total", **labels)
+    hedge = asyncio.ensure_future(run(hedge_fn))
+    pending = {primary, hedge}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                if not fut.cancelled() and fut.exception() is None:
+                    data, stats = fut.result()
+                    METRICS.inc("minimax_hedge_wins_total", winner="hedge" if fut is hedge else "primary", **labels)
+                    _adopt(stats)
+                    return data
+        return (await primary)[0]
+    finally:
+        for fut in pending:
+            fut.cancel()
@@ -2,25 +2,22 @@ from __future__ import annotations
 
 import logging
 import os
-from base64 import b64decode, b64encode
+from base64 import b64decode
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
-from src.menu.utils import BUILD_DIR, DATA_DIR, ensure_build_tree, find_images_for_slug, load_menu_items, write_json
+from src.menu.utils import BUILD_DIR, DATA_DIR, ensure_build_tree, file_digest, find_images_for_slug, load_catalog, write_json
 from .client import MiniMaxClient
+from .registry import get_client
+from .streaming import B64File
 
 
 _LOG = logging.getLogger(__name__)
 ENHANCED_DIR = BUILD_DIR / "enhanced_images"
 
 
-def _read_b64(path: Path) -> str:
-    data = path.read_bytes()
-    return b64encode(data).decode("ascii")
-
-
 def _extract_image_sources(response: Dict[str, Any]) -> List[Dict[str, str]]:
     """Best-effort extraction of image sources from MiniMax response.
 
@@ -104,7 +101,7 @@ def enhance_image_request(
         "images": [
             {
                 "type": "input_image",
-                "image_base64": _read_b64(Path(image_path)),
+                "image_base64": B64File(image_path),
             }
         ],
         "n": max(1, int(n)),
@@ -121,19 +118,18 @@ def enhance_image_request(
 def _default_prompt_for_slug(slug: str) -> Tuple[str, Optional[str]]:
     """Create a simple enhancement prompt from menu metadata if available."""
     try:
-        items = load_menu_items()
-        for it in items:
-            if it.slug == slug:
-                name = it.name
-                desc = (it.description or "").strip()
-                system = None
-                prompt = (
-                    f"Enhance and stylize the food photo for '{name}' with an appetizing, modern Italian bistro look. "
-                    f"Emphasize natural colors, sharp focus, and appealing plating."
-                )
-                if desc:
-                    prompt += f" Description: {desc}"
-                return prompt, system
+        it = load_catalog().get(slug)
+        if it is not None:
+            name = it.name
+            desc = (it.description or "").strip()
+            system = None
+            prompt = (
+                f"Enhance and stylize the food photo for '{name}' with an appetizing, modern Italian bistro look. "
+                f"Emphasize natural colors, sharp focus, and appealing plating."
+            )
+            if desc:
+                prompt += f" Description: {desc}"
+            return prompt, system
     except Exception as e:  # noqa: BLE001
         if _LOG.isEnabledFor(logging.DEBUG):
             _LOG.debug("Failed to load menu items for prompt: %s", e)
@@ -143,6 +139,19 @@ def _default_prompt_for_slug(slug: str) -> Tuple[str, Optional[str]]:
     )
 
 
+def enhancement_inputs(slug: str, *, client: Optional[MiniMaxClient] = None, variants: int = 1) -> Dict[str, Any]:
+    """Everything enhance_image() output depends on, for incremental rebuilds (src.pipeline.state)."""
+    client = client or get_client()
+    images = find_images_for_slug(slug)
+    return {
+        "source": file_digest(images[0]) if images else None,
+        "prompt": _default_prompt_for_slug(slug)[0],
+        "model": client.config.image_model,
+        "style_preset": os.getenv("MINIMAX_STYLE_PRESET", "hero"),
+        "variants": variants,
+    }
+
+
 def enhance_image(
     slug: str,
     *,
@@ -166,7 +175,7 @@ def enhance_image(
     ensure_build_tree()
     ENHANCED_DIR.mkdir(parents=True, exist_ok=True)
 
-    client = client or MiniMaxClient()
+    client = client or get_client()
     use_style = style_preset or os.getenv("MINIMAX_STYLE_PRESET", "hero")
 
     images = find_images_for_slug(slug)
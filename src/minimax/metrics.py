@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Log-linear buckets: each bucket is ~9% wider than the previous one, so any recorded
+# value is reported within that relative error regardless of magnitude (HDR-style).
+_GROWTH = 2 ** (1 / 8)
+_LOG_GROWTH = math.log(_GROWTH)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, "" if v is None else str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Sparse log-bucketed histogram with count/sum/min/max and percentile estimates."""
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @staticmethod
+    def upper_bound(index: int) -> float:
+        return _GROWTH ** (index + 1)
+
+    def record(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.floor(math.log(value) / _LOG_GROWTH)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-th quantile (0 < q <= 1), clamped to min/max."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = self.zeros
+        if seen >= rank:
+            return max(0.0, self.min)
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return max(self.min, min(self.max, self.upper_bound(index)))
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        out: List[Tuple[float, int]] = []
+        seen = self.zeros
+        if seen:
+            out.append((0.0, seen))
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            out.append((self.upper_bound(index), seen))
+        return out
+
+    def snapshot(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "min": round(self.min, 6),
+            "max": round(self.max, 6),
+            "mean": round(self.total / self.count, 6),
+            "p50": round(self.percentile(0.50), 6),
+            "p90": round(self.percentile(0.90), 6),
+            "p95": round(self.percentile(0.95), 6),
+            "p99": round(self.percentile(0.99), 6),
+        }
+
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and histograms keyed by metric name and label set.
+
+    Cheap enough to update on every request: one lock, dict lookups, no background threads.
+    Export with to_prometheus() (text exposition format) or snapshot() (JSON-friendly dict).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.record(value)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0.0)
+
+    def gauge(self, name: str, **labels: Any) -> Optional[float]:
+        with self._lock:
+            return self._gauges.get(name, {}).get(_labels(labels))
+
+    def histogram(self, name: str, **labels: Any) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(name, {}).get(_labels(labels))
+
+    @contextmanager
+    def timed(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observe the wall-clock duration of the block, labelled outcome=ok|error."""
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.observe(name, time.monotonic() - started, outcome=outcome, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(k), "value": v} for k, v in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+            gauges = {
+                name: [{"labels": dict(k), "value": v} for k, v in sorted(series.items())]
+                for name, series in sorted(self._gauges.items())
+            }
+            histograms = {
+                name: [{"labels": dict(k), **h.snapshot()} for k, h in sorted(series.items())]
+                for name, series in sorted(self._histograms.items())
+            }
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_fmt_labels(key)} {_fmt_num(value)}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_fmt_labels(key)} {_fmt_num(value)}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(series.items()):
+                    for bound, seen in hist.cumulative():
+                        lines.append(f"{name}_bucket{_fmt_labels(key, le=_fmt_num(bound))} {seen}")
+                    lines.append(f"{name}_bucket{_fmt_labels(key, le='+Inf')} {hist.count}")
+                    lines.append(f"{name}_sum{_fmt_labels(key)} {_fmt_num(hist.total)}")
+                    lines.append(f"{name}_count{_fmt_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _fmt_num(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else f"{value:.6g}"
+
+
+def _fmt_labels(key: Labels, **extra: str) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = MetricsRegistry()
+
+
+def observe_call(stats: Any, registry: Optional[MetricsRegistry] = None) -> None:
+    """Fold one finished MiniMax call (a retry.CallStats) into the registry."""
+    reg = registry or REGISTRY
+    labels = {"path": stats.path, "model": stats.model}
+    reg.inc("minimax_calls_total", outcome=stats.outcome, **labels)
+    if not stats.attempts:
+        return  # served from cache or coalesced: no HTTP traffic of its own
+    reg.inc("minimax_attempts_total", stats.attempts, **labels)
+    if stats.retries:
+        reg.inc("minimax_retries_total", stats.retries, **labels)
+        reg.inc("minimax_backoff_seconds_total", stats.backoff_sec, **labels)
+    if stats.throttled:
+        reg.inc("minimax_throttled_total", stats.throttled, **labels)
+    reg.observe("minimax_call_seconds", stats.elapsed_sec, **labels)
+    reg.observe("minimax_queue_seconds", stats.queued_sec, **labels)
+    if stats.outcome == "ok" and stats.attempt_sec:
+        reg.observe("minimax_attempt_seconds", stats.attempt_sec, **labels)
+    if stats.request_bytes:
+        reg.observe("minimax_request_bytes", stats.request_bytes, **labels)
+
+
+def observe_usage(payload: Dict[str, Any], data: Dict[str, Any], registry: Optional[MetricsRegistry] = None) -> None:
+    """Record token usage of one chat completion (payload as sent, data as returned).
+
+    Besides prompt/completion token counters, tracks how much of the requested max_tokens
+    was used and how often a reply hit the limit, to tune text.max_tokens_for_chars.
+    """
+    reg = registry or REGISTRY
+    labels = {"model": payload.get("model")}
+    usage = data.get("usage") if isinstance(data, dict) else None
+    if isinstance(usage, dict):
+        prompt = usage.get("prompt_tokens")
+        completion = usage.get("completion_tokens")
+        if isinstance(prompt, (int, float)):
+            reg.inc("minimax_prompt_tokens_total", prompt, **labels)
+        if isinstance(completion, (int, float)):
+            reg.inc("minimax_completion_tokens_total", completion, **labels)
+            reg.observe("minimax_completion_tokens", completion, **labels)
+            limit = payload.get("max_tokens")
+            if isinstance(limit, (int, float)) and limit > 0:
+                reg.observe("minimax_max_tokens_utilization", completion / limit, **labels)
+    choices = data.get("choices") if isinstance(data, dict) else None
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict) and choices[0].get("finish_reason") == "length":
+        reg.inc("minimax_truncated_total", **labels)
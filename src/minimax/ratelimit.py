@@ -0,0 +1,483 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from .config import MiniMaxConfig
+from .metrics import REGISTRY as METRICS
+from .retry import classify, is_throttle
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiter expressed in requests per minute.
+
+    - `burst` tokens may be spent back-to-back; afterwards tokens refill at rpm/60 per second.
+    - `reserve()` books the next slot under a lock and returns how long the caller must wait.
+      The balance may go negative, so callers are served in the order they reserved (FIFO)
+      and concurrent threads can never overshoot the configured rate.
+    - `try_acquire()` takes a token only if one is available right now and never waits.
+    - rpm <= 0 disables limiting.
+    """
+
+    def __init__(
+        self,
+        rpm: int,
+        burst: int = 1,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rpm = rpm
+        self.burst = max(1, int(burst))
+        self._rate = float(rpm) / 60.0 if rpm > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._rate > 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self._rate)
+            self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Book `tokens` and return the delay (seconds) before the caller may proceed."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take `tokens` if immediately available; never blocks."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are granted; returns the time spent waiting."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    # Backwards-compatible name used by the original single-slot limiter
+    def wait(self) -> None:
+        self.acquire()
+
+    def available(self) -> float:
+        """Current token balance (negative while callers are queued)."""
+        if not self.enabled:
+            return float("inf")
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+
+
+class SharedTokenBucket:
+    """Token bucket whose balance lives in a SQLite file shared by every process on the host.
+
+    Each reservation runs inside `BEGIN IMMEDIATE`, which serialises writers across processes,
+    so batch workers and the daily cron draw from a single account-level budget. Uses wall-clock
+    time because monotonic clocks are not comparable between processes. Same interface as
+    TokenBucket (reserve / try_acquire / acquire / wait / available).
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        rpm: int,
+        burst: int = 1,
+        *,
+        name: str = "minimax",
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.path = Path(path)
+        self.name = name
+        self.rpm = rpm
+        self.burst = max(1, int(burst))
+        self._rate = float(rpm) / 60.0 if rpm > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    @property
+    def enabled(self) -> bool:
+        return self._rate > 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _update(self, fn: Callable[[float], Tuple[float, float]]) -> float:
+        """Run `fn(tokens) -> (new_tokens, result)` atomically against the shared row."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = self._clock()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            if row is None:
+                tokens = float(self.burst)
+            else:
+                tokens, updated = row
+                tokens = min(float(self.burst), tokens + max(0.0, now - updated) * self._rate)
+            new_tokens, result = fn(tokens)
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (self.name, new_tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        if not self.enabled:
+            return 0.0
+
+        def book(balance: float) -> Tuple[float, float]:
+            balance -= tokens
+            return balance, (0.0 if balance >= 0 else -balance / self._rate)
+
+        return self._update(book)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        if not self.enabled:
+            return True
+
+        def take(balance: float) -> Tuple[float, float]:
+            if balance >= tokens:
+                return balance - tokens, 1.0
+            return balance, 0.0
+
+        return bool(self._update(take))
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    def wait(self) -> None:
+        self.acquire()
+
+    def available(self) -> float:
+        if not self.enabled:
+            return float("inf")
+        return self._update(lambda balance: (balance, balance))
+
+
+Limiter = Union[TokenBucket, SharedTokenBucket]
+
+
+def make_limiter(rpm: int, burst: int = 1, *, shared_path: Optional[str] = None, name: str = "minimax") -> Limiter:
+    """Build an in-process bucket, or a host-wide one when `shared_path` is configured."""
+    if shared_path:
+        return SharedTokenBucket(shared_path, rpm, burst=burst, name=name)
+    return TokenBucket(rpm, burst=burst)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD ceiling on in-flight requests, tuned from each attempt's outcome.
+
+    - Additive increase: every healthy completion admitted while at least half the slots
+      were busy adds `1/limit`, so the limit grows by under one per window of requests.
+    - Multiplicative decrease: a 429, 5xx/transport error, or a p95 latency above
+      `latency_factor` x the long-run baseline multiplies the limit by `backoff`.
+      Only requests admitted since the previous cut can trigger the next one, so a burst
+      of failures from one overloaded window counts once.
+    - Client errors (400/401...) leave the limit unchanged.
+
+    The current limit and in-flight count are published as metrics gauges.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        backoff: float = 0.5,
+        latency_factor: float = 2.0,
+        window: int = 50,
+    ):
+        self.name = name
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.backoff = min(0.95, max(0.05, float(backoff)))
+        self.latency_factor = float(latency_factor)
+        self._cond = threading.Condition()
+        self._limit = float(self.min_limit)
+        self._inflight = 0
+        self._generation = 0
+        self._baseline: Optional[float] = None
+        self._latencies: Deque[float] = deque(maxlen=max(10, int(window)))
+        # Event-loop waiters (aacquire); woken thread-safely whenever a slot may have freed up
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def acquire(self) -> Tuple[int, bool]:
+        """Block until under the limit; returns a ticket for release()."""
+        with self._cond:
+            while self._inflight >= int(self._limit):
+                self._cond.wait()
+            return self._admit()
+
+    async def aacquire(self) -> Tuple[int, bool]:
+        """acquire() for asyncio callers: waits on a future instead of blocking the loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._inflight < int(self._limit):
+                    return self._admit()
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def _admit(self) -> Tuple[int, bool]:
+        self._inflight += 1
+        # Only grow a limit that is actually being used
+        saturated = self._inflight * 2 >= int(self._limit)
+        self._publish()
+        return self._generation, saturated
+
+    def release(self, ticket: Tuple[int, bool], latency: float, err: Optional[BaseException] = None) -> None:
+        generation, saturated = ticket
+        with self._cond:
+            self._inflight -= 1
+            if err is not None:
+                if is_throttle(err) or classify(err):
+                    self._decrease(generation)
+            elif self._latency_degraded(latency):
+                self._decrease(generation)
+            elif saturated and self._limit < self.max_limit:
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._publish()
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:  # loop already closed
+                pass
+
+    def _latency_degraded(self, latency: float) -> bool:
+        self._latencies.append(latency)
+        if self._baseline is None:
+            self._baseline = latency
+        else:
+            # Slow-moving baseline so a sustained slowdown still registers for a while
+            self._baseline += 0.05 * (latency - self._baseline)
+        if len(self._latencies) < self._latencies.maxlen // 2:
+            return False
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+        return p95 > self.latency_factor * self._baseline
+
+    def _decrease(self, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+        self._generation += 1
+        self._latencies.clear()
+
+    def _publish(self) -> None:
+        METRICS.set_gauge("minimax_concurrency_limit", int(self._limit), path=self.name)
+        METRICS.set_gauge("minimax_inflight", self._inflight, path=self.name)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class EndpointPool:
+    """Quota pool for a single endpoint: a token from the endpoint's own sub-cap bucket, then one
+    from the account-wide bucket (shared by every pool), and an optional in-flight ceiling.
+
+    The ceiling is either fixed (`max_concurrency`) or an AdaptiveConcurrencyLimiter. The
+    adaptive one learns from exceptions raised inside `slot()`, so callers should validate
+    the response (raise on 429/5xx) before leaving the block.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limiter: Limiter,
+        max_concurrency: int = 0,
+        adaptive: Optional[AdaptiveConcurrencyLimiter] = None,
+        *,
+        account: Optional[Limiter] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.account = account
+        self.max_concurrency = max(0, int(max_concurrency))
+        self.adaptive = adaptive
+        self._sleep = sleep
+        self._sem = threading.BoundedSemaphore(self.max_concurrency) if self.max_concurrency and adaptive is None else None
+        self._asem: Optional[asyncio.Semaphore] = None
+        # A host-wide SQLite bucket does blocking I/O per reservation; aslot() books it off-loop
+        self._blocking = isinstance(limiter, SharedTokenBucket) or isinstance(account, SharedTokenBucket)
+
+    def _limiters(self) -> Tuple[Limiter, ...]:
+        # Sub-cap first: the account token is only booked once the request has cleared its own
+        # endpoint's queue, so e.g. polls held back by their sub-cap do not pre-spend the account
+        # budget and make generation calls wait behind them. Every pool books the same account
+        # bucket, so together they never exceed RATE_LIMIT_RPM.
+        return (self.limiter,) if self.account is None else (self.limiter, self.account)
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        """Wait for a sub-cap token, then an account token, then a concurrency slot; yields total
+        seconds spent queued."""
+        waited = 0.0
+        for limiter in self._limiters():
+            delay = limiter.reserve()
+            if delay > 0:
+                self._sleep(delay)
+                waited += delay
+        ticket = None
+        if self._sem is not None or self.adaptive is not None:
+            t0 = time.monotonic()
+            if self.adaptive is not None:
+                ticket = self.adaptive.acquire()
+            else:
+                self._sem.acquire()
+            waited += time.monotonic() - t0
+        started = time.monotonic()
+        err: Optional[BaseException] = None
+        try:
+            yield waited
+        except BaseException as e:
+            err = e
+            raise
+        finally:
+            if ticket is not None:
+                self.adaptive.release(ticket, time.monotonic() - started, err)
+            elif self._sem is not None:
+                self._sem.release()
+
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[float]:
+        """slot() for asyncio callers: the same rate tokens and fixed or adaptive ceiling,
+        without blocking the event loop; yields total seconds spent queued."""
+        waited = 0.0
+        for limiter in self._limiters():
+            delay = await asyncio.to_thread(limiter.reserve) if self._blocking else limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                waited += delay
+        ticket = None
+        sem: Optional[asyncio.Semaphore] = None
+        t0 = time.monotonic()
+        if self.adaptive is not None:
+            ticket = await self.adaptive.aacquire()
+        elif self.max_concurrency:
+            if self._asem is None:
+                self._asem = asyncio.Semaphore(self.max_concurrency)
+            sem = self._asem
+            await sem.acquire()
+        waited += time.monotonic() - t0
+        started = time.monotonic()
+        err: Optional[BaseException] = None
+        try:
+            yield waited
+        except BaseException as e:
+            err = e
+            raise
+        finally:
+            if ticket is not None:
+                self.adaptive.release(ticket, time.monotonic() - started, err)
+            elif sem is not None:
+                sem.release()
+
+
+def build_endpoint_pools(config: MiniMaxConfig) -> Dict[str, EndpointPool]:
+    """One pool per configured endpoint path, all drawing from one account bucket
+    (RATE_LIMIT_RPM, host-wide with RATE_LIMIT_SHARED_PATH). Per-endpoint RPMs are sub-caps,
+    so e.g. video polling can be held to a slice of the quota without raising the total."""
+    account = make_limiter(
+        config.rate_limit_rpm,
+        config.rate_limit_burst,
+        shared_path=config.rate_limit_shared_path,
+        name=config.rate_limit_shared_key,
+    )
+    pools: Dict[str, EndpointPool] = {}
+    for kind, path in config.endpoint_paths().items():
+        limit = config.endpoint_limit(kind)
+        limiter = make_limiter(
+            limit.rpm,
+            limit.burst,
+            shared_path=config.rate_limit_shared_path,
+            name=f"{config.rate_limit_shared_key}:{kind}",
+        )
+        adaptive = None
+        if config.adaptive_concurrency:
+            # A fixed MAX_CONCURRENCY[_<KIND>] becomes the ceiling the controller may grow to
+            adaptive = AdaptiveConcurrencyLimiter(
+                path,
+                min_limit=config.adaptive_min_concurrency,
+                max_limit=limit.max_concurrency or config.adaptive_max_concurrency,
+                latency_factor=config.adaptive_latency_factor,
+            )
+        pools[path] = EndpointPool(kind, limiter, limit.max_concurrency, adaptive, account=account)
+    return pools
+
+
+def endpoint_pool(pools: Dict[str, EndpointPool], config: MiniMaxConfig, path: str) -> EndpointPool:
+    """Return the pool for `path`; ad-hoc paths get a pool of their own on the same account bucket."""
+    pool = pools.get(path)
+    if pool is None:
+        account = next((p.account for p in pools.values() if p.account is not None), None)
+        if account is None:
+            account = make_limiter(
+                config.rate_limit_rpm,
+                config.rate_limit_burst,
+                shared_path=config.rate_limit_shared_path,
+                name=config.rate_limit_shared_key,
+            )
+        pool = pools.setdefault(path, EndpointPool(path, TokenBucket(0), account=account))
+    return pool
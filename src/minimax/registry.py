@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import asdict
+from typing import Dict, Optional
+
+from .client import MiniMaxClient
+from .config import MiniMaxConfig, load_config
+
+
+_CLIENTS: Dict[str, MiniMaxClient] = {}
+_LOCK = threading.Lock()
+
+
+def _config_key(config: MiniMaxConfig) -> str:
+    # MiniMaxConfig holds a dict field, so it is not hashable; key on its canonical JSON instead
+    return json.dumps(asdict(config), sort_keys=True, default=str)
+
+
+def get_client(config: Optional[MiniMaxConfig] = None) -> MiniMaxClient:
+    """Process-wide MiniMaxClient for `config` (default: load_config()).
+
+    Every pipeline step and batch item asking for the same configuration gets the same
+    client, so they share one requests.Session (pooled keep-alive connections), one set of
+    endpoint rate-limit pools and one single-flight group. A changed environment (e.g. a
+    --no-cache CLI override) yields a different config and therefore a separate client.
+    """
+    config = config or load_config()
+    key = _config_key(config)
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = MiniMaxClient(config)
+        return client
+
+
+def reset_clients() -> None:
+    """Close and forget all shared clients (tests, or after changing credentials)."""
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.session.close()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping, Optional
+
+import requests
+
+try:
+    import httpx
+except Exception:  # noqa: BLE001
+    httpx = None  # type: ignore[assignment]
+
+from .config import MiniMaxConfig
+from .metrics import observe_call
+
+
+# HTTP statuses worth another attempt; every other 4xx (400/401/403/404/422...) is fatal
+RETRYABLE_HTTP_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# MiniMax base_resp.status_code values that are transient:
+# 1000 unknown error, 1001 timeout, 1002 RPM limit, 1013 internal error, 1039 TPM limit.
+# Auth (1004, 2049), balance (1008), content safety (1026/1027) and bad params (2013) are fatal.
+RETRYABLE_API_CODES = frozenset({1000, 1001, 1002, 1013, 1039})
+
+# Rate limiting by the server: HTTP 429, or base_resp 1002 (RPM) / 1039 (TPM)
+THROTTLE_API_CODES = frozenset({1002, 1039})
+
+_TRANSPORT_ERRORS: tuple = (requests.RequestException, OSError)
+if httpx is not None:
+    _TRANSPORT_ERRORS = _TRANSPORT_ERRORS + (httpx.TransportError,)
+
+
+def parse_retry_after(headers: Optional[Mapping[str, Any]], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not headers:
+        return None
+    raw = headers.get("Retry-After") or headers.get("retry-after")
+    if raw is None:
+        return None
+    raw = str(raw).strip()
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(raw).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+def classify(exc: BaseException) -> bool:
+    """True when another attempt could plausibly succeed."""
+    # Imported lazily: client.py imports this module
+    from .client import CircuitOpenError, MiniMaxError
+
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, MiniMaxError):
+        if exc.http_status is not None:
+            return exc.http_status in RETRYABLE_HTTP_STATUS
+        if exc.status_code is None:
+            return True
+        return exc.status_code in RETRYABLE_API_CODES
+    return isinstance(exc, _TRANSPORT_ERRORS)
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """True when the server rejected the attempt for exceeding a rate limit."""
+    from .client import MiniMaxError
+
+    if not isinstance(exc, MiniMaxError):
+        return False
+    if exc.http_status is not None:
+        return exc.http_status == 429
+    return exc.status_code in THROTTLE_API_CODES
+
+
+@dataclass
+class CallStats:
+    """Per-call retry accounting, attached to errors and exposed via last_call_stats()."""
+
+    method: str
+    path: str
+    model: Optional[str] = None
+    attempts: int = 0
+    retries: int = 0
+    backoff_sec: float = 0.0
+    queued_sec: float = 0.0
+    elapsed_sec: float = 0.0
+    attempt_sec: float = 0.0  # service time of the successful attempt (not streamed), queue and backoff excluded
+    throttled: int = 0
+    request_bytes: int = 0
+    outcome: str = "pending"
+    last_error: Optional[str] = None
+
+
+_LAST_CALL: ContextVar[Optional[CallStats]] = ContextVar("minimax_last_call", default=None)
+
+
+def last_call_stats() -> Optional[CallStats]:
+    """Stats for the most recent MiniMax call made in the current thread or task."""
+    return _LAST_CALL.get()
+
+
+def record_call(stats: CallStats, *, observe: bool = True) -> None:
+    _LAST_CALL.set(stats)
+    if observe:
+        observe_call(stats)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry decisions for one logical call.
+
+    - Fatal errors (400/401/403, auth or validation base_resp codes) are raised immediately.
+    - Server-provided Retry-After wins over computed backoff (capped by the deadline).
+    - Otherwise full jitter: uniform(0, min(max_delay, base_delay * 2**(attempt-1))).
+    - `deadline_sec` bounds total time across attempts, including waits (0 disables).
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 16.0
+    deadline_sec: float = 0.0
+
+    @classmethod
+    def from_config(cls, config: MiniMaxConfig) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, config.max_retries),
+            base_delay=config.retry_base_delay_sec,
+            max_delay=config.retry_max_delay_sec,
+            deadline_sec=config.retry_deadline_sec,
+        )
+
+    def remaining(self, elapsed: float) -> Optional[float]:
+        if self.deadline_sec <= 0:
+            return None
+        return self.deadline_sec - elapsed
+
+    def attempt_timeout(self, timeout: float, elapsed: float) -> float:
+        """Per-attempt timeout, shrunk so the last attempt cannot overrun the deadline."""
+        left = self.remaining(elapsed)
+        if left is None:
+            return timeout
+        return max(0.1, min(float(timeout), left))
+
+    def next_delay(self, attempt: int, exc: BaseException, elapsed: float, rng: Optional[random.Random] = None) -> Optional[float]:
+        """Seconds to sleep before the next attempt, or None to give up."""
+        if attempt >= self.max_attempts or not classify(exc):
+            return None
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            delay = float(retry_after)
+        else:
+            cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+            delay = (rng or random).uniform(0, cap)
+        left = self.remaining(elapsed)
+        if left is not None and delay >= left:
+            return None
+        return delay
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import mmap
+import uuid
+from base64 import b64encode
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Union
+
+
+# 192 KiB of raw bytes per chunk; a multiple of 3 so chunks encode without padding
+CHUNK_BYTES = 3 * 64 * 1024
+
+
+class B64File:
+    """A payload value standing in for the base64 encoding of a file.
+
+    Place it anywhere a base64 string would go (e.g. `{"image_base64": B64File(path)}`);
+    MiniMaxClient then streams the encoding onto the socket in fixed-size chunks instead of
+    materialising the whole string in memory.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        st = self.path.stat()
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+
+    def encoded_len(self) -> int:
+        return 4 * ((self.size + 2) // 3)
+
+    def iter_b64(self, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+        if self.size == 0:
+            return
+        # Only the final chunk may carry "=" padding, so interior chunks must be whole 3-byte groups
+        chunk_bytes = max(3, chunk_bytes - chunk_bytes % 3)
+        with self.path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, self.size, chunk_bytes):
+                yield b64encode(mm[start:min(start + chunk_bytes, self.size)])
+
+    def read_b64(self) -> str:
+        """Whole encoding as a string, for callers that really need it in memory."""
+        return b"".join(self.iter_b64()).decode("ascii")
+
+    def __str__(self) -> str:
+        # Stable identity for request keys (single-flight/cache) without reading the file
+        return f"<b64file {self.path} size={self.size} mtime_ns={self.mtime_ns}>"
+
+    __repr__ = __str__
+
+
+def has_file_fields(value: Any) -> bool:
+    if isinstance(value, B64File):
+        return True
+    if isinstance(value, dict):
+        return any(has_file_fields(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(has_file_fields(v) for v in value)
+    return False
+
+
+class StreamingJSONBody:
+    """Re-iterable JSON request body with an exact length.
+
+    Ordinary values are serialised up front; each B64File becomes a quoted string whose
+    contents are encoded chunk by chunk while the body is sent. `len()` lets requests/httpx
+    send a Content-Length instead of chunked transfer encoding, and iterating again (on a
+    retry) re-reads the files, so memory per request stays roughly one chunk.
+    """
+
+    def __init__(self, payload: Any, chunk_bytes: int = CHUNK_BYTES):
+        self.chunk_bytes = chunk_bytes
+        files: List[B64File] = []
+        marker = f"__b64file_{uuid.uuid4().hex}_"
+
+        def swap(value: Any) -> Any:
+            if isinstance(value, B64File):
+                files.append(value)
+                return f"{marker}{len(files) - 1}"
+            if isinstance(value, dict):
+                return {k: swap(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [swap(v) for v in value]
+            return value
+
+        text = json.dumps(swap(payload), ensure_ascii=False, separators=(",", ":"))
+        self._segments: List[Union[bytes, B64File]] = []
+        pos = 0
+        for i, f in enumerate(files):
+            token = f'"{marker}{i}"'
+            at = text.index(token, pos)
+            self._segments.append(text[pos:at].encode("utf-8") + b'"')
+            self._segments.append(f)
+            self._segments.append(b'"')
+            pos = at + len(token)
+        self._segments.append(text[pos:].encode("utf-8"))
+        self._length = sum(len(s) if isinstance(s, bytes) else s.encoded_len() for s in self._segments)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for seg in self._segments:
+            if isinstance(seg, bytes):
+                if seg:
+                    yield seg
+            else:
+                yield from seg.iter_b64(self.chunk_bytes)
+
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
+        """Async view for httpx.AsyncClient, which rejects bodies that are sync-iterable."""
+        for chunk in self:
+            yield chunk
+
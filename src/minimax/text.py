@@ -1,10 +1,49 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import math
+from typing import Any, Dict, Iterator, List, Optional
 
 from .client import MiniMaxClient
 
 
+# Conservative for English marketing copy (~4 chars/token on average); used for upper bounds
+CHARS_PER_TOKEN = 3.0
+# Fixed headroom per completion for punctuation, a closing call to action and the stop token
+TOKEN_OVERHEAD = 16
+# Narration pacing: words per minute read aloud, and characters per word including the space
+NARRATION_WPM = 150
+CHARS_PER_WORD = 6
+
+
+def estimate_tokens(text: str) -> int:
+    """Upper-bound token count for `text` without a tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def narration_chars(read_sec: float, wpm: int = NARRATION_WPM) -> int:
+    """Characters in a script read aloud in `read_sec` seconds."""
+    return math.ceil(read_sec * wpm / 60.0 * CHARS_PER_WORD)
+
+
+def max_tokens_for_chars(chars: int, *, margin: float = 1.5, reserve: int = 0) -> int:
+    """max_tokens for a completion expected to be about `chars` characters long.
+
+    `margin` scales the estimate so an answer slightly over target is not cut off (captions
+    are clipped to the platform limit anyway); `reserve` adds room for models that emit
+    reasoning before the answer (see MINIMAX_MAX_TOKENS_MARGIN / MINIMAX_MAX_TOKENS_RESERVE).
+    """
+    return math.ceil(max(0, chars) / CHARS_PER_TOKEN * max(1.0, margin)) + TOKEN_OVERHEAD + max(0, reserve)
+
+
+def completion_budget(client: MiniMaxClient, chars: int, *, reasoning: bool = True) -> int:
+    """max_tokens_for_chars with the client's configured margin and reasoning reserve.
+
+    Pass `reasoning=False` for one answer of a batched call, which reasons only once.
+    """
+    reserve = client.config.tokens_reserve() if reasoning else 0
+    return max_tokens_for_chars(chars, margin=client.config.max_tokens_margin, reserve=reserve)
+
+
 def generate_text(
     client: MiniMaxClient,
     messages: List[Dict[str, Any]],
@@ -32,3 +71,27 @@ def generate_text(
 
     return client.chat_completions(payload_messages, model=model, **kwargs)
 
+
+
+def generate_text_stream(
+    client: MiniMaxClient,
+    messages: List[Dict[str, Any]],
+    model: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: Optional[int] = None,
+    system: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Streaming variant of generate_text: yields text deltas as MiniMax produces them.
+
+    Close the iterator (or stop consuming it) to stop generation early.
+    """
+    payload_messages = list(messages)
+    if system:
+        payload_messages = [{"role": "system", "content": system}] + payload_messages
+
+    kwargs: Dict[str, Any] = {"temperature": temperature}
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+
+    return client.chat_completions_stream(payload_messages, model=model, **kwargs)
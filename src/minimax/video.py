@@ -2,22 +2,19 @@ from __future__ import annotations
 
 import base64
 import logging
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from src.menu.utils import BUILD_DIR, ensure_build_tree, write_json
+from src.menu.utils import BUILD_DIR, ensure_build_tree, file_digest, write_json
 from src.platforms.specs import PLATFORM_SPECS
 from .client import MiniMaxClient
+from .registry import get_client
+from .streaming import B64File
 
 
 _LOG = logging.getLogger(__name__)
 VIDEOS_DIR = BUILD_DIR / "videos"
 
 
-def _read_b64(path: Path) -> str:
-    return base64.b64encode(path.read_bytes()).decode("ascii")
-
-
 def _extract_job_or_result(data: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """Return (job_id, video_url_or_b64, thumbnail_url_or_b64)."""
     job_id = data.get("task_id") or data.get("id")
@@ -58,9 +55,9 @@ def render_video(
     client: MiniMaxClient,
     *,
     prompt: Optional[str] = None,
-    image_b64s: Optional[List[str]] = None,
-    audio_b64: Optional[str] = None,
-    music_b64: Optional[str] = None,
+    image_b64s: Optional[List[Union[str, B64File]]] = None,
+    audio_b64: Optional[Union[str, B64File]] = None,
+    music_b64: Optional[Union[str, B64File]] = None,
     duration_sec: int = 20,
     resolution: str = "1080P",
     aspect_ratio: Optional[str] = None,
@@ -69,6 +66,8 @@ def render_video(
 ) -> Dict[str, Any]:
     """Low-level render call. Accepts base64 inputs to avoid external URLs.
 
+    Inputs may be base64 strings or B64File handles; the latter are streamed from disk.
+
     Returns the final API response (may include task id or direct result).
     """
     payload: Dict[str, Any] = {
@@ -97,6 +96,20 @@ def render_video(
     return resp
 
 
+def render_inputs(slug: str, *, client: Optional[MiniMaxClient] = None, platform: Optional[str] = None) -> Dict[str, Any]:
+    """Everything render_video_for_slug() output depends on (upstream artifacts by content hash)."""
+    client = client or get_client()
+    images = sorted((BUILD_DIR / "enhanced_images").glob(f"{slug}_*.jpg"))
+    audio_dir = BUILD_DIR / "audio"
+    return {
+        "image": file_digest(images[0]) if images else None,
+        "voice": file_digest(audio_dir / f"{slug}_voice.mp3"),
+        "music": file_digest(audio_dir / f"{slug}_music.mp3"),
+        "model": client.config.video_model,
+        "platform": PLATFORM_SPECS.get(platform) if platform else None,
+    }
+
+
 def render_video_for_slug(
     slug: str,
     *,
@@ -116,7 +129,7 @@ def render_video_for_slug(
     """
     ensure_build_tree()
     VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
-    client = client or MiniMaxClient()
+    client = client or get_client()
 
     # Platform defaults
     if platform and platform in PLATFORM_SPECS:
@@ -133,13 +146,13 @@ def render_video_for_slug(
     images = sorted(enhanced_dir.glob(f"{slug}_*.jpg"))
     if not images:
         raise FileNotFoundError(f"No enhanced images found for {slug} under {enhanced_dir}")
-    image_b64s = [_read_b64(images[0])]
+    image_b64s = [B64File(images[0])]
 
     audio_dir = BUILD_DIR / "audio"
     voice_path = audio_dir / f"{slug}_voice.mp3"
     music_path = audio_dir / f"{slug}_music.mp3"
-    audio_b64 = _read_b64(voice_path) if voice_path.exists() else None
-    music_b64 = _read_b64(music_path) if music_path.exists() else None
+    audio_b64 = B64File(voice_path) if voice_path.exists() else None
+    music_b64 = B64File(music_path) if music_path.exists() else None
 
     resp = render_video(
         client,
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Node:
+    """One step of a DAG: `run(upstream)` gets the statuses of `needs` and returns its own status."""
+
+    name: str
+    run: Callable[[Dict[str, str]], str]
+    needs: Tuple[str, ...] = ()
+
+
+def _call(node: Node, results: Dict[str, str], slots: Optional[threading.Semaphore]) -> str:
+    upstream = {dep: results[dep] for dep in node.needs}
+    try:
+        if slots is None:
+            return node.run(upstream)
+        with slots:
+            return node.run(upstream)
+    except Exception as e:  # noqa: BLE001
+        return f"error: {e}"
+
+
+def run_dag(
+    nodes: List[Node],
+    *,
+    workers: int = 1,
+    slots: Optional[threading.Semaphore] = None,
+    halt: Callable[[str], bool] = lambda status: False,
+) -> Dict[str, str]:
+    """Run `nodes` as soon as everything they need has finished; returns name -> status.
+
+    Up to `workers` nodes run at once (1 = inline, in declaration order), each holding one of
+    the shared `slots` while it runs so several DAGs can share one concurrency limit. Once a
+    status satisfies `halt`, no further nodes start; running ones finish and the rest are
+    left out of the result. An exception from a node becomes its "error: ..." status.
+    """
+    names = {node.name for node in nodes}
+    for node in nodes:
+        missing = [dep for dep in node.needs if dep not in names]
+        if missing:
+            raise ValueError(f"Node '{node.name}' needs unknown node(s): {', '.join(missing)}")
+
+    pending = list(nodes)
+    results: Dict[str, str] = {}
+
+    def ready() -> List[Node]:
+        found = [node for node in pending if all(dep in results for dep in node.needs)]
+        if not found and pending and not running:
+            raise ValueError(f"Dependency cycle among: {', '.join(n.name for n in pending)}")
+        return found
+
+    running: Dict[Future, str] = {}
+    if workers <= 1:
+        while pending:
+            node = ready()[0]
+            pending.remove(node)
+            results[node.name] = _call(node, results, slots)
+            if halt(results[node.name]):
+                break
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline-stage") as pool:
+        halted = False
+        while True:
+            if not halted:
+                for node in ready():
+                    pending.remove(node)
+                    running[pool.submit(_call, node, dict(results), slots)] = node.name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                halted = halted or halt(results[name])
+    return results
@@ -2,9 +2,13 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import shutil
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from src.menu.utils import (
     BUILD_DIR,
@@ -13,15 +17,27 @@ from src.menu.utils import (
     load_menu_items,
 )
 from src.platforms.specs import PLATFORM_SPECS
-from src.pipeline.run_once import mark_processed, write_manifest
-from src.minimax.image import enhance_image
-from src.minimax.content import generate_narration_script, write_seo_copy
-from src.minimax.audio import compose_music_for_slug, synthesize_voice_for_slug
-from src.minimax.video import render_video_for_slug
+from src.pipeline.run_once import flush_manifest, mark_processed, update_manifest
+from src.pipeline.dag import Node, run_dag
+from src.pipeline.state import input_hash, state_store
+from src.minimax.cache import apply_cli_overrides as apply_cache_overrides
+from src.minimax.client import CircuitOpenError, MiniMaxClient
+from src.minimax.image import enhance_image, enhancement_inputs
+from src.minimax.metrics import REGISTRY as METRICS
+from src.minimax.content import content_inputs, generate_narration_script, write_seo_copy
+from src.minimax.audio import compose_music_for_slug, music_inputs, synthesize_voice_for_slug, voice_inputs
+from src.minimax.video import render_inputs, render_video_for_slug
 from src.drive.sync import get_service as drive_get_service, sync_platform_assets as drive_sync_platform_assets
 
 
 PLATFORM_ASSETS_DIR = BUILD_DIR / "platform_assets"
+# Order of the statuses returned by orchestrate_enhancement ("audio" folds voice + music)
+STATUS_ORDER = ("validate", "image", "content", "audio", "video", "finalize")
+# Default for PIPELINE_STAGE_CONCURRENCY: the DAG's width (image, content, music)
+DEFAULT_STAGE_CONCURRENCY = 3
+
+_SLOTS: Dict[int, threading.BoundedSemaphore] = {}
+_SLOTS_LOCK = threading.Lock()
 
 
 def _platform_dir(platform: str, slug: str) -> Path:
@@ -34,12 +50,16 @@ def _first_enhanced_image(slug: str) -> Optional[Path]:
     return candidates[0] if candidates else None
 
 
+def _deferred(statuses: Dict[str, str], *steps: str) -> bool:
+    return any(str(statuses.get(s, "")).startswith("deferred") for s in steps)
+
+
 def _load_content_json(slug: str) -> Dict:
     path = BUILD_DIR / "content" / f"{slug}.json"
     return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
 
 
-def _copy_platform_bundle(slug: str, platform: str) -> Path:
+def _copy_platform_bundle(slug: str, platform: str, *, include_video: bool = True) -> Path:
     """Package assets per platform under build/platform_assets/<platform>/<slug>/"""
     out_dir = PLATFORM_ASSETS_DIR / platform / slug
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -51,7 +71,7 @@ def _copy_platform_bundle(slug: str, platform: str) -> Path:
 
     # Copy video (platform-specific one should have just been generated)
     video_src = BUILD_DIR / "videos" / f"{slug}.mp4"
-    if video_src.exists():
+    if include_video and video_src.exists():
         shutil.copy2(video_src, out_dir / "video.mp4")
 
     # Write platform-specific content
@@ -65,6 +85,52 @@ def _copy_platform_bundle(slug: str, platform: str) -> Path:
     return out_dir
 
 
+def _outputs_exist(slug: str, stage: str) -> bool:
+    """Whether a stage's artifacts are still on disk (an unchanged stage is only skipped if so)."""
+    if stage == "image":
+        return _first_enhanced_image(slug) is not None
+    if stage == "content":
+        content = _load_content_json(slug)
+        return bool(content.get("narration_script")) and bool(content.get("platforms"))
+    if stage in ("voice", "music"):
+        return (BUILD_DIR / "audio" / f"{slug}_{stage}.mp3").exists()
+    if stage == "video":
+        return (BUILD_DIR / "videos" / f"{slug}.mp4").exists()
+    return False
+
+
+def _unchanged(slug: str, stage: str, inputs: Callable[[], Any], hashes: Dict[str, str], force: bool) -> bool:
+    """Fingerprint `stage`'s inputs into `hashes`; True if it can be skipped (same inputs as its
+    last successful run and outputs present). Unreadable inputs just mean the stage runs."""
+    try:
+        hashes[stage] = input_hash(inputs())
+    except Exception:  # noqa: BLE001
+        return False
+    if force:
+        return False
+    try:
+        return state_store().unchanged(slug, stage, hashes[stage]) and _outputs_exist(slug, stage)
+    except Exception:  # noqa: BLE001
+        return False
+
+
+def stage_concurrency() -> int:
+    """PIPELINE_STAGE_CONCURRENCY: steps run at once across the process (1 = strictly sequential)."""
+    try:
+        return max(1, int(os.getenv("PIPELINE_STAGE_CONCURRENCY", str(DEFAULT_STAGE_CONCURRENCY))))
+    except ValueError:
+        return DEFAULT_STAGE_CONCURRENCY
+
+
+def _stage_slots(limit: int) -> threading.BoundedSemaphore:
+    """Process-wide semaphore bounding concurrent steps, so concurrent slugs share one limit."""
+    with _SLOTS_LOCK:
+        slots = _SLOTS.get(limit)
+        if slots is None:
+            slots = _SLOTS[limit] = threading.BoundedSemaphore(limit)
+        return slots
+
+
 def orchestrate_enhancement(
     slug: str,
     *,
@@ -74,86 +140,229 @@ def orchestrate_enhancement(
     skip_audio: bool = False,
     skip_video: bool = False,
     sync_drive: bool = False,
+    client: Optional[MiniMaxClient] = None,
+    narration_ready: bool = False,
+    force: bool = False,
 ) -> Dict[str, str]:
     """Run the full pipeline for a single slug with graceful error handling.
 
-    Returns a dict of step statuses.
+    Returns a dict of step statuses. A step whose MiniMax endpoint has an open circuit
+    breaker is "deferred" rather than failed: independent steps still run, steps that
+    need its output are deferred too, and the slug is not marked processed so the next
+    batch picks it up again.
+
+    Steps form a DAG and independent ones run concurrently, up to PIPELINE_STAGE_CONCURRENCY
+    at once across the process: image, content (narration then copy) and music start
+    together, voice waits for content and video for image, voice and music. Voice and music
+    are reported together as "audio". After a failed step no new step starts.
+
+    Every step uses `client` (default: the shared registry.get_client() instance).
+    `narration_ready` skips the narration call when the caller already wrote this slug's
+    script (see content.generate_narration_scripts). Manifest rows are only queued; call
+    run_once.flush_manifest() once the batch is done to render build/manifest.csv. Each
+    step's status and duration is recorded in the state store (src.pipeline.state).
+
+    Builds are incremental: each step fingerprints its inputs (source image bytes, menu
+    item JSON, prompts, model names, platform specs, upstream artifact hashes) and is
+    reported "unchanged" instead of re-run when the fingerprint matches its last
+    successful run and its outputs still exist. `force` re-runs every step.
     """
     ensure_build_tree()
-    statuses: Dict[str, str] = {}
+    steps: Dict[str, str] = {}
+    timings: Dict[str, float] = {}
+    hashes: Dict[str, str] = {}
+    try:
+        _run_steps(
+            slug,
+            steps,
+            timings,
+            hashes,
+            platforms=platforms,
+            skip_image=skip_image,
+            skip_content=skip_content,
+            skip_audio=skip_audio,
+            skip_video=skip_video,
+            sync_drive=sync_drive,
+            client=client,
+            narration_ready=narration_ready,
+            force=force,
+        )
+    finally:
+        try:
+            # A --skip-* step keeps its last real outcome (and fingerprint) in the store
+            ran = {stage: status for stage, status in steps.items() if status != "skipped"}
+            state_store().record_stages(slug, ran, {k: round(v, 3) for k, v in timings.items()}, hashes)
+        except Exception:  # noqa: BLE001
+            pass  # bookkeeping only; never fail the slug over it
+    return _statuses(steps)
+
+
+def _statuses(steps: Dict[str, str]) -> Dict[str, str]:
+    """Step results in STATUS_ORDER, with the voice and music tracks folded into "audio"."""
+    merged = {k: v for k, v in steps.items() if k not in ("voice", "music")}
+    tracks = [steps[k] for k in ("voice", "music") if k in steps]
+    audio = next((t for t in tracks if t.startswith("error")), None) or next((t for t in tracks if t.startswith("deferred")), None)
+    if audio is None and len(tracks) == 2:  # a track that never started (another step failed) leaves audio out
+        audio = tracks[0] if tracks[0] == tracks[1] else "ok"
+    if audio is not None:
+        merged["audio"] = audio
+    return {k: merged[k] for k in STATUS_ORDER if k in merged}
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str, **labels: str) -> Iterator[None]:
+    """METRICS.timed for a pipeline step, also summing its wall time into `timings`."""
+    started = time.monotonic()
+    try:
+        with METRICS.timed("pipeline_stage_seconds", stage=stage, **labels):
+            yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.monotonic() - started
+
+
+def _attempt(action: Callable[[], Any]) -> str:
+    """Run one step: "ok", "deferred: ..." when its endpoint's circuit is open, else "error: ..."."""
+    try:
+        action()
+        return "ok"
+    except CircuitOpenError as e:
+        return f"deferred: {e}"
+    except Exception as e:  # noqa: BLE001
+        return f"error: {e}"
 
+
+def _run_steps(
+    slug: str,
+    steps: Dict[str, str],
+    timings: Dict[str, float],
+    hashes: Dict[str, str],
+    *,
+    platforms: Optional[List[str]],
+    skip_image: bool,
+    skip_content: bool,
+    skip_audio: bool,
+    skip_video: bool,
+    sync_drive: bool,
+    client: Optional[MiniMaxClient],
+    narration_ready: bool,
+    force: bool,
+) -> None:
     # Validate source image existence early
     if not find_images_for_slug(slug):
-        statuses["validate"] = "missing-image"
-        return statuses
-    statuses["validate"] = "ok"
+        steps["validate"] = "missing-image"
+        return
+    steps["validate"] = "ok"
+
+    def image(upstream: Dict[str, str]) -> str:
+        if skip_image:
+            return "skipped"
+        if _unchanged(slug, "image", lambda: enhancement_inputs(slug, client=client), hashes, force):
+            return "unchanged"
+
+        def run() -> None:
+            with _timed(timings, "image"):
+                enhance_image(slug, variants=1, client=client)
+
+        return _attempt(run)
+
+    def content(upstream: Dict[str, str]) -> str:
+        if skip_content:
+            return "skipped"
+        if _unchanged(slug, "content", lambda: content_inputs(slug, client=client), hashes, force):
+            return "unchanged"
+
+        def run() -> None:
+            # Narration then copy: both update build/content/{slug}.json
+            with _timed(timings, "content"):
+                if not narration_ready:
+                    generate_narration_script(slug, client=client)
+                write_seo_copy(slug, client=client)
+
+        return _attempt(run)
+
+    def voice(upstream: Dict[str, str]) -> str:
+        if skip_audio:
+            return "skipped"
+        if _deferred(upstream, "content"):
+            return "deferred: waiting on content"
+        if _unchanged(slug, "voice", lambda: voice_inputs(slug, client=client), hashes, force):
+            return "unchanged"
+
+        def run() -> None:
+            with _timed(timings, "voice"):
+                synthesize_voice_for_slug(slug, client=client)
+
+        return _attempt(run)
+
+    def music(upstream: Dict[str, str]) -> str:
+        if skip_audio:
+            return "skipped"
+        if _unchanged(slug, "music", lambda: music_inputs(slug, client=client), hashes, force):
+            return "unchanged"
+
+        def run() -> None:
+            with _timed(timings, "music"):
+                compose_music_for_slug(slug, client=client)
+
+        return _attempt(run)
+
+    def video(upstream: Dict[str, str]) -> str:
+        if skip_video:
+            return "skipped"
+        if _deferred(upstream, *upstream):
+            return "deferred: waiting on image/audio"
+        targets = platforms or list(PLATFORM_SPECS.keys())
+        fresh = _unchanged(
+            slug, "video", lambda: {p: render_inputs(slug, platform=p, client=client) for p in targets}, hashes, force
+        )
 
-    # Image enhancement
-    if not skip_image:
-        try:
-            enhance_image(slug, variants=1)
-            statuses["image"] = "ok"
-        except Exception as e:  # noqa: BLE001
-            statuses["image"] = f"error: {e}"
-            return statuses
-    else:
-        statuses["image"] = "skipped"
-
-    # Content generation
-    if not skip_content:
-        try:
-            generate_narration_script(slug)
-            write_seo_copy(slug)
-            statuses["content"] = "ok"
-        except Exception as e:  # noqa: BLE001
-            statuses["content"] = f"error: {e}"
-            return statuses
-    else:
-        statuses["content"] = "skipped"
-
-    # Audio generation
-    if not skip_audio:
-        try:
-            synthesize_voice_for_slug(slug)
-            compose_music_for_slug(slug)
-            statuses["audio"] = "ok"
-        except Exception as e:  # noqa: BLE001
-            statuses["audio"] = f"error: {e}"
-            return statuses
-    else:
-        statuses["audio"] = "skipped"
-
-    # Video generation + platform bundles
-    if not skip_video:
-        try:
-            targets = platforms or list(PLATFORM_SPECS.keys())
+        def run() -> None:
             drive_service = drive_get_service() if sync_drive else None
             for platform in targets:
-                # Render a platform-appropriate cut then copy to bundle
-                render_video_for_slug(slug, platform=platform)
-                _copy_platform_bundle(slug, platform)
+                # Render a platform-appropriate cut then copy to bundle (unchanged: refresh image/copy only)
+                if not fresh:
+                    with _timed(timings, "video", platform=platform):
+                        render_video_for_slug(slug, platform=platform, client=client)
+                _copy_platform_bundle(slug, platform, include_video=not fresh)
                 if sync_drive and drive_service is not None:
                     try:
                         drive_sync_platform_assets(slug, platform, service=drive_service)
                     except Exception as e:  # noqa: BLE001
                         # record but do not fail the entire video step
                         pass
-            statuses["video"] = "ok"
-        except Exception as e:  # noqa: BLE001
-            statuses["video"] = f"error: {e}"
-            return statuses
-    else:
-        statuses["video"] = "skipped"
-
-    # Mark processed and update manifest
+
+        status = _attempt(run)
+        return "unchanged" if fresh and status == "ok" else status
+
+    limit = stage_concurrency()
+    steps.update(
+        run_dag(
+            [
+                Node("image", image),
+                Node("content", content),
+                Node("voice", voice, needs=("content",)),
+                Node("music", music),
+                Node("video", video, needs=("image", "voice", "music")),
+            ],
+            workers=limit,
+            slots=_stage_slots(limit),
+            halt=lambda status: status.startswith("error"),
+        )
+    )
+    if any(status.startswith("error") for status in steps.values()):
+        return
+
+    if _deferred(steps, *steps):
+        steps["finalize"] = "deferred"
+        return
+
+    # Mark processed and queue this slug's manifest rows (rendered by flush_manifest())
     try:
         mark_processed(slug)
-        write_manifest()
-        statuses["finalize"] = "ok"
+        update_manifest(slug)
+        steps["finalize"] = "ok"
     except Exception as e:  # noqa: BLE001
-        statuses["finalize"] = f"error: {e}"
-
-    return statuses
+        steps["finalize"] = f"error: {e}"
 
 
 def _iter_target_slugs(all_items: bool, selected: List[str] | None) -> List[str]:
@@ -174,7 +383,11 @@ def main() -> None:
     parser.add_argument("--skip-audio", action="store_true")
     parser.add_argument("--skip-video", action="store_true")
     parser.add_argument("--sync-drive", action="store_true", help="Upload platform bundles to Google Drive after render")
+    parser.add_argument("--force", action="store_true", help="Re-run every step even if its inputs are unchanged")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the MiniMax chat response cache")
+    parser.add_argument("--refresh-cache", "--refresh", action="store_true", help="Ignore cached chat responses and overwrite them")
     args = parser.parse_args()
+    apply_cache_overrides(no_cache=args.no_cache, refresh=args.refresh_cache)
 
     platforms: Optional[List[str]] = None
     if args.platforms:
@@ -194,8 +407,10 @@ def main() -> None:
             skip_audio=args.skip_audio,
             skip_video=args.skip_video,
             sync_drive=args.sync_drive,
+            force=args.force,
         )
         print(f"[orchestrator] {slug} → {statuses}")
+    flush_manifest()
 
 
 if __name__ == "__main__":
@@ -2,68 +2,178 @@ from __future__ import annotations
 
 import argparse
 import csv
+import json
+import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import Dict, Iterable, Iterator, List, Optional
 
+try:  # POSIX only; elsewhere manifest writers are serialised within the process only
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+import src.menu.utils as _utils
 from src.menu.export_items import export_menu_items
 from src.menu.utils import (
-    BUILD_DIR,
-    PROCESSED_DIR,
+    MenuItem,
     ensure_build_tree,
     find_images_for_slug,
+    load_catalog,
     load_menu_items,
-    marker_path,
 )
+from src.pipeline.state import state_store
 
 
-def mark_processed(slug: str) -> Path:
+def mark_processed(slug: str) -> str:
+    """Record `slug` as processed in the state store; returns the timestamp."""
     ensure_build_tree()
-    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-    marker = marker_path(slug)
-    timestamp = datetime.now(timezone.utc).isoformat()
-    marker.write_text(f"{timestamp}\n", encoding="utf-8")
-    return marker
+    return state_store().mark_processed(slug, datetime.now(timezone.utc).isoformat())
+
+
+MANIFEST_FIELDS = ["slug", "course", "section", "image", "status", "last_processed_at"]
+_MANIFEST_LOCK = threading.Lock()
+
+
+def manifest_path() -> Path:
+    """build/manifest.csv (resolved at call time, like state_store(), so BUILD_DIR can be redirected)."""
+    return _utils.BUILD_DIR / "manifest.csv"
+
+
+def manifest_log_path() -> Path:
+    """Rows recomputed for individual slugs since the CSV was last rendered (one JSON line per update)."""
+    return _utils.BUILD_DIR / "manifest.pending.jsonl"
+
+
+def _claimed_logs() -> List[Path]:
+    """Pending logs claimed by flush_manifest() (leftovers of an interrupted flush), oldest first."""
+    log = manifest_log_path()
+    return sorted(log.parent.glob(f"{log.stem}.*{log.suffix}"), key=lambda p: p.stat().st_mtime_ns)
+
+
+@contextmanager
+def _manifest_lock() -> Iterator[None]:
+    """Serialise manifest writers across threads and, via flock on build/manifest.lock, across
+    processes (overlapping batch and cron runs)."""
+    with _MANIFEST_LOCK:
+        lock_path = _utils.BUILD_DIR / "manifest.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with lock_path.open("a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _manifest_rows(item: MenuItem, processed_at: Optional[str] = None, *, lookup: bool = True) -> List[Dict[str, str]]:
+    images = find_images_for_slug(item.slug)
+    if processed_at is None and lookup:
+        processed_at = state_store().processed_at(item.slug)
+    processed = processed_at is not None
+    last_processed = processed_at or ""
+    base = {"slug": item.slug, "course": item.course, "section": item.section, "last_processed_at": last_processed}
+    if not images:
+        return [{**base, "image": "", "status": "missing-image"}]
+    root = _utils.BUILD_DIR.parent
+    return [
+        {**base, "image": str(image.relative_to(root)), "status": "processed" if processed else "new"}
+        for image in images
+    ]
+
+
+def _render_manifest(rows: Iterable[Dict[str, str]]) -> Path:
+    path = manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+    return path
+
+
+def _rebuild_manifest() -> Path:
+    processed = state_store().processed()  # one query instead of a marker read per item
+    rows = [row for item in load_menu_items() for row in _manifest_rows(item, processed.get(item.slug), lookup=False)]
+    path = _render_manifest(rows)
+    for log in [*_claimed_logs(), manifest_log_path()]:
+        log.unlink(missing_ok=True)  # everything pending is reflected now
+    return path
 
 
 def write_manifest() -> Path:
+    """Rebuild build/manifest.csv from scratch (every item, image and processed timestamp)."""
     ensure_build_tree()
-    manifest_path = BUILD_DIR / "manifest.csv"
-    items = load_menu_items()
-    fieldnames = ["slug", "course", "section", "image", "status", "last_processed_at"]
-
-    with manifest_path.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        for item in items:
-            images = find_images_for_slug(item.slug)
-            marker = marker_path(item.slug)
-            processed = marker.exists()
-            last_processed = marker.read_text().strip() if processed else ""
-            if not images:
-                writer.writerow(
-                    {
-                        "slug": item.slug,
-                        "course": item.course,
-                        "section": item.section,
-                        "image": "",
-                        "status": "missing-image",
-                        "last_processed_at": last_processed,
-                    }
-                )
+    with _manifest_lock():
+        return _rebuild_manifest()
+
+
+def update_manifest(slug: str) -> None:
+    """Queue fresh manifest rows for one slug; O(1) in the catalog size.
+
+    The rows land in manifest_log_path(); flush_manifest() folds them into the CSV, so a batch
+    renders the manifest once instead of after every slug.
+    """
+    item = load_catalog().get(slug)
+    rows = _manifest_rows(item) if item is not None else []
+    line = json.dumps({"slug": slug, "rows": rows}, ensure_ascii=False) + "\n"
+    with _manifest_lock():
+        log = manifest_log_path()
+        log.parent.mkdir(parents=True, exist_ok=True)
+        with log.open("a", encoding="utf-8") as handle:
+            handle.write(line)
+
+
+def flush_manifest() -> Path:
+    """Render build/manifest.csv from pending update_manifest() rows plus fresh image rows
+    for every other slug.
+
+    Only the processed timestamps of non-pending slugs are reused from the old CSV (so the
+    state store is not queried per item); their image columns are recomputed, which is cheap
+    with the cached image index, so photos added or removed since are picked up. Slugs in
+    neither (new menu items) are looked up in full. Rows are emitted in catalog order and
+    slugs no longer in the menu are dropped.
+    """
+    ensure_build_tree()
+    with _manifest_lock():
+        if not manifest_path().exists():
+            return _rebuild_manifest()
+        # Claim the pending log by renaming it: rows queued from now on start a new log and
+        # survive this flush. Only claimed logs are deleted, after the CSV is replaced, so a
+        # flush interrupted before that is folded in by the next one.
+        log = manifest_log_path()
+        if log.exists():
+            os.replace(log, log.with_name(f"{log.stem}.{os.getpid()}.{threading.get_ident()}{log.suffix}"))
+        claimed = _claimed_logs()
+        pending: Dict[str, List[Dict[str, str]]] = {}
+        for path in claimed:  # later lines win
+            with path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        entry = json.loads(line)
+                        pending[entry["slug"]] = entry["rows"]
+        stamps: Dict[str, str] = {}
+        with manifest_path().open("r", encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                stamps[row["slug"]] = row["last_processed_at"]
+        rows: List[Dict[str, str]] = []
+        for item in load_catalog():
+            if item.slug in pending:
+                rows.extend(pending[item.slug])
+            elif item.slug in stamps:
+                rows.extend(_manifest_rows(item, stamps[item.slug] or None, lookup=False))
             else:
-                for image in images:
-                    writer.writerow(
-                        {
-                            "slug": item.slug,
-                            "course": item.course,
-                            "section": item.section,
-                            "image": str(image.relative_to(BUILD_DIR.parent)),
-                            "status": "processed" if processed else "new",
-                            "last_processed_at": last_processed,
-                        }
-                    )
-    return manifest_path
+                rows.extend(_manifest_rows(item))
+        path = _render_manifest(rows)
+        for claimed_log in claimed:
+            claimed_log.unlink(missing_ok=True)
+    return path
 
 
 def run_pipeline(slugs: Iterable[str] | None = None, dry_run: bool = False) -> None:
@@ -85,8 +195,8 @@ def run_pipeline(slugs: Iterable[str] | None = None, dry_run: bool = False) -> N
         mark_processed(item.slug)
         print(f"Marked {item.slug} as processed ({len(images)} image(s)).")
 
-    manifest_path = write_manifest()
-    print(f"Manifest updated at {manifest_path.relative_to(BUILD_DIR.parent)}")
+    path = write_manifest()
+    print(f"Manifest updated at {path.relative_to(_utils.BUILD_DIR.parent)}")
 
 
 def main() -> None:
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import src.menu.utils as _utils
+
+
+_LOG = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    slug TEXT PRIMARY KEY,
+    position INTEGER NOT NULL DEFAULT 0,
+    has_images INTEGER NOT NULL DEFAULT 0,
+    processed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS items_pending ON items (processed_at, has_images, position);
+CREATE TABLE IF NOT EXISTS stages (
+    slug TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    duration_sec REAL,
+    input_hash TEXT,
+    PRIMARY KEY (slug, stage)
+);
+"""
+
+
+# Stage statuses whose outputs are current (an "unchanged" stage kept its earlier outputs)
+DONE_STATUSES = ("ok", "unchanged")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def input_hash(inputs: Any) -> str:
+    """Stable sha256 fingerprint of a stage's JSON-serialisable inputs (key order ignored)."""
+    encoded = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class StateStore:
+    """Pipeline state in one SQLite file (WAL mode): per-slug processed timestamps and
+    per-stage status, duration and input hash.
+
+    Replaces build/processed/{slug}.done markers; existing markers are imported the first
+    time a store is opened. Safe to share between threads; every write is one transaction.
+    """
+
+    def __init__(self, path: Path | str, *, migrate_from: Optional[Path] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        if migrate_from is not None:
+            self.migrate_markers(migrate_from)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, params: Iterable[Any] = ()) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(sql, tuple(params))
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    # Migration --------------------------------------------------------------
+    def migrate_markers(self, processed_dir: Path) -> int:
+        """Import `{slug}.done` markers once (their content is the processed timestamp)."""
+        if self._query("SELECT 1 FROM meta WHERE key = 'markers_migrated'"):
+            return 0
+        rows: List[Tuple[str, str]] = []
+        for marker in sorted(Path(processed_dir).glob("*.done")):
+            try:
+                stamp = marker.read_text(encoding="utf-8").strip()
+            except OSError:
+                continue
+            rows.append((marker.stem, stamp or _now()))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO items (slug, processed_at) VALUES (?, ?) "
+                "ON CONFLICT(slug) DO UPDATE SET processed_at = COALESCE(items.processed_at, excluded.processed_at)",
+                rows,
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('markers_migrated', ?)", (_now(),))
+        if rows and _LOG.isEnabledFor(logging.INFO):
+            _LOG.info("Imported %s processed markers from %s into %s", len(rows), processed_dir, self.path)
+        return len(rows)
+
+    # Processed state --------------------------------------------------------
+    def mark_processed(self, slug: str, at: Optional[str] = None) -> str:
+        stamp = at or _now()
+        self._write(
+            "INSERT INTO items (slug, processed_at) VALUES (?, ?) ON CONFLICT(slug) DO UPDATE SET processed_at = excluded.processed_at",
+            (slug, stamp),
+        )
+        return stamp
+
+    def processed_at(self, slug: str) -> Optional[str]:
+        rows = self._query("SELECT processed_at FROM items WHERE slug = ?", (slug,))
+        return rows[0]["processed_at"] if rows else None
+
+    def processed(self) -> Dict[str, str]:
+        """slug -> processed timestamp for every processed slug."""
+        return {r["slug"]: r["processed_at"] for r in self._query("SELECT slug, processed_at FROM items WHERE processed_at IS NOT NULL")}
+
+    def sync_items(self, items: Iterable[Tuple[str, bool]]) -> None:
+        """Record catalog order and image availability for (slug, has_images) pairs.
+
+        `items` is the whole catalog: slugs missing from it (removed or renamed in the menu)
+        are flagged as having no images so they are no longer candidates; their processed
+        state is kept in case they come back.
+        """
+        rows = [(slug, position, int(bool(has_images))) for position, (slug, has_images) in enumerate(items)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO items (slug, position, has_images) VALUES (?, ?, ?) "
+                "ON CONFLICT(slug) DO UPDATE SET position = excluded.position, has_images = excluded.has_images",
+                rows,
+            )
+            self._conn.execute(
+                "UPDATE items SET has_images = 0 WHERE has_images = 1 AND slug NOT IN (SELECT value FROM json_each(?))",
+                (json.dumps([slug for slug, _, _ in rows]),),
+            )
+
+    def unprocessed_with_images(self, limit: Optional[int] = None, *, include_processed: bool = False) -> List[str]:
+        """Slugs with source images that are not processed yet (all with images if include_processed), in catalog order."""
+        sql = "SELECT slug FROM items WHERE has_images = 1"
+        if not include_processed:
+            sql += " AND processed_at IS NULL"
+        sql += " ORDER BY position"
+        params: Tuple[Any, ...] = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (max(0, limit),)
+        return [r["slug"] for r in self._query(sql, params)]
+
+    # Stages -----------------------------------------------------------------
+    def record_stages(
+        self,
+        slug: str,
+        statuses: Dict[str, str],
+        durations: Optional[Dict[str, float]] = None,
+        input_hashes: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Store the outcome of one orchestrator run for `slug`, all stages in one transaction."""
+        stamp = _now()
+        durations = durations or {}
+        input_hashes = input_hashes or {}
+        rows = [
+            (slug, stage, str(status), stamp, durations.get(stage), input_hashes.get(stage))
+            for stage, status in statuses.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO stages (slug, stage, status, updated_at, duration_sec, input_hash) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def stages(self, slug: str) -> Dict[str, Dict[str, Any]]:
+        rows = self._query("SELECT stage, status, updated_at, duration_sec, input_hash FROM stages WHERE slug = ?", (slug,))
+        return {r["stage"]: {k: r[k] for k in ("status", "updated_at", "duration_sec", "input_hash")} for r in rows}
+
+    def unchanged(self, slug: str, stage: str, fingerprint: str) -> bool:
+        """True when `stage` last completed for `slug` with the same input fingerprint."""
+        rows = self._query("SELECT status, input_hash FROM stages WHERE slug = ? AND stage = ?", (slug, stage))
+        return bool(rows) and rows[0]["status"] in DONE_STATUSES and rows[0]["input_hash"] == fingerprint
+
+
+_STORES: Dict[Path, StateStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def state_store(path: Optional[Path] = None) -> StateStore:
+    """Shared StateStore at `path` (default: <BUILD_DIR>/state.db, resolved at call time so
+    tests that patch utils.BUILD_DIR get their own store).
+
+    A new store imports the `processed/*.done` markers next to it.
+    """
+    path = Path(path or _utils.BUILD_DIR / "state.db")
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = StateStore(path, migrate_from=path.parent / "processed")
+        return store
@@ -9,14 +9,15 @@ from pathlib import Path
 from statistics import mean
 from typing import Dict, List, Optional
 
-from src.menu.utils import BUILD_DIR, PROCESSED_DIR
+from src.menu.utils import BUILD_DIR
+from src.pipeline.state import state_store
 from src.notifications.email import send_email
 from src.notifications.webhooks import notify_team
 from .validator import QAResult, validate_many
 
 
 def _collect_slugs() -> List[str]:
-    slugs = {p.stem for p in PROCESSED_DIR.glob("*.done")}
+    slugs = set(state_store().processed())
     # Also look at platform bundles
     bundles = BUILD_DIR / "platform_assets"
     if bundles.exists():
@@ -4,13 +4,19 @@ import argparse
 import json
 import os
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set
 
-from src.menu.utils import BUILD_DIR, PROCESSED_DIR, find_images_for_slug, load_menu_items
+from src.menu.utils import BUILD_DIR, find_images_for_slug, load_menu_items
+from src.minimax.cache import apply_cli_overrides as apply_cache_overrides
+from src.minimax.content import content_inputs, generate_narration_scripts
+from src.minimax.metrics import REGISTRY as METRICS
+from src.minimax.registry import get_client
 from src.pipeline.enhance import orchestrate_enhancement
+from src.pipeline.run_once import flush_manifest
+from src.pipeline.state import input_hash, state_store
 from src.notifications.email import send_email
 
 
@@ -23,21 +29,16 @@ class BatchResult:
     succeeded: List[str]
     failed: Dict[str, str]
     durations_sec: Dict[str, float]
+    # MiniMax call and pipeline stage metrics accumulated by this process (see src.minimax.metrics)
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    # Slugs with a step skipped because its MiniMax endpoint circuit was open; retried next batch
+    deferred: Dict[str, str] = field(default_factory=dict)
 
 
 def discover_candidates(limit: int, *, include_processed: bool = False) -> List[str]:
-    items = load_menu_items()
-    processed = {p.stem for p in PROCESSED_DIR.glob("*.done")}
-    candidates: List[str] = []
-    for it in items:
-        if not find_images_for_slug(it.slug):
-            continue
-        if not include_processed and it.slug in processed:
-            continue
-        candidates.append(it.slug)
-        if len(candidates) >= limit:
-            break
-    return candidates
+    store = state_store()
+    store.sync_items((it.slug, bool(find_images_for_slug(it.slug))) for it in load_menu_items())
+    return store.unprocessed_with_images(limit, include_processed=include_processed)
 
 
 def _report_path(now: Optional[datetime] = None) -> Path:
@@ -47,25 +48,66 @@ def _report_path(now: Optional[datetime] = None) -> Path:
     return d / f"batch_{now.strftime('%Y%m%d_%H%M%S')}.json"
 
 
+def _content_unchanged(slug: str, client: Any) -> bool:
+    try:
+        return state_store().unchanged(slug, "content", input_hash(content_inputs(slug, client=client)))
+    except Exception:  # noqa: BLE001
+        return False
+
+
+def _batch_narration(slugs: List[str], client: Any, *, force: bool = False) -> Set[str]:
+    """Pre-generate narration for the batch, several slugs per call (MINIMAX_NARRATION_BATCH > 1).
+
+    Slugs whose content inputs are unchanged since their last run are left out (unless
+    `force`). Returns the slugs whose script is written; any failure leaves the rest to
+    the per-slug stage.
+    """
+    if client.config.narration_batch_size <= 1 or len(slugs) < 2:
+        return set()
+    candidates = [slug for slug in slugs if find_images_for_slug(slug) and (force or not _content_unchanged(slug, client))]
+    if len(candidates) < 2:
+        return set()
+    try:
+        with METRICS.timed("pipeline_stage_seconds", stage="narration_batch"):
+            return set(generate_narration_scripts(candidates, client=client))
+    except Exception:  # noqa: BLE001
+        return set()
+
+
 def process_batch(
     slugs: Iterable[str],
     *,
     platforms: Optional[List[str]] = None,
     sync_drive: bool = False,
+    force: bool = False,
 ) -> BatchResult:
     started = datetime.utcnow()
     attempted: List[str] = []
     succeeded: List[str] = []
     failed: Dict[str, str] = {}
+    deferred: Dict[str, str] = {}
     durations: Dict[str, float] = {}
+    # One client for the whole batch: pooled connections and shared rate accounting
+    client = get_client()
+    slugs = list(slugs)
+    narrated = _batch_narration(slugs, client, force=force)
 
     for slug in slugs:
         attempted.append(slug)
         t0 = time.time()
         try:
-            statuses = orchestrate_enhancement(slug, platforms=platforms, sync_drive=sync_drive)
+            statuses = orchestrate_enhancement(
+                slug,
+                platforms=platforms,
+                sync_drive=sync_drive,
+                client=client,
+                narration_ready=slug in narrated,
+                force=force,
+            )
             if any(str(v).startswith("error") for v in statuses.values()):
                 failed[slug] = json.dumps(statuses)
+            elif any(str(v).startswith("deferred") for v in statuses.values()):
+                deferred[slug] = json.dumps(statuses)
             else:
                 succeeded.append(slug)
         except Exception as e:  # noqa: BLE001
@@ -73,6 +115,12 @@ def process_batch(
         finally:
             durations[slug] = round(time.time() - t0, 2)
 
+    # Render the manifest once for the whole batch
+    try:
+        flush_manifest()
+    except Exception:  # noqa: BLE001
+        pass
+
     finished = datetime.utcnow()
     result = BatchResult(
         started_at=started.isoformat() + "Z",
@@ -82,17 +130,20 @@ def process_batch(
         succeeded=succeeded,
         failed=failed,
         durations_sec=durations,
+        metrics=METRICS.snapshot(),
+        deferred=deferred,
     )
 
     # Write report
     report_path = _report_path(finished)
     report_path.write_text(json.dumps(result.__dict__, indent=2) + "\n", encoding="utf-8")
+    report_path.with_suffix(".prom").write_text(METRICS.to_prometheus(), encoding="utf-8")
 
     # Optional email
-    subject = f"MiniMax Batch: {len(succeeded)} ok, {len(failed)} failed"
+    subject = f"MiniMax Batch: {len(succeeded)} ok, {len(failed)} failed, {len(deferred)} deferred"
     body = (
         f"Started: {result.started_at}\nFinished: {result.finished_at}\n"
-        f"Attempted: {len(attempted)}\nSucceeded: {len(succeeded)}\nFailed: {len(failed)}\n"
+        f"Attempted: {len(attempted)}\nSucceeded: {len(succeeded)}\nFailed: {len(failed)}\nDeferred: {len(deferred)}\n"
     )
     try:
         send_email(subject, body)
@@ -107,9 +158,13 @@ def main() -> None:
     parser.add_argument("--limit", type=int, default=int(os.getenv("PIPELINE_BATCH_SIZE", "10")), help="Max items to process")
     parser.add_argument("--slugs", nargs="*", help="Explicit slugs to process (overrides discovery)")
     parser.add_argument("--platforms", help="Comma-separated platforms to target")
-    parser.add_argument("--reprocess", action="store_true", help="Include already processed items")
+    parser.add_argument("--reprocess", action="store_true", help="Include already processed items (only steps whose inputs changed re-run)")
+    parser.add_argument("--force", action="store_true", help="Re-run every step even if its inputs are unchanged")
     parser.add_argument("--sync-drive", action="store_true", help="Upload platform bundles to Drive")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the MiniMax chat response cache")
+    parser.add_argument("--refresh-cache", "--refresh", action="store_true", help="Ignore cached chat responses and overwrite them")
     args = parser.parse_args()
+    apply_cache_overrides(no_cache=args.no_cache, refresh=args.refresh_cache)
 
     if args.platforms:
         platforms = [p.strip() for p in args.platforms.split(",") if p.strip()]
@@ -124,7 +179,7 @@ def main() -> None:
         print("No candidates found.")
         raise SystemExit(0)
 
-    result = process_batch(target, platforms=platforms, sync_drive=args.sync_drive)
+    result = process_batch(target, platforms=platforms, sync_drive=args.sync_drive, force=args.force)
     print(json.dumps(result.__dict__, indent=2))
 
 
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.menu.utils import DATA_DIR, MENU_DIR, ROOT_DIR
+from src.tools.fake_minimax import FakeMiniMaxServer, add_settings_args, settings_from_args
+
+
+def _sandbox(workdir: Path) -> Path:
+    """Throwaway copy of the repo so the run never touches the real build/ or menu/ outputs.
+
+    src/ and menu/ are copied (the pipeline writes content JSON next to menu items); data/ is
+    symlinked because it is large and read-only.
+    """
+    shutil.copytree(ROOT_DIR / "src", workdir / "src", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(MENU_DIR, workdir / "menu")
+    (workdir / "data").symlink_to(DATA_DIR, target_is_directory=True)
+    (workdir / "build").mkdir()
+    return workdir
+
+
+def _hist_rows(metrics: Dict[str, Any], name: str, group_by: str) -> Dict[str, Dict[str, float]]:
+    """Merge-free view of one histogram from a BatchResult.metrics snapshot: label -> stats."""
+    rows: Dict[str, Dict[str, float]] = {}
+    for series in metrics.get("histograms", {}).get(name, []):
+        labels = series.get("labels", {})
+        if labels.get("outcome", "ok") != "ok" or not series.get("count"):
+            continue
+        key = labels.get(group_by) or "-"
+        if "platform" in labels and labels["platform"]:
+            key = f"{key}[{labels['platform']}]"
+        rows[key] = {k: series[k] for k in ("count", "p50", "p95", "max") if k in series}
+    return rows
+
+
+def _counter_total(metrics: Dict[str, Any], name: str) -> float:
+    return sum(s.get("value", 0.0) for s in metrics.get("counters", {}).get(name, []))
+
+
+def run_benchmark(
+    server: FakeMiniMaxServer,
+    *,
+    limit: int,
+    platforms: Optional[str] = None,
+    env_overrides: Optional[Dict[str, str]] = None,
+    keep: bool = False,
+) -> Dict[str, Any]:
+    """Run `python -m src.scheduler.batch_processor` in a sandbox against `server` and summarise it."""
+    workdir = Path(tempfile.mkdtemp(prefix="minimax-bench-"))
+    try:
+        _sandbox(workdir)
+        env = dict(os.environ)
+        env.update(
+            {
+                "MINIMAX_BASE_URL": server.url,
+                "MINIMAX_API_KEY": "fake",
+                "PYTHONPATH": str(workdir),
+                "SMTP_HOST": "",
+            }
+        )
+        env.update(env_overrides or {})
+        cmd = [sys.executable, "-m", "src.scheduler.batch_processor", "--limit", str(limit), "--reprocess"]
+        if platforms:
+            cmd += ["--platforms", platforms]
+
+        started = time.monotonic()
+        proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+        wall = time.monotonic() - started
+        if proc.returncode != 0:
+            raise RuntimeError(f"batch_processor exited {proc.returncode}:\n{proc.stderr[-4000:]}")
+
+        reports = sorted((workdir / "build" / "batch_reports").glob("batch_*.json"))
+        if not reports:
+            raise RuntimeError(f"batch_processor wrote no report:\n{proc.stdout[-4000:]}")
+        report = json.loads(reports[-1].read_text(encoding="utf-8"))
+        metrics = report.get("metrics", {})
+        done = len(report.get("succeeded", []))
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+        return {
+            "items": len(report.get("attempted", [])),
+            "succeeded": done,
+            "failed": len(report.get("failed", {})),
+            "deferred": len(report.get("deferred", {})),
+            "wall_sec": round(wall, 3),
+            "items_per_min": round(done * 60.0 / wall, 2) if wall > 0 else 0.0,
+            "peak_rss_mb": round(rss_mb, 1),
+            "stages": _hist_rows(metrics, "pipeline_stage_seconds", "stage"),
+            "endpoints": _hist_rows(metrics, "minimax_call_seconds", "path"),
+            "retries": _counter_total(metrics, "minimax_retries_total"),
+            "throttled": _counter_total(metrics, "minimax_throttled_total"),
+            "server": server.stats(),
+            "workdir": str(workdir) if keep else None,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines: List[str] = [
+        f"Items: {summary['items']} | ok {summary['succeeded']} | failed {summary['failed']} | deferred {summary['deferred']}",
+        f"Wall: {summary['wall_sec']:.2f}s | Throughput: {summary['items_per_min']:.2f} items/min | Peak RSS: {summary['peak_rss_mb']:.1f} MB",
+        f"Retries: {summary['retries']:g} | Throttled: {summary['throttled']:g}",
+    ]
+    for title, rows in (("Stage", summary["stages"]), ("Endpoint", summary["endpoints"])):
+        if not rows:
+            continue
+        lines.append(f"{title:<32} {'n':>5} {'p50 s':>9} {'p95 s':>9} {'max s':>9}")
+        for key, row in sorted(rows.items()):
+            lines.append(f"  {key:<30} {row['count']:>5} {row['p50']:>9.3f} {row['p95']:>9.3f} {row['max']:>9.3f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark process_batch against a local fake MiniMax server")
+    parser.add_argument("--limit", type=int, default=5, help="Menu items to process")
+    parser.add_argument("--platforms", help="Comma-separated platforms to target")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra env for the batch, e.g. RATE_LIMIT_RPM=0")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--keep", action="store_true", help="Keep the sandbox directory for inspection")
+    add_settings_args(parser)
+    args = parser.parse_args()
+
+    overrides: Dict[str, str] = {}
+    for entry in args.env:
+        key, sep, value = entry.partition("=")
+        if not sep:
+            raise SystemExit(f"--env expects KEY=VALUE, got '{entry}'")
+        overrides[key.strip()] = value
+
+    with FakeMiniMaxServer(settings_from_args(args)) as server:
+        summary = run_benchmark(server, limit=args.limit, platforms=args.platforms, env_overrides=overrides, keep=args.keep)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
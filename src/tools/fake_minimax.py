@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from src.minimax.config import ENDPOINT_KINDS, MiniMaxConfig, load_config
+
+
+# Leading bytes so fake media at least sniff as the right container type
+_MAGIC = {
+    "image": b"\xff\xd8\xff\xe0\x00\x10JFIF\x00",
+    "tts": b"ID3\x04\x00\x00\x00\x00\x00\x00",
+    "music": b"ID3\x04\x00\x00\x00\x00\x00\x00",
+    "video": b"\x00\x00\x00\x18ftypmp42",
+}
+
+
+@dataclass
+class Latency:
+    """Response delay distribution, parsed from specs like:
+
+    - `fixed:0.05`            always 50 ms
+    - `uniform:0.1,0.4`       uniform between 100 and 400 ms
+    - `lognormal:0.8,0.5`     median 0.8 s, sigma 0.5 (long right tail, like real LLM calls)
+    - `exp:0.3`               exponential with mean 0.3 s
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, args = spec.partition(":")
+        nums = [float(x) for x in args.split(",") if x.strip()] or [0.0]
+        kind = kind.strip().lower()
+        if kind not in {"fixed", "uniform", "lognormal", "exp"}:
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+        return cls(kind, nums[0], nums[1] if len(nums) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(max(self.a, 1e-6)), self.b)
+        if self.kind == "exp":
+            return rng.expovariate(1.0 / self.a) if self.a > 0 else 0.0
+        return self.a
+
+
+@dataclass
+class FakeSettings:
+    """Behaviour of the fake server; every random choice comes from one seeded RNG."""
+
+    latency: Dict[str, Latency] = field(default_factory=dict)  # by ENDPOINT_KINDS; missing = no delay
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: float = 1.0
+    # Seconds a video job stays "processing"; 0 returns the video inline from the create call
+    video_job_sec: float = 1.0
+    media_bytes: int = 64 * 1024
+    seed: int = 0
+
+
+def _digest(kind: str, payload: Dict[str, Any]) -> bytes:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{kind}:{canonical}".encode("utf-8")).digest()
+
+
+def fake_media(kind: str, seed: bytes, size: int) -> bytes:
+    """Deterministic pseudo-media: magic header followed by a sha256 chain of `seed`."""
+    out = bytearray(_MAGIC.get(kind, b""))
+    block = seed
+    while len(out) < size:
+        block = hashlib.sha256(block).digest()
+        out.extend(block)
+    return bytes(out[:size])
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+class FakeMiniMaxServer:
+    """Local stand-in for the MiniMax API covering every endpoint path in MiniMaxConfig.
+
+    Point the pipeline at it with `MINIMAX_BASE_URL=<server.url>`. `GET /__stats` returns
+    per-endpoint request and injected-error counts.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[FakeSettings] = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        config: Optional[MiniMaxConfig] = None,
+    ):
+        self.settings = settings or FakeSettings()
+        self.config = config or load_config()
+        self._kinds = {path: kind for kind, path in self.config.endpoint_paths().items()}
+        self._rng = random.Random(self.settings.seed)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Tuple[float, bytes]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {k: {"requests": 0, "429": 0, "5xx": 0, "bytes_in": 0} for k in ENDPOINT_KINDS}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeMiniMaxServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-minimax", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeMiniMaxServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
+
+    # Request handling -----------------------------------------------------
+    def _decide(self, kind: str, size: int) -> Tuple[float, Optional[int]]:
+        """Latency to apply and an injected HTTP status (429/503) or None, under one lock."""
+        with self._lock:
+            stats = self._stats[kind]
+            stats["requests"] += 1
+            stats["bytes_in"] += size
+            latency = self.settings.latency.get(kind, Latency()).sample(self._rng)
+            roll = self._rng.random()
+            if roll < self.settings.rate_429:
+                stats["429"] += 1
+                return latency, 429
+            if roll < self.settings.rate_429 + self.settings.rate_5xx:
+                stats["5xx"] += 1
+                return latency, 503
+            return latency, None
+
+    def _respond(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ok = {"status_code": 0, "status_msg": "success"}
+        seed = _digest(kind, payload)
+        size = self.settings.media_bytes
+        if kind == "text":
+            return self._chat(payload, seed)
+        if kind == "image":
+            n = max(1, int(payload.get("n") or 1))
+            images = [{"image_base64": _b64(fake_media("image", seed + bytes([i]), size))} for i in range(n)]
+            return {"data": images, "base_resp": ok}
+        if kind in ("tts", "music"):
+            return {"audio": _b64(fake_media(kind, seed, size)), "base_resp": ok}
+        if kind == "video":
+            if self.settings.video_job_sec <= 0:
+                return {"video_base64": _b64(fake_media("video", seed, size)), "base_resp": ok}
+            job_id = uuid.UUID(bytes=seed[:16]).hex + uuid.uuid4().hex[:8]
+            with self._lock:
+                self._jobs[job_id] = (time.monotonic() + self.settings.video_job_sec, seed)
+            return {"task_id": job_id, "base_resp": ok}
+        # video_query
+        job_id = str(payload.get("id") or payload.get("task_id") or "")
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return {"base_resp": {"status_code": 2013, "status_msg": f"unknown task {job_id}"}}
+        ready_at, job_seed = job
+        if time.monotonic() < ready_at:
+            return {"task_id": job_id, "status": "processing", "base_resp": ok}
+        return {
+            "task_id": job_id,
+            "status": "success",
+            "video_base64": _b64(fake_media("video", job_seed, size)),
+            "thumbnail_base64": _b64(fake_media("image", job_seed, 4096)),
+            "base_resp": ok,
+        }
+
+    def _chat(self, payload: Dict[str, Any], seed: bytes) -> Dict[str, Any]:
+        words = max(5, min(int(payload.get("max_tokens") or 200) // 2, 120))
+        rng = random.Random(seed)
+        vocab = ["fresh", "basil", "handmade", "pasta", "golden", "crispy", "garlic", "rustic", "house", "sauce", "tender", "bright"]
+        text = " ".join(rng.choice(vocab) for _ in range(words)).capitalize() + "."
+        prompt_chars = len(json.dumps(payload.get("messages") or []))
+        usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": words, "total_tokens": prompt_chars // 4 + words}
+        return {
+            "id": seed.hex()[:16],
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+            "base_resp": {"status_code": 0, "status_msg": "success"},
+        }
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                raw = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path == "/__stats":
+                    self._send_json(200, server.stats())
+                else:
+                    self._send_json(404, {"base_resp": {"status_code": 404, "status_msg": "not found"}})
+
+            def do_POST(self) -> None:  # noqa: N802
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                kind = server._kinds.get(self.path.split("?", 1)[0])
+                if kind is None:
+                    self._send_json(404, {"base_resp": {"status_code": 404, "status_msg": f"unknown path {self.path}"}})
+                    return
+                try:
+                    payload = json.loads(raw or b"{}")
+                except ValueError:
+                    self._send_json(400, {"base_resp": {"status_code": 2013, "status_msg": "invalid JSON"}})
+                    return
+                latency, injected = server._decide(kind, len(raw))
+                if latency > 0:
+                    time.sleep(latency)
+                if injected == 429:
+                    body = {"base_resp": {"status_code": 1002, "status_msg": "rate limit exceeded (fake)"}}
+                    self._send_json(429, body, {"Retry-After": f"{server.settings.retry_after:g}"})
+                    return
+                if injected:
+                    self._send_json(injected, {"base_resp": {"status_code": 1013, "status_msg": "service unavailable (fake)"}})
+                    return
+                body = server._respond(kind, payload)
+                if kind == "text" and payload.get("stream"):
+                    self._stream_chat(body)
+                else:
+                    self._send_json(200, body)
+
+            def _stream_chat(self, body: Dict[str, Any]) -> None:
+                words = body["choices"][0]["message"]["content"].split(" ")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i, word in enumerate(words):
+                    delta = {"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}]}
+                    try:
+                        self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                    except (BrokenPipeError, ConnectionResetError):
+                        return  # client stopped reading (caption long enough)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
+
+
+def parse_latency_args(default: Optional[str], per_kind: Optional[list]) -> Dict[str, Latency]:
+    """`--latency-default SPEC` plus repeated `--latency KIND=SPEC` into a per-kind map."""
+    out: Dict[str, Latency] = {}
+    if default:
+        out = {kind: Latency.parse(default) for kind in ENDPOINT_KINDS}
+    for entry in per_kind or []:
+        kind, _, spec = entry.partition("=")
+        kind = kind.strip().lower()
+        if kind not in ENDPOINT_KINDS:
+            raise SystemExit(f"Unknown endpoint kind '{kind}'; expected one of {', '.join(ENDPOINT_KINDS)}")
+        out[kind] = Latency.parse(spec)
+    return out
+
+
+def add_settings_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-default", help="Latency for every endpoint, e.g. lognormal:0.5,0.4")
+    parser.add_argument("--latency", action="append", metavar="KIND=SPEC", help="Per-endpoint latency, e.g. video=uniform:2,5")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429 + Retry-After")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--video-job-sec", type=float, default=1.0, help="Seconds a video job stays processing (0 = inline)")
+    parser.add_argument("--media-kb", type=int, default=64, help="Size of generated image/audio/video payloads")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def settings_from_args(args: argparse.Namespace) -> FakeSettings:
+    return FakeSettings(
+        latency=parse_latency_args(args.latency_default, args.latency),
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        video_job_sec=args.video_job_sec,
+        media_bytes=max(1, args.media_kb) * 1024,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local fake MiniMax API for benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_settings_args(parser)
+    args = parser.parse_args()
+
+    server = FakeMiniMaxServer(settings_from_args(args), host=args.host, port=args.port)
+    print(f"Fake MiniMax listening on {server.url}  (export MINIMAX_BASE_URL={server.url})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from src.menu.utils import (
     ensure_build_tree,
     find_images_for_slug,
     load_menu_items,
+    slug_candidates,
 )
 
 
@@ -31,8 +32,7 @@ def validate_assets(verbose: bool = False) -> int:
     for image in DATA_DIR.glob("*"):
         if not image.is_file() or image.suffix.lower() not in SUPPORTED_IMAGE_EXTENSIONS:
             continue
-        stem = image.stem
-        if any(stem == slug or stem.startswith(f"{slug}-") for slug in slugs):
+        if any(candidate in slugs for candidate in slug_candidates(image.stem)):
             continue
         stray_images.append(image)
 
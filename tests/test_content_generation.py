@@ -3,8 +3,28 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+import pytest
+
 import src.minimax.content as content_module
 import src.menu.utils as utils
+from src.minimax.client import CircuitOpenError, MiniMaxClient, MiniMaxError
+from src.minimax.config import REASONING_TOKENS_RESERVE, MiniMaxConfig
+from src.minimax.text import estimate_tokens, max_tokens_for_chars
+
+
+def _cfg(**overrides) -> MiniMaxConfig:
+    base = dict(
+        base_url="https://content.test",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+    )
+    base.update(overrides)
+    return MiniMaxConfig(**base)
 
 
 def test_content_generation_writes_build_json(tmp_path, monkeypatch):
@@ -44,3 +64,201 @@ def test_content_generation_writes_build_json(tmp_path, monkeypatch):
     assert "narration_script" in data and data["narration_script"]
     assert "platforms" in data and "instagram_feed" in data["platforms"]
     assert "allergen_warnings" in data
+
+
+def test_streamed_caption_stops_at_platform_limit(tmp_path, monkeypatch):
+    build_dir = tmp_path / "build"
+    items_dir = tmp_path / "menu" / "items" / "dinner"
+    items_dir.mkdir(parents=True)
+    monkeypatch.setattr(utils, "BUILD_DIR", build_dir)
+    monkeypatch.setattr(utils, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    monkeypatch.setattr(content_module, "CONTENT_DIR", build_dir / "content")
+    monkeypatch.setattr(content_module, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    (items_dir / "test-dish.json").write_text(json.dumps({"slug": "test-dish", "name": "Test Dish"}), encoding="utf-8")
+
+    consumed = []
+
+    def endless_stream(*a, **k):  # type: ignore[no-untyped-def]
+        while True:
+            consumed.append(1)
+            yield "word "
+
+    monkeypatch.setattr(content_module, "generate_text_stream", endless_stream)
+    out = content_module.write_seo_copy("test-dish", platforms=["pinterest"], stream=True)
+
+    caption = out["platforms"]["pinterest"]["caption"]
+    assert len(caption) == 100 and caption.endswith("…")
+    # Stopped just past the 100-char Pinterest limit instead of draining the stream
+    assert len(consumed) == 21
+
+
+def test_reasoning_model_caption_keeps_room_for_and_drops_think_block(tmp_path, monkeypatch):
+    build_dir = tmp_path / "build"
+    items_dir = tmp_path / "menu" / "items" / "dinner"
+    items_dir.mkdir(parents=True)
+    monkeypatch.setattr(utils, "BUILD_DIR", build_dir)
+    monkeypatch.setattr(utils, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    monkeypatch.setattr(content_module, "CONTENT_DIR", build_dir / "content")
+    monkeypatch.setattr(content_module, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    (items_dir / "test-dish.json").write_text(json.dumps({"slug": "test-dish", "name": "Test Dish"}), encoding="utf-8")
+
+    reasoning = "<think>" + "The caption should mention the view. " * 40 + "</think>\n"
+    budgets = []
+
+    def fake_generate(client, messages, **kwargs):  # type: ignore[no-untyped-def]
+        budgets.append(kwargs["max_tokens"])
+        return {"choices": [{"message": {"content": reasoning + "Sunset pasta at 41 Bistro"}}]}
+
+    def fake_stream(client, messages, **kwargs):  # type: ignore[no-untyped-def]
+        budgets.append(kwargs["max_tokens"])
+        yield from [reasoning[:200], reasoning[200:], "Sunset pasta ", "at 41 Bistro"]
+
+    monkeypatch.setattr(content_module, "generate_text", fake_generate)
+    monkeypatch.setattr(content_module, "generate_text_stream", fake_stream)
+    client = MiniMaxClient(_cfg(chat_model="MiniMax-M2"))
+    for stream in (False, True):
+        out = content_module.write_seo_copy("test-dish", platforms=["pinterest"], client=client, stream=stream)
+        # The reasoning neither ends up in nor counts toward the 100-char caption
+        assert out["platforms"]["pinterest"]["caption"] == "Sunset pasta at 41 Bistro"
+    assert budgets == [max_tokens_for_chars(100) + REASONING_TOKENS_RESERVE] * 2
+
+
+def test_batched_captions_use_one_call_and_fall_back_per_platform(tmp_path, monkeypatch):
+    build_dir = tmp_path / "build"
+    items_dir = tmp_path / "menu" / "items" / "dinner"
+    items_dir.mkdir(parents=True)
+    monkeypatch.setattr(utils, "BUILD_DIR", build_dir)
+    monkeypatch.setattr(utils, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    monkeypatch.setattr(content_module, "CONTENT_DIR", build_dir / "content")
+    monkeypatch.setattr(content_module, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    (items_dir / "test-dish.json").write_text(json.dumps({"slug": "test-dish", "name": "Test Dish"}), encoding="utf-8")
+
+    prompts = []
+    batch_reply = (
+        "<think>plan</think>```json\n"
+        + json.dumps({"tiktok": "Short and sweet at 41 Bistro", "pinterest": "x" * 250, "facebook": 42})
+        + "\n```"
+    )
+
+    def fake_generate(client, messages, **kwargs):  # type: ignore[no-untyped-def]
+        prompts.append(messages[0]["content"])
+        text = batch_reply if "JSON object" in messages[0]["content"] else "Single caption"
+        return {"choices": [{"message": {"content": text}}]}
+
+    monkeypatch.setattr(content_module, "generate_text", fake_generate)
+    out = content_module.write_seo_copy("test-dish", platforms=["tiktok", "pinterest", "facebook"], batched=True, stream=False)
+
+    captions = {p: v["caption"] for p, v in out["platforms"].items()}
+    assert captions["tiktok"] == "Short and sweet at 41 Bistro"
+    assert len(captions["pinterest"]) == 100 and captions["pinterest"].endswith("…")
+    # Non-string entry: only that platform is generated on its own
+    assert captions["facebook"] == "Single caption"
+    assert len(prompts) == 2 and "Platform: facebook" in prompts[1]
+
+
+def test_malformed_or_failed_caption_batch_falls_back_to_single_calls(tmp_path, monkeypatch):
+    build_dir = tmp_path / "build"
+    items_dir = tmp_path / "menu" / "items" / "dinner"
+    items_dir.mkdir(parents=True)
+    monkeypatch.setattr(utils, "BUILD_DIR", build_dir)
+    monkeypatch.setattr(utils, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    monkeypatch.setattr(content_module, "CONTENT_DIR", build_dir / "content")
+    monkeypatch.setattr(content_module, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    (items_dir / "test-dish.json").write_text(json.dumps({"slug": "test-dish", "name": "Test Dish"}), encoding="utf-8")
+
+    platforms = ["tiktok", "pinterest", "facebook"]
+    replies = ['{"tiktok": "Short and sweet", "pinterest": ', MiniMaxError("rate limited", http_status=429)]
+    prompts = []
+
+    def fake_generate(client, messages, **kwargs):  # type: ignore[no-untyped-def]
+        prompts.append(messages[0]["content"])
+        if "JSON object" in messages[0]["content"]:
+            reply = replies[0]
+            if isinstance(reply, Exception):
+                raise reply
+            return {"choices": [{"message": {"content": reply}}]}
+        return {"choices": [{"message": {"content": "Single caption"}}]}
+
+    monkeypatch.setattr(content_module, "generate_text", fake_generate)
+    for _ in range(2):  # a truncated JSON reply, then a throttled batch call
+        prompts.clear()
+        out = content_module.write_seo_copy("test-dish", platforms=platforms, batched=True, stream=False)
+        assert {p: v["caption"] for p, v in out["platforms"].items()} == dict.fromkeys(platforms, "Single caption")
+        assert len(prompts) == 4
+        replies.pop(0)
+
+
+def test_batched_narration_packs_slugs_and_falls_back(tmp_path, monkeypatch):
+    build_dir = tmp_path / "build"
+    items_dir = tmp_path / "menu" / "items" / "dinner"
+    items_dir.mkdir(parents=True)
+    monkeypatch.setattr(utils, "BUILD_DIR", build_dir)
+    monkeypatch.setattr(utils, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    monkeypatch.setattr(content_module, "CONTENT_DIR", build_dir / "content")
+    monkeypatch.setattr(content_module, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    slugs = ["dish-a", "dish-b", "dish-c", "dish-d"]
+    for slug in slugs:
+        (items_dir / f"{slug}.json").write_text(json.dumps({"slug": slug, "name": slug.title()}), encoding="utf-8")
+
+    calls = []
+
+    def fake_generate(client, messages, **kwargs):  # type: ignore[no-untyped-def]
+        prompt = messages[0]["content"]
+        calls.append(prompt)
+        if "JSON object" in prompt:
+            # dish-b is left out of the reply and must be generated on its own
+            found = [s for s in slugs if f"Slug: {s}" in prompt and s != "dish-b"]
+            return {"choices": [{"message": {"content": json.dumps({s: f"Script for {s}" for s in found})}}]}
+        return {"choices": [{"message": {"content": "Single script"}}]}
+
+    monkeypatch.setattr(content_module, "generate_text", fake_generate)
+    out = content_module.generate_narration_scripts(slugs, max_items=3, token_budget=10_000)
+
+    assert set(out) == set(slugs)
+    # One call for a..c, dish-d alone in the second batch, plus dish-b's fallback
+    assert len(calls) == 3
+    data = json.loads((build_dir / "content" / "dish-a.json").read_text(encoding="utf-8"))
+    assert data["narration_script"] == "Script for dish-a"
+    assert out["dish-b"]["script"] == "Single script"
+    assert not list((build_dir / "content").glob(".*.tmp"))
+
+
+def test_batched_narration_falls_back_only_on_retryable_errors(tmp_path, monkeypatch):
+    build_dir = tmp_path / "build"
+    items_dir = tmp_path / "menu" / "items" / "dinner"
+    items_dir.mkdir(parents=True)
+    monkeypatch.setattr(utils, "BUILD_DIR", build_dir)
+    monkeypatch.setattr(utils, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    monkeypatch.setattr(content_module, "CONTENT_DIR", build_dir / "content")
+    monkeypatch.setattr(content_module, "ITEM_OUTPUT_DIR", tmp_path / "menu" / "items")
+    slugs = ["dish-a", "dish-b"]
+    for slug in slugs:
+        (items_dir / f"{slug}.json").write_text(json.dumps({"slug": slug, "name": slug.title()}), encoding="utf-8")
+
+    calls = []
+    failure = [MiniMaxError("overloaded", http_status=503)]
+
+    def fake_generate(client, messages, **kwargs):  # type: ignore[no-untyped-def]
+        calls.append(messages[0]["content"])
+        if "JSON object" in messages[0]["content"]:
+            raise failure[0]
+        return {"choices": [{"message": {"content": "Single script"}}]}
+
+    monkeypatch.setattr(content_module, "generate_text", fake_generate)
+    out = content_module.generate_narration_scripts(slugs, max_items=2, token_budget=10_000)
+    assert {s: r["script"] for s, r in out.items()} == {"dish-a": "Single script", "dish-b": "Single script"}
+    assert len(calls) == 3
+
+    for fatal in (MiniMaxError("invalid api key", http_status=401), CircuitOpenError("/v1/text", 30)):
+        failure[0] = fatal
+        calls.clear()
+        with pytest.raises(MiniMaxError):
+            content_module.generate_narration_scripts(slugs, max_items=2, token_budget=10_000)
+        assert len(calls) == 1  # no per-item calls after a fatal batch error
+
+
+def test_narration_batches_respect_token_budget():
+    items = [{"slug": f"dish-{i}", "name": "Dish", "description": "x" * 400} for i in range(5)]
+    per_item = estimate_tokens(content_module._narration_item_block(items[0])) + 150
+    batches = content_module._pack_narration_batches(items, max_items=10, token_budget=300 + 2 * per_item, output_tokens=150)
+    assert [len(b) for b in batches] == [2, 2, 1]
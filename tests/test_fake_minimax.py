@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import base64
+import time
+
+import requests
+
+from src.minimax.client import MiniMaxClient
+from src.minimax.config import MiniMaxConfig
+from src.tools.fake_minimax import FakeMiniMaxServer, FakeSettings, Latency
+
+
+def _cfg(base_url: str, **overrides) -> MiniMaxConfig:
+    base = dict(
+        base_url=base_url,
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=3,
+        timeout_sec=5,
+        retry_base_delay_sec=0.01,
+        retry_max_delay_sec=0.05,
+    )
+    base.update(overrides)
+    return MiniMaxConfig(**base)
+
+
+def test_fake_server_serves_every_endpoint():
+    with FakeMiniMaxServer(FakeSettings(video_job_sec=0.2, media_bytes=256), config=_cfg("http://unused")) as server:
+        client = MiniMaxClient(_cfg(server.url))
+        chat = client.chat_completions([{"role": "user", "content": "caption"}], max_tokens=40)
+        assert chat["choices"][0]["message"]["content"]
+        assert chat["usage"]["completion_tokens"] == 20
+
+        image = client.image_generation({"prompt": "pasta"})
+        raw = base64.b64decode(image["data"][0]["image_base64"])
+        assert len(raw) == 256 and raw.startswith(b"\xff\xd8")
+
+        assert base64.b64decode(client.text_to_speech({"text": "hi"})["audio"]).startswith(b"ID3")
+        assert base64.b64decode(client.music_generation({"prompt": "jazz"})["audio"]).startswith(b"ID3")
+
+        job = client.video_generation({"prompt": "steam"})["task_id"]
+        assert client.video_query(job)["status"] == "processing"
+        time.sleep(0.25)
+        done = client.video_query(job)
+        assert done["status"] == "success"
+        assert base64.b64decode(done["video_base64"])[4:8] == b"ftyp"
+
+        stats = requests.get(f"{server.url}/__stats", timeout=5).json()
+        assert stats["video_query"]["requests"] == 2
+        assert stats["text"]["requests"] == 1
+
+
+def test_media_is_deterministic_per_payload():
+    with FakeMiniMaxServer(FakeSettings(media_bytes=128), config=_cfg("http://unused")) as server:
+        client = MiniMaxClient(_cfg(server.url))
+        first = client.text_to_speech({"text": "same"})["audio"]
+        assert client.text_to_speech({"text": "same"})["audio"] == first
+        assert client.text_to_speech({"text": "other"})["audio"] != first
+
+
+def test_injected_throttling_is_retried():
+    settings = FakeSettings(rate_429=0.5, retry_after=0.01, latency={"tts": Latency.parse("fixed:0.001")}, seed=7)
+    with FakeMiniMaxServer(settings, config=_cfg("http://unused")) as server:
+        client = MiniMaxClient(_cfg(server.url, max_retries=10))
+        for i in range(6):
+            client.text_to_speech({"text": f"line {i}"})
+        stats = server.stats()["tts"]
+    assert stats["429"] > 0
+    assert stats["requests"] == 6 + stats["429"]
+
+
+def test_latency_specs_parse():
+    assert Latency.parse("fixed:0.2").sample(None) == 0.2  # type: ignore[arg-type]
+    spec = Latency.parse("uniform:0.1,0.3")
+    assert (spec.kind, spec.a, spec.b) == ("uniform", 0.1, 0.3)
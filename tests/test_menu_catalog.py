@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+
+import src.menu.utils as utils
+
+
+MENU = """course: Dinner
+sections:
+  - name: Pasta
+    items:
+      - slug: linguine-clams
+        name: Linguine Clams
+        ingredients: [linguine, clams]
+      - slug: penne-vodka
+        name: Penne Vodka
+  - name: Mains
+    items:
+      - slug: chicken-marsala
+        name: Chicken Marsala
+"""
+
+
+def test_catalog_indexes_and_caches_until_yaml_changes(tmp_path, monkeypatch):
+    menu_file = tmp_path / "dinner.yaml"
+    menu_file.write_text(MENU, encoding="utf-8")
+    monkeypatch.setattr(utils, "MENU_DIR", tmp_path)
+
+    catalog = utils.load_catalog()
+    assert len(catalog) == 3
+    assert catalog.get("penne-vodka").section == "Pasta"
+    assert "chicken-marsala" in catalog and catalog.get("missing") is None
+    assert [i.slug for i in catalog.course("Dinner")] == ["linguine-clams", "penne-vodka", "chicken-marsala"]
+    assert [i.slug for i in catalog.section("Dinner", "Mains")] == ["chicken-marsala"]
+    assert [i.slug for i in utils.load_menu_items()] == [i.slug for i in catalog]
+
+    # Unchanged files: same object, no re-parse
+    assert utils.load_catalog() is catalog
+
+    menu_file.write_text(MENU.replace("Penne Vodka", "Penne alla Vodka"), encoding="utf-8")
+    st = menu_file.stat()
+    os.utime(menu_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    reloaded = utils.load_catalog()
+    assert reloaded is not catalog
+    assert reloaded.get("penne-vodka").name == "Penne alla Vodka"
+
+    (tmp_path / "lunch.yaml").write_text("course: Lunch\nsections:\n  - name: Soups\n    items:\n      - slug: minestrone\n", encoding="utf-8")
+    assert utils.load_catalog().get("minestrone").course == "Lunch"
+
+
+def test_image_index_matches_slug_suffix_rules_and_rescans(tmp_path, monkeypatch):
+    for name in ["linguine.jpg", "linguine-clams.png", "linguine-clams-2.jpg", "linguinex.jpg", "linguine.JPG", "notes.txt"]:
+        (tmp_path / name).write_bytes(b"x")
+    monkeypatch.setattr(utils, "DATA_DIR", tmp_path)
+
+    names = lambda slug: [p.name for p in utils.find_images_for_slug(slug)]  # noqa: E731
+    # Same matches as `{slug}{ext}` + glob `{slug}-*{ext}` (extensions are case-sensitive)
+    assert names("linguine") == ["linguine-clams-2.jpg", "linguine-clams.png", "linguine.jpg"]
+    assert names("linguine-clams") == ["linguine-clams-2.jpg", "linguine-clams.png"]
+    assert names("clams") == []
+
+    index = utils.image_index()
+    assert utils.image_index() is index
+    (tmp_path / "clams.webp").write_bytes(b"x")
+    st = tmp_path.stat()
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert names("clams") == ["clams.webp"]
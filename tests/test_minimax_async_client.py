@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+
+from src.minimax.async_client import AsyncMiniMaxClient
+from src.minimax.client import MiniMaxError
+from src.minimax.config import MiniMaxConfig
+from src.minimax.ratelimit import SharedTokenBucket
+
+
+def _cfg(**overrides) -> MiniMaxConfig:
+    base = dict(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=1,
+        timeout_sec=5,
+    )
+    base.update(overrides)
+    return MiniMaxConfig(**base)
+
+
+def test_async_chat_completions_and_concurrency():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, str(request.url), request.headers["Authorization"], json.loads(request.content)))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"base_resp": {"status_code": 0}, "data": {"ok": True}})
+
+    async def run():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncMiniMaxClient(_cfg(), client=http) as client:
+            return await asyncio.gather(*[
+                client.chat_completions([{"role": "user", "content": f"hi {i}"}]) for i in range(10)
+            ])
+
+    t0 = time.monotonic()
+    results = asyncio.run(run())
+    elapsed = time.monotonic() - t0
+
+    assert len(results) == 10 and all(r["data"]["ok"] for r in results)
+    method, url, auth, body = seen[0]
+    assert method == "POST"
+    assert url == "https://api.minimax.io/v1/text/chat/completions"
+    assert auth == "Bearer KEY"
+    assert body["model"] == "MiniMax-M2"
+    # Ten 50ms calls overlapping on one event loop should finish far faster than serially
+    assert elapsed < 0.4
+
+
+def test_async_base_resp_error_raises():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"base_resp": {"status_code": 1004, "status_msg": "auth failed"}})
+
+    async def run():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncMiniMaxClient(_cfg(), client=http) as client:
+            await client.video_query("job-1")
+
+    try:
+        asyncio.run(run())
+    except MiniMaxError as e:
+        assert e.status_code == 1004
+        assert "auth failed" in str(e)
+    else:
+        assert False, "Expected MiniMaxError"
+
+
+def test_async_calls_use_the_adaptive_ceiling_and_book_shared_buckets_off_loop(tmp_path, monkeypatch):
+    active, peak = [0], [0]
+    booked_on = []
+    real_reserve = SharedTokenBucket.reserve
+
+    def reserve(self, tokens=1.0):  # type: ignore[no-untyped-def]
+        booked_on.append(threading.current_thread() is threading.main_thread())
+        return real_reserve(self, tokens)
+
+    monkeypatch.setattr(SharedTokenBucket, "reserve", reserve)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+        return httpx.Response(200, json={"base_resp": {"status_code": 0}})
+
+    cfg = _cfg(
+        rate_limit_rpm=6000,
+        rate_limit_burst=20,
+        rate_limit_shared_path=str(tmp_path / "rl.sqlite3"),
+        adaptive_concurrency=True,
+        adaptive_min_concurrency=2,
+        adaptive_max_concurrency=2,
+    )
+
+    async def run():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncMiniMaxClient(cfg, client=http) as client:
+            await asyncio.gather(*[client.text_to_speech({"text": f"line {i}"}) for i in range(8)])
+            return client._pools[cfg.tts_path].adaptive
+
+    adaptive = asyncio.run(run())
+    assert peak[0] == 2 and adaptive.inflight == 0
+    assert booked_on and not any(booked_on)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import pytest
+import requests
+
+from src.minimax.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, reset_breakers
+from src.minimax.client import CircuitOpenError, MiniMaxClient, MiniMaxError
+from src.minimax.config import MiniMaxConfig
+
+
+class DummyResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {}
+        self.text = ""
+
+    def json(self):
+        return self._data
+
+
+def _cfg(**overrides) -> MiniMaxConfig:
+    base = dict(
+        base_url="https://breaker.test",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=3,
+        timeout_sec=5,
+        retry_base_delay_sec=0,
+        breaker_failure_threshold=3,
+        breaker_reset_sec=30,
+    )
+    base.update(overrides)
+    return MiniMaxConfig(**base)
+
+
+def test_state_transitions():
+    now = [0.0]
+    cb = CircuitBreaker("video", failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    cb.record_failure()
+    assert cb.state == CLOSED and cb.allow()
+    cb.record_failure()
+    assert cb.state == OPEN and not cb.allow()
+    assert cb.retry_in() == 10
+
+    now[0] = 10.0
+    assert cb.state == HALF_OPEN
+    assert cb.allow()  # the single probe
+    assert not cb.allow()
+    cb.record_failure()  # probe failed: open again for a full timeout
+    assert cb.state == OPEN and cb.retry_in() == 10
+
+    now[0] = 20.0
+    assert cb.allow()
+    cb.record_success()
+    assert cb.state == CLOSED and cb.allow()
+
+
+def test_open_circuit_fails_fast_across_clients(monkeypatch):
+    reset_breakers()
+    calls = []
+
+    def fake_request(self, method, url, json, timeout):  # type: ignore[no-untyped-def]
+        calls.append(url)
+        return DummyResponse(503, {})
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    client = MiniMaxClient(_cfg())
+    client._sleep = lambda s: None
+    with pytest.raises(MiniMaxError) as first:
+        client.video_generation({"prompt": "p"})
+    assert not isinstance(first.value, CircuitOpenError)
+    assert len(calls) == 3  # threshold reached on the last allowed attempt
+
+    # A fresh client (as each pipeline step builds) sees the same open circuit
+    with pytest.raises(CircuitOpenError) as second:
+        MiniMaxClient(_cfg()).video_generation({"prompt": "p"})
+    assert len(calls) == 3
+    assert second.value.retry_after > 0
+    assert second.value.stats.outcome == "circuit_open"
+
+    # Other endpoints are unaffected
+    monkeypatch.setattr(requests.Session, "request", lambda *a, **k: DummyResponse(200, {"base_resp": {"status_code": 0}}))
+    client.music_generation({"prompt": "p"})
+
+
+def test_client_errors_do_not_trip_breaker(monkeypatch):
+    reset_breakers()
+    monkeypatch.setattr(
+        requests.Session, "request", lambda *a, **k: DummyResponse(400, {"base_resp": {"status_code": 2013, "status_msg": "bad"}})
+    )
+    client = MiniMaxClient(_cfg(breaker_failure_threshold=1))
+    for _ in range(3):
+        with pytest.raises(MiniMaxError) as exc:
+            client.image_generation({"prompt": "p"})
+        assert not isinstance(exc.value, CircuitOpenError)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import time
+
+import requests
+
+from src.minimax.cache import ResponseCache, payload_key
+from src.minimax.client import MiniMaxClient
+from src.minimax.config import MiniMaxConfig
+
+
+class DummyResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {}
+        self.text = ""
+
+    def json(self):
+        return self._data
+
+
+def _cfg() -> MiniMaxConfig:
+    return MiniMaxConfig(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=1,
+        timeout_sec=5,
+    )
+
+
+def test_chat_completions_served_from_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_request(self, method, url, json, timeout):  # type: ignore[no-untyped-def]
+        calls.append(json)
+        return DummyResponse(200, {"base_resp": {"status_code": 0}, "choices": [{"message": {"content": f"v{len(calls)}"}}]})
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    client = MiniMaxClient(_cfg(), cache=ResponseCache(tmp_path))
+    msgs = [{"role": "user", "content": "caption please"}]
+
+    first = client.chat_completions(msgs, temperature=0.7, max_tokens=100)
+    second = client.chat_completions(msgs, temperature=0.7, max_tokens=100)
+    assert first == second and len(calls) == 1
+    assert client.last_call_stats.outcome == "cache"
+
+    # Any payload change is a different key
+    client.chat_completions(msgs, temperature=0.2, max_tokens=100)
+    assert len(calls) == 2
+
+    # Refresh mode ignores the stored answer but overwrites it
+    refreshing = MiniMaxClient(_cfg(), cache=ResponseCache(tmp_path, refresh=True))
+    fresh = refreshing.chat_completions(msgs, temperature=0.7, max_tokens=100)
+    assert len(calls) == 3 and fresh != first
+    assert client.chat_completions(msgs, temperature=0.7, max_tokens=100) == fresh
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=600, ttl_sec=60)
+    keys = [payload_key("/v1/text", {"n": i}) for i in range(6)]
+    for i, key in enumerate(keys):
+        cache.put(key, {"text": "x" * 100, "n": i})
+        # Distinct access times so LRU order is deterministic
+        path = tmp_path / key[:2] / f"{key}.json"
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        if i == 0:
+            cache.get(key)  # touching the first entry makes it most recently used
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None  # oldest untouched entry evicted
+
+    expired = ResponseCache(tmp_path, ttl_sec=0.001)
+    time.sleep(0.01)
+    assert expired.get(keys[0]) is None
+    assert not (tmp_path / keys[0][:2] / f"{keys[0]}.json").exists()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from src.minimax.client import MiniMaxClient, MiniMaxError
+from src.minimax.config import MiniMaxConfig
+from src.tools.fake_minimax import FakeMiniMaxServer, FakeSettings, Latency
+
+
+def _cfg(base_url: str, **overrides) -> MiniMaxConfig:
+    base = dict(
+        base_url=base_url,
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=2,
+        timeout_sec=5,
+    )
+    base.update(overrides)
+    return MiniMaxConfig(**base)
+
+
+def _exercise(client: MiniMaxClient):
+    return [
+        client.chat_completions([{"role": "user", "content": "caption"}]),
+        client.text_to_speech({"text": "hello"}),
+        client.text_to_speech({"text": "hello"}),
+        client.image_generation({"prompt": "pasta"}),
+    ]
+
+
+def test_record_then_replay_offline(tmp_path):
+    settings = FakeSettings(media_bytes=8192, latency={"image": Latency.parse("fixed:0.05")})
+    with FakeMiniMaxServer(settings, config=_cfg("http://unused")) as server:
+        recorder = MiniMaxClient(_cfg(server.url, cassette_mode="record", cassette_dir=str(tmp_path)))
+        recorded = _exercise(recorder)
+
+    lines = (tmp_path / "cassette.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 4
+    entries = [json.loads(line) for line in lines]
+    assert entries[3]["json"]["data"][0]["image_base64"]["b64"] is True
+    assert entries[3]["elapsed"] >= 0.05
+    # The two identical TTS answers share one blob; the index itself holds no media
+    assert len(list((tmp_path / "blobs").glob("*/*"))) == 2
+    assert sum(len(line) for line in lines) < 4096
+
+    # Server is gone: replay must not touch the network, and may use any base URL
+    player = MiniMaxClient(
+        _cfg("http://cassette-replay.test", cassette_mode="replay", cassette_dir=str(tmp_path), cassette_latency_scale=0)
+    )
+    assert _exercise(player) == recorded
+
+
+def test_replay_miss_fails_fast(tmp_path):
+    player = MiniMaxClient(_cfg("http://cassette-miss.test", cassette_mode="replay", cassette_dir=str(tmp_path)))
+    with pytest.raises(MiniMaxError, match="No recorded response"):
+        player.text_to_speech({"text": "never recorded"})
+    assert player.last_call_stats.attempts == 1
+
+
+def test_repeated_requests_replay_in_order(tmp_path):
+    with FakeMiniMaxServer(FakeSettings(video_job_sec=0.1), config=_cfg("http://unused")) as server:
+        recorder = MiniMaxClient(_cfg(server.url, cassette_mode="record", cassette_dir=str(tmp_path)))
+        job = recorder.video_generation({"prompt": "steam"})["task_id"]
+        first = recorder.video_query(job)["status"]
+        time.sleep(0.15)
+        second = recorder.video_query(job)["status"]
+    assert (first, second) == ("processing", "success")
+
+    player = MiniMaxClient(_cfg("http://cassette-order.test", cassette_mode="replay", cassette_dir=str(tmp_path)))
+    assert player.video_generation({"prompt": "steam"})["task_id"] == job
+    assert [player.video_query(job)["status"] for _ in range(3)] == ["processing", "success", "success"]
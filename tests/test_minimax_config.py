@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 from contextlib import contextmanager
 
-from src.minimax.config import load_config
+from src.minimax.config import REASONING_TOKENS_RESERVE, load_config
 
 
 @contextmanager
@@ -41,3 +41,26 @@ def test_model_aliases_are_canonicalized():
         assert cfg.rate_limit_rpm == 30
         assert cfg.max_retries == 5
 
+
+
+def test_per_endpoint_limits_from_env():
+    with env(
+        RATE_LIMIT_RPM="30",
+        RATE_LIMIT_RPM_VIDEO_QUERY="240",
+        MAX_CONCURRENCY_VIDEO="2",
+    ):
+        cfg = load_config()
+        assert cfg.endpoint_limit("video_query").rpm == 240
+        assert cfg.endpoint_limit("video").max_concurrency == 2
+        # Unspecified endpoints get no sub-cap (only the account-wide RPM) and stay unbounded
+        assert cfg.endpoint_limit("image").rpm == 0
+        assert cfg.endpoint_limit("image").max_concurrency == 0
+
+
+def test_reasoning_models_reserve_max_tokens_unless_overridden():
+    with env(MINIMAX_CHAT_MODEL="MiniMax-M2", MINIMAX_MAX_TOKENS_RESERVE=""):
+        assert load_config().tokens_reserve() == REASONING_TOKENS_RESERVE
+    with env(MINIMAX_CHAT_MODEL="abab6.5s-chat", MINIMAX_MAX_TOKENS_RESERVE=""):
+        assert load_config().tokens_reserve() == 0
+    with env(MINIMAX_CHAT_MODEL="MiniMax-M2", MINIMAX_MAX_TOKENS_RESERVE="0"):
+        assert load_config().tokens_reserve() == 0
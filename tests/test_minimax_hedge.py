@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+
+import httpx
+import pytest
+import requests
+
+from src.minimax.async_client import AsyncMiniMaxClient
+from src.minimax.client import MiniMaxClient
+from src.minimax.config import MiniMaxConfig
+from src.minimax.hedge import MIN_SAMPLES, HedgeBudget, hedge_delay, hedged_call
+from src.minimax.metrics import REGISTRY, observe_call
+from src.minimax.retry import CallStats
+
+
+class DummyResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {}
+        self.text = ""
+
+    def json(self):
+        return self._data
+
+
+def _cfg(base_url: str, **overrides) -> MiniMaxConfig:
+    base = dict(
+        base_url=base_url,
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=1,
+        timeout_sec=5,
+        hedge_enabled=True,
+        hedge_delay_sec=0.05,
+    )
+    base.update(overrides)
+    return MiniMaxConfig(**base)
+
+
+def _answer(text):
+    return {"base_resp": {"status_code": 0}, "choices": [{"message": {"content": text}}]}
+
+
+def test_slow_chat_call_is_hedged(monkeypatch):
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def fake_request(self, method, url, json, timeout):  # type: ignore[no-untyped-def]
+        with lock:
+            n = next(counter)
+        if n == 0:
+            time.sleep(0.5)
+            return DummyResponse(200, _answer("slow"))
+        return DummyResponse(200, _answer("fast"))
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    client = MiniMaxClient(_cfg("https://hedge-sync.test"))
+    labels = {"path": client.config.text_path, "model": "MiniMax-M2"}
+    wins = REGISTRY.counter("minimax_hedge_wins_total", winner="hedge", **labels)
+    t0 = time.monotonic()
+    out = client.chat_completions([{"role": "user", "content": "caption"}])
+    assert out["choices"][0]["message"]["content"] == "fast"
+    assert time.monotonic() - t0 < 0.4  # the slow original's answer is not awaited
+    assert REGISTRY.counter("minimax_hedge_wins_total", winner="hedge", **labels) == wins + 1
+    assert client.last_call_stats.outcome == "ok"
+
+
+def test_fast_call_and_exhausted_budget_are_not_hedged():
+    calls = []
+
+    def slow():
+        calls.append("primary")
+        time.sleep(0.1)
+        return "primary"
+
+    def dup():
+        calls.append("hedge")
+        return "hedge"
+
+    budget = HedgeBudget(ratio=0.0)
+    assert hedged_call(lambda: "quick", dup, delay=0.05, budget=budget, labels={}) == "quick"
+    assert hedged_call(slow, dup, delay=0.01, budget=budget, labels={}) == "hedge"  # spends the one token
+    calls.clear()
+    assert hedged_call(slow, dup, delay=0.01, budget=budget, labels={}) == "primary"
+    assert calls == ["primary"]
+
+
+def test_first_success_wins_and_only_the_returned_answer_counts_as_a_win():
+    budget = HedgeBudget(ratio=1.0, burst=10.0)
+    labels = {"path": "/hedge/race", "model": "m"}
+
+    def after(sec, answer):  # type: ignore[no-untyped-def]
+        def run():  # type: ignore[no-untyped-def]
+            time.sleep(sec)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        return run
+
+    t0 = time.monotonic()
+    assert hedged_call(after(0.5, "primary"), after(0, "hedge"), delay=0.05, budget=budget, labels=labels) == "hedge"
+    assert time.monotonic() - t0 < 0.3
+    assert hedged_call(after(0.1, "primary"), after(0.5, "hedge"), delay=0.05, budget=budget, labels=labels) == "primary"
+    # A failed hedge does not end the race; the primary's later answer is still used
+    assert hedged_call(after(0.2, "primary"), after(0, RuntimeError("dup")), delay=0.05, budget=budget, labels=labels) == "primary"
+    with pytest.raises(RuntimeError, match="original"):
+        hedged_call(after(0.1, RuntimeError("original")), after(0, RuntimeError("dup")), delay=0.05, budget=budget, labels=labels)
+    assert REGISTRY.counter("minimax_hedge_wins_total", winner="hedge", **labels) == 1
+    assert REGISTRY.counter("minimax_hedge_wins_total", winner="primary", **labels) == 2
+
+
+def test_hedged_calls_are_not_capped_by_a_pool_and_delay_ignores_failed_attempts():
+    budget = HedgeBudget(ratio=0.0)
+    budget.try_spend()  # no hedges: every call below is a lone primary
+    start = threading.Barrier(40, timeout=2)
+
+    def primary():  # type: ignore[no-untyped-def]
+        start.wait()  # only passes once all 40 primaries run at the same time
+        return "ok"
+
+    kwargs = dict(delay=5, budget=budget, labels={})
+    threads = [threading.Thread(target=hedged_call, args=(primary, primary), kwargs=kwargs) for _ in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not start.broken
+
+    labels = {"path": "/hedge/delay", "model": "m"}
+    for _ in range(MIN_SAMPLES):
+        observe_call(CallStats(method="POST", attempts=3, retries=2, elapsed_sec=30.0, outcome="error", **labels))
+    assert hedge_delay("/hedge/delay", "m", 0.95, 2.0) == 2.0  # failures alone leave the fallback
+    for _ in range(MIN_SAMPLES):
+        observe_call(CallStats(method="POST", attempts=2, retries=1, elapsed_sec=9.0, attempt_sec=0.5, outcome="ok", **labels))
+    assert hedge_delay("/hedge/delay", "m", 0.95, 2.0) <= 0.5
+
+
+def test_async_hedge_cancels_loser():
+    hits = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits.append(len(hits))
+        if len(hits) == 1:
+            await asyncio.sleep(1.0)
+            return httpx.Response(200, json=_answer("slow"))
+        return httpx.Response(200, json=_answer("fast"))
+
+    async def run():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncMiniMaxClient(_cfg("https://hedge-async.test"), client=http) as client:
+            return await asyncio.wait_for(client.chat_completions([{"role": "user", "content": "hi"}]), 0.5)
+
+    out = asyncio.run(run())
+    assert out["choices"][0]["message"]["content"] == "fast"
+    assert len(hits) == 2
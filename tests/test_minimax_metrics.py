@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import requests
+
+from src.minimax.client import MiniMaxClient, MiniMaxError
+from src.minimax.config import MiniMaxConfig
+from src.minimax.metrics import REGISTRY, Histogram, MetricsRegistry
+
+
+class DummyResponse:
+    def __init__(self, status_code, data, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self):
+        return self._data
+
+
+def _cfg() -> MiniMaxConfig:
+    return MiniMaxConfig(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=3,
+        timeout_sec=5,
+        retry_base_delay_sec=0,
+    )
+
+
+def test_histogram_percentiles_within_bucket_error():
+    hist = Histogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000)
+    assert hist.count == 1000
+    assert abs(hist.percentile(0.5) - 0.5) / 0.5 < 0.1
+    assert abs(hist.percentile(0.99) - 0.99) / 0.99 < 0.1
+    assert hist.percentile(1.0) == 1.0
+    snap = hist.snapshot()
+    assert snap["min"] == 0.001 and snap["max"] == 1.0
+
+
+def test_prometheus_and_snapshot_export():
+    reg = MetricsRegistry()
+    reg.inc("minimax_calls_total", path="/v1/text", model="m", outcome="ok")
+    reg.inc("minimax_calls_total", path="/v1/text", model="m", outcome="ok")
+    reg.observe("minimax_call_seconds", 0.25, path="/v1/text", model="m")
+    text = reg.to_prometheus()
+    assert '# TYPE minimax_calls_total counter' in text
+    assert 'minimax_calls_total{model="m",outcome="ok",path="/v1/text"} 2' in text
+    assert 'minimax_call_seconds_bucket{model="m",path="/v1/text",le="+Inf"} 1' in text
+    assert 'minimax_call_seconds_count{model="m",path="/v1/text"} 1' in text
+    snap = reg.snapshot()
+    assert snap["counters"]["minimax_calls_total"][0]["value"] == 2
+    assert snap["histograms"]["minimax_call_seconds"][0]["p50"] == 0.25
+
+
+def test_client_records_call_metrics(monkeypatch):
+    REGISTRY.reset()
+    responses = [
+        DummyResponse(429, {}, {"Retry-After": "0"}),
+        DummyResponse(200, {"base_resp": {"status_code": 1002, "status_msg": "rpm"}}),
+        DummyResponse(200, {"base_resp": {"status_code": 0}, "audio": "x"}),
+    ]
+
+    def fake_request(self, method, url, json, timeout):  # type: ignore[no-untyped-def]
+        return responses.pop(0)
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    client = MiniMaxClient(_cfg())
+    client._sleep = lambda s: None
+    client.music_generation({"prompt": "jazz"})
+
+    labels = {"path": client.config.music_path, "model": "music-2.0"}
+    assert REGISTRY.counter("minimax_calls_total", outcome="ok", **labels) == 1
+    assert REGISTRY.counter("minimax_attempts_total", **labels) == 3
+    assert REGISTRY.counter("minimax_retries_total", **labels) == 2
+    assert REGISTRY.counter("minimax_throttled_total", **labels) == 2
+    assert REGISTRY.histogram("minimax_call_seconds", **labels).count == 1
+    assert REGISTRY.histogram("minimax_request_bytes", **labels).max > 0
+
+    responses.append(DummyResponse(401, {"base_resp": {"status_code": 1004, "status_msg": "auth"}}))
+    try:
+        client.music_generation({"prompt": "rock"})
+    except MiniMaxError:
+        pass
+    assert REGISTRY.counter("minimax_calls_total", outcome="error", **labels) == 1
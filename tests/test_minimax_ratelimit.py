@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from src.minimax.config import EndpointLimit, MiniMaxConfig
+from src.minimax.ratelimit import (
+    EndpointPool,
+    SharedTokenBucket,
+    TokenBucket,
+    build_endpoint_pools,
+    endpoint_pool,
+    make_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, sec: float) -> None:
+        self.now += sec
+
+
+def test_burst_then_steady_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(60, burst=3, clock=clock, sleep=clock.sleep)
+    # Three immediate grants, then one per second
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == 1.0
+    assert bucket.reserve() == 2.0
+    clock.now += 10
+    assert bucket.try_acquire() is True  # refilled, capped at burst
+    assert bucket.available() == 2.0
+
+
+def test_try_acquire_never_blocks():
+    clock = FakeClock()
+    bucket = TokenBucket(60, burst=1, clock=clock, sleep=clock.sleep)
+    assert bucket.try_acquire() is True
+    assert bucket.try_acquire() is False
+    clock.now += 1.0
+    assert bucket.try_acquire() is True
+
+
+def test_concurrent_reservations_are_spaced_without_overshoot():
+    clock = FakeClock()
+    bucket = TokenBucket(120, burst=2, clock=clock, sleep=clock.sleep)
+    delays = []
+    lock = threading.Lock()
+
+    def worker():
+        d = bucket.reserve()
+        with lock:
+            delays.append(d)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Each thread gets a distinct slot: 2 burst tokens, then 0.5s spacing
+    assert sorted(delays) == [0.0, 0.0] + [0.5 * i for i in range(1, 19)]
+
+
+def test_disabled_when_rpm_zero():
+    bucket = TokenBucket(0)
+    assert bucket.reserve() == 0.0
+    assert bucket.try_acquire() is True
+
+
+def test_shared_bucket_budget_spans_instances(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "ratelimit.sqlite3"
+    # Two instances stand in for two worker processes pointed at the same file
+    a = SharedTokenBucket(path, 60, burst=2, clock=clock, sleep=clock.sleep)
+    b = SharedTokenBucket(path, 60, burst=2, clock=clock, sleep=clock.sleep)
+    assert a.reserve() == 0.0
+    assert b.reserve() == 0.0
+    assert b.try_acquire() is False
+    assert a.reserve() == 1.0
+    assert b.reserve() == 2.0
+    clock.now += 10
+    assert a.available() == 2.0
+
+
+def test_make_limiter_picks_shared_backend(tmp_path):
+    assert isinstance(make_limiter(60, 1), TokenBucket)
+    shared = make_limiter(60, 1, shared_path=str(tmp_path / "rl.sqlite3"), name="acct")
+    assert isinstance(shared, SharedTokenBucket) and shared.name == "acct"
+
+
+def _cfg(**limits) -> MiniMaxConfig:
+    return MiniMaxConfig(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=60,
+        endpoint_limits=limits,
+    )
+
+
+def test_endpoint_pools_are_isolated():
+    cfg = _cfg(video_query=EndpointLimit(rpm=60, burst=1))
+    pools = build_endpoint_pools(cfg)
+    query = pools[cfg.video_query_path]
+    image = pools[cfg.image_path]
+    assert query.name == "video_query" and image.name == "image"
+    assert query.limiter.try_acquire() is True
+    assert query.limiter.try_acquire() is False
+    # Draining the polling pool leaves generation budget untouched
+    assert image.limiter.try_acquire() is True
+
+
+def test_all_pools_share_the_account_rpm():
+    # Sub-caps on two kinds; the rest have none. Combined, the pools stay within RATE_LIMIT_RPM
+    cfg = _cfg(video_query=EndpointLimit(rpm=600), text=EndpointLimit(rpm=6000))
+    pools = build_endpoint_pools(cfg)
+    extra = endpoint_pool(pools, cfg, "/v1/files/retrieve")
+    every = list(pools.values())
+    assert extra in every and len(every) == 7
+    account = extra.account
+    assert all(pool.account is account for pool in every)
+    for _ in range(3):
+        for pool in every:
+            pool._sleep = lambda sec: None
+            with pool.slot():
+                pass
+    # 60 RPM, burst 1: 21 requests from any mix of pools leave 20 of them queued on one bucket
+    assert abs(account.available() + 20) < 0.05
+
+
+def test_queued_polls_do_not_delay_generation():
+    clock = FakeClock()
+    account = TokenBucket(60, clock=clock)
+    parked = threading.Semaphore(0)
+    release = threading.Event()
+
+    def park(sec):  # type: ignore[no-untyped-def]
+        parked.release()
+        release.wait(2)
+
+    polls = EndpointPool("video_query", TokenBucket(6, clock=clock), account=account, sleep=park)
+    image = EndpointPool("image", TokenBucket(0), account=account, sleep=lambda sec: None)
+
+    def poll():  # type: ignore[no-untyped-def]
+        with polls.slot():
+            pass
+
+    threads = [threading.Thread(target=poll) for _ in range(10)]
+    for t in threads:
+        t.start()
+    try:
+        # One poll goes out now; nine wait on the 6 RPM sub-cap (10 s apart) without account tokens
+        for _ in range(9):
+            assert parked.acquire(timeout=2)
+        with image.slot() as queued:
+            pass
+        assert queued == 1.0  # behind the one poll actually sent, not the next 90 s of polling
+    finally:
+        release.set()
+        for t in threads:
+            t.join()
+
+
+def test_endpoint_pool_concurrency_ceiling():
+    pool = EndpointPool("video", TokenBucket(0), max_concurrency=2)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        with pool.slot():
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) == 2
+
+
+def _fill_and_drain(lim, latency):
+    """Occupy every slot, then complete them all: one fully saturated window."""
+    tickets = [lim.acquire() for _ in range(lim.limit)]
+    for t in tickets:
+        lim.release(t, latency)
+
+
+def test_adaptive_limit_grows_then_backs_off():
+    from src.minimax.client import MiniMaxError
+    from src.minimax.metrics import REGISTRY
+    from src.minimax.ratelimit import AdaptiveConcurrencyLimiter
+
+    lim = AdaptiveConcurrencyLimiter("/v1/aimd", min_limit=1, max_limit=8)
+    for _ in range(12):
+        _fill_and_drain(lim, 0.1)
+    grown = lim.limit
+    assert 4 <= grown <= 8
+    assert REGISTRY.gauge("minimax_concurrency_limit", path="/v1/aimd") == grown
+
+    # Two 429s from the same window cut the limit once
+    tickets = [lim.acquire() for _ in range(2)]
+    for t in tickets:
+        lim.release(t, 0.1, MiniMaxError("slow down", http_status=429))
+    assert lim.limit == max(1, int(grown * 0.5))
+
+    # Client errors are not a capacity signal
+    before = lim.limit
+    lim.release(lim.acquire(), 0.1, MiniMaxError("bad request", http_status=400))
+    assert lim.limit == before
+
+
+def test_adaptive_pool_slot_feeds_back_errors():
+    from src.minimax.client import MiniMaxError
+    from src.minimax.ratelimit import AdaptiveConcurrencyLimiter
+
+    lim = AdaptiveConcurrencyLimiter("/v1/aimd-pool", min_limit=4, max_limit=8)
+    pool = EndpointPool("video", TokenBucket(0), adaptive=lim)
+    try:
+        with pool.slot():
+            raise MiniMaxError("unavailable", http_status=503)
+    except MiniMaxError:
+        pass
+    assert lim.limit == 4  # floor
+    assert lim.inflight == 0
+
+    # Latency well above baseline counts as overload even without errors
+    lim = AdaptiveConcurrencyLimiter("/v1/aimd-latency", min_limit=1, max_limit=8, window=10)
+    for _ in range(6):
+        _fill_and_drain(lim, 0.1)
+    grown = lim.limit
+    assert grown > 1
+    for _ in range(3):
+        lim.release(lim.acquire(), 5.0)
+    assert lim.limit < grown
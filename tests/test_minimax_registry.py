@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from src.minimax.client import MiniMaxClient
+from src.minimax.config import MiniMaxConfig, load_config
+from src.minimax.registry import get_client, reset_clients
+
+
+def test_get_client_shares_one_instance_per_config(monkeypatch):
+    reset_clients()
+    monkeypatch.setenv("MINIMAX_API_KEY", "KEY")
+    monkeypatch.setenv("MINIMAX_POOL_MAXSIZE", "7")
+    first = get_client()
+    assert get_client() is first
+    assert isinstance(first, MiniMaxClient)
+
+    adapter = first.session.get_adapter("https://api.minimax.io")
+    assert adapter._pool_maxsize == 7
+
+    # A different environment means a different config and so a different client
+    monkeypatch.setenv("MINIMAX_CACHE", "1")
+    assert get_client() is not first
+    assert get_client(load_config()) is get_client()
+    reset_clients()
+
+
+def test_keepalive_disabled_sends_connection_close():
+    cfg = MiniMaxConfig(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        pool_keepalive=0,
+    )
+    assert MiniMaxClient(cfg).session.headers["Connection"] == "close"
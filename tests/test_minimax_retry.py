@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+import requests
+
+from src.minimax.client import MiniMaxClient, MiniMaxError
+from src.minimax.config import MiniMaxConfig
+from src.minimax.retry import RetryPolicy, parse_retry_after
+
+
+class DummyResponse:
+    def __init__(self, status_code: int, data: Dict[str, Any], headers: Dict[str, str] | None = None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self) -> Dict[str, Any]:
+        return self._data
+
+
+def _client(monkeypatch, responses: List[DummyResponse], **overrides) -> tuple[MiniMaxClient, list, list]:
+    cfg = MiniMaxConfig(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=overrides.pop("max_retries", 4),
+        timeout_sec=5,
+        **overrides,
+    )
+    calls: list = []
+    sleeps: list = []
+
+    def fake_request(self, method, url, json, timeout):  # type: ignore[no-untyped-def]
+        calls.append(timeout)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    client = MiniMaxClient(cfg)
+    client._sleep = sleeps.append  # type: ignore[assignment]
+    return client, calls, sleeps
+
+
+def test_fatal_http_status_is_not_retried(monkeypatch):
+    client, calls, sleeps = _client(monkeypatch, [DummyResponse(401, {"error": "bad key"})])
+    try:
+        client.chat_completions([{"role": "user", "content": "hi"}])
+    except MiniMaxError as e:
+        assert e.http_status == 401
+        assert e.stats is not None and e.stats.attempts == 1 and e.stats.retries == 0
+    else:
+        assert False, "Expected MiniMaxError"
+    assert len(calls) == 1 and sleeps == []
+
+
+def test_retry_after_is_honoured_and_reported(monkeypatch):
+    ok = DummyResponse(200, {"base_resp": {"status_code": 0}, "ok": True})
+    client, calls, sleeps = _client(monkeypatch, [DummyResponse(429, {}, {"Retry-After": "2"}), ok])
+    out = client.chat_completions([{"role": "user", "content": "hi"}])
+    assert out["ok"] is True
+    assert sleeps == [2.0]
+    stats = client.last_call_stats
+    assert stats.attempts == 2 and stats.retries == 1 and stats.backoff_sec == 2.0 and stats.outcome == "ok"
+
+
+def test_base_resp_codes_are_classified(monkeypatch):
+    ok = DummyResponse(200, {"base_resp": {"status_code": 0}})
+    rpm_limited = DummyResponse(200, {"base_resp": {"status_code": 1002, "status_msg": "rate limit"}})
+    client, calls, _ = _client(monkeypatch, [rpm_limited, ok])
+    client.image_generation({"prompt": "x"})
+    assert len(calls) == 2
+
+    bad_params = DummyResponse(200, {"base_resp": {"status_code": 2013, "status_msg": "invalid params"}})
+    client, calls, _ = _client(monkeypatch, [bad_params, ok])
+    try:
+        client.image_generation({"prompt": "x"})
+    except MiniMaxError as e:
+        assert e.status_code == 2013
+    else:
+        assert False, "Expected MiniMaxError"
+    assert len(calls) == 1
+
+
+def test_deadline_stops_retries(monkeypatch):
+    slow = DummyResponse(503, {}, {"Retry-After": "120"})
+    client, calls, sleeps = _client(monkeypatch, [slow], retry_deadline_sec=30.0)
+    try:
+        client.video_query("job")
+    except MiniMaxError as e:
+        assert e.http_status == 503
+    else:
+        assert False, "Expected MiniMaxError"
+    assert len(calls) == 1 and sleeps == []
+    # Attempt timeout is shrunk to the remaining deadline when smaller than timeout_sec
+    assert calls[0] <= 5
+
+
+def test_full_jitter_and_retry_after_parsing():
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=4.0)
+    err = MiniMaxError("HTTP 502", status_code=502, http_status=502)
+    rng = random.Random(7)
+    delays = [policy.next_delay(attempt, err, 0.0, rng) for attempt in (1, 2, 3, 4)]
+    assert all(d is not None for d in delays)
+    assert 0 <= delays[0] <= 1.0 and 0 <= delays[3] <= 4.0
+    assert policy.next_delay(5, err, 0.0, rng) is None
+    assert parse_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:10 GMT"}, now=1445412480.0) == 10.0
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import httpx
+import requests
+
+from src.minimax.async_client import AsyncMiniMaxClient
+from src.minimax.client import MiniMaxClient, MiniMaxError
+from src.minimax.config import MiniMaxConfig
+from src.minimax.singleflight import SingleFlight
+
+
+class DummyResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {}
+        self.text = ""
+
+    def json(self):
+        return self._data
+
+
+def _cfg() -> MiniMaxConfig:
+    return MiniMaxConfig(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=1,
+        timeout_sec=5,
+    )
+
+
+def test_identical_concurrent_requests_share_one_call(monkeypatch):
+    calls = []
+
+    def fake_request(self, method, url, json, timeout):  # type: ignore[no-untyped-def]
+        calls.append(json["prompt"])
+        time.sleep(0.1)
+        return DummyResponse(200, {"base_resp": {"status_code": 0}, "audio": json["prompt"]})
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    client = MiniMaxClient(_cfg())
+    results = []
+    lock = threading.Lock()
+
+    def worker(prompt):
+        out = client.music_generation({"prompt": prompt})
+        with lock:
+            results.append(out["audio"])
+
+    threads = [threading.Thread(target=worker, args=("ambient",)) for _ in range(5)]
+    threads.append(threading.Thread(target=worker, args=("upbeat",)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(calls) == ["ambient", "upbeat"]
+    assert sorted(results) == ["ambient"] * 5 + ["upbeat"]
+
+
+def test_leader_error_propagates_to_followers():
+    flight = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise MiniMaxError("boom", status_code=500)
+
+    def follower():
+        started.wait()
+        try:
+            flight.do("k", lambda: "unused")
+        except MiniMaxError as e:
+            errors.append(str(e))
+
+    t = threading.Thread(target=follower)
+    t.start()
+    try:
+        flight.do("k", failing)
+    except MiniMaxError:
+        errors.append("leader")
+    t.join()
+    assert sorted(errors) == ["boom", "leader"]
+    assert flight.in_flight() == 0
+
+
+def test_async_identical_requests_coalesce():
+    hits = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"base_resp": {"status_code": 0}, "status": "processing"})
+
+    async def run():
+        http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncMiniMaxClient(_cfg(), client=http) as client:
+            return await asyncio.gather(*[client.video_query("job-1") for _ in range(4)])
+
+    results = asyncio.run(run())
+    assert len(hits) == 1
+    assert all(r["status"] == "processing" for r in results)
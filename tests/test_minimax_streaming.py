@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from src.minimax.async_client import AsyncMiniMaxClient
+from src.minimax.client import MiniMaxClient
+from src.minimax.config import MiniMaxConfig
+from src.minimax.streaming import B64File, StreamingJSONBody
+
+
+def _cfg(base_url: str) -> MiniMaxConfig:
+    return MiniMaxConfig(
+        base_url=base_url,
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+        max_retries=1,
+        timeout_sec=5,
+    )
+
+
+def test_body_matches_json_dumps(tmp_path):
+    for size in (0, 1, 2, 3, 10, 1000):
+        path = tmp_path / f"f{size}.bin"
+        path.write_bytes(bytes(range(256)) * (size // 256) + bytes(range(size % 256)))
+        payload = {"prompt": "café \"quoted\"", "images": [{"image_base64": B64File(path)}], "n": 1}
+        body = StreamingJSONBody(payload, chunk_bytes=7)  # rounded down to 6, forcing many chunks
+        raw = b"".join(body)
+        assert len(raw) == len(body)
+        decoded = json.loads(raw)
+        assert base64.b64decode(decoded["images"][0]["image_base64"]) == path.read_bytes()
+        assert decoded["prompt"] == payload["prompt"]
+        # Re-iterable for retries
+        assert b"".join(body) == raw
+
+
+def test_client_streams_file_fields_to_server(tmp_path):
+    media = tmp_path / "dish.jpg"
+    media.write_bytes(b"\xff\xd8" + b"x" * 500_000)
+    received = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):  # noqa: N802
+            received["headers"] = dict(self.headers)
+            received["body"] = self.rfile.read(int(self.headers["Content-Length"]))
+            out = json.dumps({"base_resp": {"status_code": 0}, "data": {"image_urls": ["u"]}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):  # silence test output
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        client = MiniMaxClient(_cfg(base))
+        client.image_generation({"prompt": "p", "images": [{"image_base64": B64File(media)}]})
+        sent = json.loads(received["body"])
+        assert "chunked" not in received["headers"].get("Transfer-Encoding", "")
+        assert received["headers"]["Content-Type"] == "application/json"
+        assert base64.b64decode(sent["images"][0]["image_base64"]) == media.read_bytes()
+
+        async def run():
+            async with AsyncMiniMaxClient(_cfg(base)) as aclient:
+                await aclient.video_generation({"prompt": "p", "audio_base64": B64File(media)})
+
+        asyncio.run(run())
+        sent = json.loads(received["body"])
+        assert base64.b64decode(sent["audio_base64"]) == media.read_bytes()
+    finally:
+        server.shutdown()
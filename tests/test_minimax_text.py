@@ -46,3 +46,95 @@ def test_generate_text_includes_system(monkeypatch):
     assert msgs[0]["role"] == "system"
     assert "YOU ARE SYSTEM" in msgs[0]["content"]
 
+
+
+class StreamingResponse:
+    def __init__(self, lines):
+        self.status_code = 200
+        self.headers = {}
+        self.text = ""
+        self._lines = lines
+        self.read = 0
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self._lines:
+            self.read += 1
+            yield line
+
+    def close(self):
+        self.closed = True
+
+
+def test_generate_text_stream_yields_deltas_and_stops_early(monkeypatch):
+    import json as _json
+
+    import requests
+
+    from src.minimax.text import generate_text_stream
+
+    chunks = ["Fresh ", "linguine ", "with ", "clams ", "tonight"]
+    lines = [f"data: {_json.dumps({'choices': [{'delta': {'content': c}}]})}" for c in chunks] + ["data: [DONE]"]
+    resp = StreamingResponse(lines)
+    called = {}
+
+    def fake_request(self, method, url, json, timeout, stream=False):  # type: ignore[override]
+        called["stream"] = stream
+        called["payload"] = json
+        return resp
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    cfg = MiniMaxConfig(
+        base_url="https://api.minimax.io",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+    )
+    client = MiniMaxClient(cfg)
+
+    it = generate_text_stream(client, messages=[{"role": "user", "content": "hi"}], system="SYS")
+    got = [next(it), next(it)]
+    it.close()
+    assert got == ["Fresh ", "linguine "]
+    assert called["stream"] is True and called["payload"]["stream"] is True
+    assert called["payload"]["messages"][0]["role"] == "system"
+    assert resp.closed and resp.read == 2
+    assert client.last_call_stats.outcome == "stopped"
+
+
+def test_max_tokens_sized_from_target_length_and_usage_recorded(monkeypatch):
+    import requests
+
+    from src.minimax.metrics import REGISTRY
+    from src.minimax.text import max_tokens_for_chars, narration_chars
+
+    # A 100-char Pinterest caption needs far less than the old flat 300 tokens, with headroom
+    assert 100 / 4 < max_tokens_for_chars(100) < 100
+    assert max_tokens_for_chars(100, reserve=200) == max_tokens_for_chars(100) + 200
+    assert max_tokens_for_chars(narration_chars(20)) < 300
+
+    def fake_request(self, method, url, json, timeout):  # type: ignore[override]
+        usage = {"prompt_tokens": 40, "completion_tokens": 30, "total_tokens": 70}
+        return DummyResponse(200, {"base_resp": {"status_code": 0}, "choices": [{"message": {"content": "x"}, "finish_reason": "length"}], "usage": usage})
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    REGISTRY.reset()
+    cfg = MiniMaxConfig(
+        base_url="https://usage.test",
+        api_key="KEY",
+        chat_model="MiniMax-M2",
+        image_model="image-01",
+        tts_model="speech-2.6-hd",
+        music_model="music-2.0",
+        video_model="MiniMax-Hailuo-2.3",
+        rate_limit_rpm=0,
+    )
+    generate_text(MiniMaxClient(cfg), messages=[{"role": "user", "content": "hi"}], max_tokens=60)
+    assert REGISTRY.counter("minimax_prompt_tokens_total", model="MiniMax-M2") == 40
+    assert REGISTRY.counter("minimax_completion_tokens_total", model="MiniMax-M2") == 30
+    assert REGISTRY.histogram("minimax_max_tokens_utilization", model="MiniMax-M2").max == 0.5
+    assert REGISTRY.counter("minimax_truncated_total", model="MiniMax-M2") == 1
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from src.pipeline.dag import Node, run_dag
+
+
+def _sleeper(log, name, delay=0.0, status="ok"):  # type: ignore[no-untyped-def]
+    def run(upstream):  # type: ignore[no-untyped-def]
+        log.append((name, dict(upstream)))
+        time.sleep(delay)
+        return status
+
+    return run
+
+
+def test_independent_nodes_overlap_and_dependents_see_upstream():
+    log = []
+    nodes = [
+        Node("a", _sleeper(log, "a", 0.2)),
+        Node("b", _sleeper(log, "b", 0.2, status="deferred: open")),
+        Node("c", _sleeper(log, "c"), needs=("a", "b")),
+    ]
+    started = time.monotonic()
+    results = run_dag(nodes, workers=3)
+    assert time.monotonic() - started < 0.35
+    assert results == {"a": "ok", "b": "deferred: open", "c": "ok"}
+    assert log[-1] == ("c", {"a": "ok", "b": "deferred: open"})
+
+
+def test_single_worker_runs_in_declaration_order():
+    log = []
+    nodes = [Node("c", _sleeper(log, "c"), needs=("a",)), Node("a", _sleeper(log, "a")), Node("b", _sleeper(log, "b"))]
+    run_dag(nodes, workers=1)
+    assert [name for name, _ in log] == ["a", "c", "b"]
+
+
+def test_halt_stops_new_nodes_and_exceptions_become_errors():
+    log = []
+
+    def boom(upstream):  # type: ignore[no-untyped-def]
+        raise RuntimeError("boom")
+
+    nodes = [Node("a", boom), Node("b", _sleeper(log, "b"), needs=("a",)), Node("c", _sleeper(log, "c"), needs=("b",))]
+    for workers in (1, 2):
+        results = run_dag(nodes, workers=workers, halt=lambda s: s.startswith("error"))
+        assert results == {"a": "error: boom"}
+    assert log == []
+
+
+def test_shared_slots_bound_concurrency():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def run(upstream):  # type: ignore[no-untyped-def]
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return "ok"
+
+    run_dag([Node(str(i), run) for i in range(4)], workers=4, slots=threading.BoundedSemaphore(2))
+    assert peak[0] == 2
+
+
+def test_unknown_dependencies_and_cycles_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        run_dag([Node("a", lambda u: "ok", needs=("missing",))])
+    with pytest.raises(ValueError, match="cycle"):
+        run_dag([Node("a", lambda u: "ok", needs=("b",)), Node("b", lambda u: "ok", needs=("a",))], workers=2)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+import time
 from pathlib import Path
 
 import src.pipeline.enhance as orch
@@ -8,6 +10,9 @@ import src.minimax.content as content_module
 import src.minimax.audio as audio_module
 import src.minimax.video as video_module
 import src.menu.utils as utils
+import src.pipeline.run_once as run_once
+from src.minimax.client import CircuitOpenError
+from src.pipeline.state import state_store
 
 
 def test_orchestrator_end_to_end_stubbed(tmp_path, monkeypatch):
@@ -95,3 +100,216 @@ def test_orchestrator_end_to_end_stubbed(tmp_path, monkeypatch):
     assert (bundle / "image.jpg").exists()
     assert (bundle / "video.mp4").exists()
     assert (bundle / "content.json").exists()
+
+
+def test_orchestrator_defers_step_on_open_circuit(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    monkeypatch.setattr(utils, "BUILD_DIR", tmp_path / "build")
+    monkeypatch.setattr(utils, "DATA_DIR", data)
+    monkeypatch.setattr(orch, "BUILD_DIR", tmp_path / "build")
+    (data / "slow-dish.jpg").write_bytes(b"RAW")
+
+    def open_circuit(s, **k):  # type: ignore[no-untyped-def]
+        raise CircuitOpenError("/v1/image_generation", 42)
+
+    marked = []
+    monkeypatch.setattr(orch, "enhance_image", open_circuit)
+    monkeypatch.setattr(orch, "generate_narration_script", lambda s, **k: {})
+    monkeypatch.setattr(orch, "write_seo_copy", lambda s, **k: {})
+    monkeypatch.setattr(orch, "mark_processed", lambda s: marked.append(s))
+
+    statuses = orch.orchestrate_enhancement("slow-dish", skip_audio=True)
+    assert statuses["image"].startswith("deferred: MiniMax circuit open")
+    assert statuses["content"] == "ok"  # independent step still ran
+    assert statuses["video"] == "deferred: waiting on image/audio"
+    assert statuses["finalize"] == "deferred"
+    assert marked == []
+
+
+def test_manifest_updates_are_queued_and_flushed_once(tmp_path, monkeypatch):
+    build, data, menu = tmp_path / "build", tmp_path / "data", tmp_path / "menu"
+    for d in (build / "processed", data, menu):
+        d.mkdir(parents=True)
+    (menu / "dinner.yaml").write_text(
+        "course: Dinner\nsections:\n  - name: Pasta\n    items:\n      - slug: dish-a\n      - slug: dish-b\n      - slug: dish-c\n",
+        encoding="utf-8",
+    )
+    (data / "dish-a.jpg").write_bytes(b"RAW")
+    (data / "dish-b.jpg").write_bytes(b"RAW")
+    monkeypatch.setattr(utils, "MENU_DIR", menu)
+    monkeypatch.setattr(utils, "DATA_DIR", data)
+    monkeypatch.setattr(utils, "BUILD_DIR", build)
+    monkeypatch.setattr(utils, "PROCESSED_DIR", build / "processed")
+
+    run_once.write_manifest()
+    before = (build / "manifest.csv").read_text(encoding="utf-8")
+    assert before.count(",new,") == 2 and "missing-image" in before
+
+    run_once.mark_processed("dish-b")
+    run_once.update_manifest("dish-b")
+    # Queued only: the CSV is untouched until the flush
+    assert (build / "manifest.csv").read_text(encoding="utf-8") == before
+
+    # Other slugs reuse their processed state from the CSV but pick up photo changes
+    (data / "dish-c.jpg").write_bytes(b"RAW")
+    lookups = []
+    store = state_store()
+    real_lookup = store.processed_at
+    monkeypatch.setattr(store, "processed_at", lambda slug: lookups.append(slug) or real_lookup(slug))
+    run_once.flush_manifest()
+    assert lookups == []
+    lines = (build / "manifest.csv").read_text(encoding="utf-8").splitlines()
+    assert [line.split(",")[0] for line in lines[1:]] == ["dish-a", "dish-b", "dish-c"]
+    assert ",processed," in lines[2] and ",new," in lines[1]
+    assert "dish-c,Dinner,Pasta,data/dish-c.jpg,new" in lines[3]
+    assert not (build / "manifest.pending.jsonl").exists()
+
+
+def test_flush_keeps_rows_queued_while_it_runs(tmp_path, monkeypatch):
+    build, data, menu = tmp_path / "build", tmp_path / "data", tmp_path / "menu"
+    for d in (build, data, menu):
+        d.mkdir(parents=True)
+    (menu / "dinner.yaml").write_text(
+        "course: Dinner\nsections:\n  - name: Pasta\n    items:\n      - slug: dish-a\n      - slug: dish-b\n      - slug: dish-c\n",
+        encoding="utf-8",
+    )
+    for slug in ("dish-a", "dish-b", "dish-c"):
+        (data / f"{slug}.jpg").write_bytes(b"RAW")
+    monkeypatch.setattr(utils, "MENU_DIR", menu)
+    monkeypatch.setattr(utils, "DATA_DIR", data)
+    monkeypatch.setattr(utils, "BUILD_DIR", build)
+    monkeypatch.setattr(utils, "PROCESSED_DIR", build / "processed")
+    assert run_once.manifest_path() == build / "manifest.csv"
+    run_once.write_manifest()
+
+    # A claimed log left behind by an interrupted flush is folded into the next one
+    run_once.mark_processed("dish-a")
+    run_once.update_manifest("dish-a")
+    run_once.manifest_log_path().rename(build / "manifest.pending.999.1.jsonl")
+
+    # A row another writer queues while the CSV is being rendered lands in a fresh log
+    run_once.mark_processed("dish-b")
+    late = run_once.manifest_log_path()
+    real_render = run_once._render_manifest
+
+    def render_while_queueing(rows):  # type: ignore[no-untyped-def]
+        late.write_text(json.dumps({"slug": "dish-b", "rows": run_once._manifest_rows(utils.load_catalog().get("dish-b"))}) + "\n")
+        return real_render(rows)
+
+    monkeypatch.setattr(run_once, "_render_manifest", render_while_queueing)
+    run_once.update_manifest("dish-c")
+    csv_text = run_once.flush_manifest().read_text(encoding="utf-8")
+    assert "dish-a,Dinner,Pasta,data/dish-a.jpg,processed" in csv_text
+    assert late.exists() and not list(build.glob("manifest.pending.*.jsonl"))
+
+    monkeypatch.setattr(run_once, "_render_manifest", real_render)
+    assert "dish-b,Dinner,Pasta,data/dish-b.jpg,processed" in run_once.flush_manifest().read_text(encoding="utf-8")
+    assert not late.exists()
+
+
+def test_unchanged_steps_are_skipped_until_inputs_change(tmp_path, monkeypatch):
+    build, data, items = tmp_path / "build", tmp_path / "data", tmp_path / "menu" / "items"
+    for d in (build, data, items):
+        d.mkdir(parents=True)
+    for module in (utils, orch, audio_module, video_module):
+        monkeypatch.setattr(module, "BUILD_DIR", build)
+    monkeypatch.setattr(utils, "DATA_DIR", data)
+    monkeypatch.setattr(utils, "MENU_DIR", tmp_path / "menu")
+    monkeypatch.setattr(content_module, "ITEM_OUTPUT_DIR", items)
+    monkeypatch.setattr(orch, "PLATFORM_ASSETS_DIR", build / "platform_assets")
+    (data / "veal.jpg").write_bytes(b"RAW")
+    item_json = items / "veal.json"
+    item_json.write_text(json.dumps({"slug": "veal", "name": "Veal", "ingredients": ["veal", "lemon"]}), encoding="utf-8")
+
+    calls = []
+
+    def write(relpath, payload):  # type: ignore[no-untyped-def]
+        path = build / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(payload)
+
+    def update_content(s, **fields):  # type: ignore[no-untyped-def]
+        content = orch._load_content_json(s)
+        content.update(fields)
+        write(f"content/{s}.json", json.dumps(content).encode("utf-8"))
+
+    def fake_image(s, **k):  # type: ignore[no-untyped-def]
+        calls.append("image")
+        write(f"enhanced_images/{s}_1.jpg", b"IMG")
+
+    def fake_script(s, **k):  # type: ignore[no-untyped-def]
+        calls.append("narration")
+        ingredients = json.loads(item_json.read_text(encoding="utf-8"))["ingredients"]
+        update_content(s, narration_script=f"Veal with {', '.join(ingredients)}")
+
+    def fake_copy(s, **k):  # type: ignore[no-untyped-def]
+        calls.append("copy")
+        update_content(s, platforms={"instagram_feed": {"caption": "Hi"}})
+
+    def fake_tts(s, **k):  # type: ignore[no-untyped-def]
+        calls.append("voice")
+        write(f"audio/{s}_voice.mp3", orch._load_content_json(s)["narration_script"].encode("utf-8"))
+
+    def fake_music(s, **k):  # type: ignore[no-untyped-def]
+        calls.append("music")
+        write(f"audio/{s}_music.mp3", b"MUSIC")
+
+    def fake_video(s, **k):  # type: ignore[no-untyped-def]
+        calls.append("video")
+        write(f"videos/{s}.mp4", b"VIDEO")
+
+    monkeypatch.setattr(orch, "enhance_image", fake_image)
+    monkeypatch.setattr(orch, "generate_narration_script", fake_script)
+    monkeypatch.setattr(orch, "write_seo_copy", fake_copy)
+    monkeypatch.setattr(orch, "synthesize_voice_for_slug", fake_tts)
+    monkeypatch.setattr(orch, "compose_music_for_slug", fake_music)
+    monkeypatch.setattr(orch, "render_video_for_slug", fake_video)
+    run = lambda **k: orch.orchestrate_enhancement("veal", platforms=["instagram_feed"], **k)  # noqa: E731
+
+    assert run()["video"] == "ok"
+    assert sorted(calls) == ["copy", "image", "music", "narration", "video", "voice"]
+
+    calls.clear()
+    statuses = run()
+    assert [statuses[s] for s in ("image", "content", "audio", "video", "finalize")] == ["unchanged"] * 4 + ["ok"]
+    assert calls == []
+
+    # New ingredients: copy, narration and everything downstream of the narration re-run; the photo does not
+    item_json.write_text(json.dumps({"slug": "veal", "name": "Veal", "ingredients": ["veal", "capers"]}), encoding="utf-8")
+    statuses = run()
+    assert statuses["image"] == "unchanged" and statuses["content"] == statuses["audio"] == statuses["video"] == "ok"
+    assert sorted(calls) == ["copy", "narration", "video", "voice"]
+
+    # A missing output re-runs its step even with unchanged inputs; force re-runs everything
+    calls.clear()
+    (build / "videos" / "veal.mp4").unlink()
+    assert run()["video"] == "ok" and calls == ["video"]
+    calls.clear()
+    assert run(force=True)["image"] == "ok" and "image" in calls
+
+
+def test_independent_steps_run_concurrently(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    for module in (utils, orch):
+        monkeypatch.setattr(module, "BUILD_DIR", tmp_path / "build")
+    monkeypatch.setattr(utils, "DATA_DIR", data)
+    monkeypatch.setattr(orch, "PLATFORM_ASSETS_DIR", tmp_path / "build" / "platform_assets")
+    monkeypatch.setenv("PIPELINE_STAGE_CONCURRENCY", "3")
+    (data / "fast-dish.jpg").write_bytes(b"RAW")
+
+    def slow(s, **k):  # type: ignore[no-untyped-def]
+        time.sleep(0.2)
+
+    for name in ("enhance_image", "write_seo_copy", "compose_music_for_slug"):
+        monkeypatch.setattr(orch, name, slow)
+    monkeypatch.setattr(orch, "generate_narration_script", lambda s, **k: None)
+    monkeypatch.setattr(orch, "synthesize_voice_for_slug", lambda s, **k: None)
+
+    started = time.monotonic()
+    statuses = orch.orchestrate_enhancement("fast-dish", skip_video=True)
+    # image, content and music overlap: about one step's time instead of three
+    assert time.monotonic() - started < 0.5
+    assert list(statuses) == ["validate", "image", "content", "audio", "video", "finalize"]
+    assert statuses["audio"] == "ok" and statuses["video"] == "skipped" and statuses["finalize"] == "ok"
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import sqlite3
+
+import src.menu.utils as utils
+from src.pipeline.state import StateStore, state_store
+
+
+def test_markers_are_migrated_once(tmp_path):
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    (processed / "dish-a.done").write_text("2025-11-01T10:00:00+00:00\n", encoding="utf-8")
+    (processed / "dish-b.done").write_text("2025-11-02T10:00:00+00:00\n", encoding="utf-8")
+
+    store = StateStore(tmp_path / "state.db", migrate_from=processed)
+    assert store.processed() == {"dish-a": "2025-11-01T10:00:00+00:00", "dish-b": "2025-11-02T10:00:00+00:00"}
+    assert sqlite3.connect(tmp_path / "state.db").execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # A later marker is not re-imported; the database is the source of truth from now on
+    (processed / "dish-c.done").write_text("2025-11-03T10:00:00+00:00\n", encoding="utf-8")
+    assert store.migrate_markers(processed) == 0
+    assert store.processed_at("dish-c") is None
+
+
+def test_unprocessed_with_images_follows_catalog_order(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    store.sync_items([("dish-c", True), ("dish-a", False), ("dish-b", True), ("dish-d", True)])
+    store.mark_processed("dish-b", "2025-11-01T00:00:00+00:00")
+
+    assert store.unprocessed_with_images() == ["dish-c", "dish-d"]
+    assert store.unprocessed_with_images(1) == ["dish-c"]
+    assert store.unprocessed_with_images(include_processed=True) == ["dish-c", "dish-b", "dish-d"]
+    # Re-syncing keeps processed state
+    store.sync_items([("dish-b", True), ("dish-c", True)])
+    assert store.processed_at("dish-b") == "2025-11-01T00:00:00+00:00"
+
+
+def test_slugs_dropped_from_the_catalog_stop_being_candidates(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    store.sync_items([("a", True), ("b", True), ("c", True)])
+    store.mark_processed("c", "2025-11-01T00:00:00+00:00")
+    # "b" renamed to "b2" and "c" removed from the menu
+    store.sync_items([("a", True), ("b2", True)])
+    assert store.unprocessed_with_images() == ["a", "b2"]
+    assert store.unprocessed_with_images(include_processed=True) == ["a", "b2"]
+    # A slug that comes back keeps its processed state
+    store.sync_items([("a", True), ("b2", True), ("c", True)])
+    assert store.unprocessed_with_images() == ["a", "b2"]
+    assert store.processed_at("c") == "2025-11-01T00:00:00+00:00"
+
+
+def test_stage_outcomes_are_recorded(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "BUILD_DIR", tmp_path / "build")
+    store = state_store()
+    assert store.path == tmp_path / "build" / "state.db"
+    assert state_store() is store
+
+    store.record_stages("dish-a", {"image": "ok", "content": "error: boom"}, {"image": 1.25}, {"image": "abc123"})
+    stages = store.stages("dish-a")
+    assert stages["image"]["status"] == "ok" and stages["image"]["duration_sec"] == 1.25
+    assert stages["image"]["input_hash"] == "abc123"
+    assert stages["content"]["status"] == "error: boom" and stages["content"]["duration_sec"] is None